@@ -0,0 +1,392 @@
+"""
+JSON API (v1) for the quiz flow, for single-page and mobile clients.
+
+Same state and services as the HTML pages, without cookies: starting a quiz
+returns an opaque token (the server-side quiz session id) used in the URL of
+every later step. Slow steps (question generation, evaluation) answer
+202 with a job to poll, like the loading pages do.
+
+  GET  /api/v1/topics                   themes and topics (ETag, cacheable)
+  GET  /api/v1/teams                    national teams (cacheable)
+  POST /api/v1/quiz                     {"contest": "national", "team"} or
+                                        {"contest": "personal", "topics": [...]}
+  GET  /api/v1/quiz/<token>/question    current question, or 202 while prepared
+  POST /api/v1/quiz/<token>/answer      {"answer"}: 202 until evaluated
+  GET  /api/v1/quiz/<token>/evaluation  evaluation, or 202 while evaluated
+                                        (?detail=1 adds evidence and references)
+  POST /api/v1/quiz/<token>/next        personal: move to the next question
+  POST /api/v1/quiz/<token>/results     final results (records the national score once)
+  GET  /api/v1/jobs/<job_id>            job progress
+  GET  /api/v1/leaderboard              today's leaderboard (?limit=)
+
+Errors are {"ok": false, "error": "<code>"} with a 4xx/5xx status.
+"""
+
+from typing import Dict
+
+from flask import Blueprint, jsonify, request, url_for
+
+from app.services.evaluation import (
+    national_submission,
+    personal_submission,
+    start_national_evaluation_job,
+    start_personal_evaluation_job,
+    submit_national_answer,
+    submit_personal_answer,
+)
+from app.services.quiz import (
+    active_topics,
+    create_national_quiz,
+    create_personal_quiz,
+    get_daily_question,
+    personal_question_ready,
+    start_daily_question_job,
+    start_personal_question_job,
+)
+from app.services.results import (
+    counts_on_leaderboard,
+    national_results,
+    personal_results,
+)
+from app.utils.constants import TEAM_LIST
+from app.utils.db import list_topics, recommendations_db
+from app.utils.idempotency import idempotency_store
+from app.utils.jobs import job_manager, public_status
+from app.utils.log import get_logger
+from app.utils.scoreboard import scoreboard
+from app.utils.session_storage import session_storage
+
+log = get_logger("api")
+
+api_bp = Blueprint("api", __name__)
+
+# Recommendation fields sent with an evaluation; the long ones only with ?detail=1
+RECOMMENDATION_FIELDS = ("recommendation", "grade", "link")
+RECOMMENDATION_DETAIL_FIELDS = ("evidence", "references")
+
+
+class ApiError(Exception):
+    def __init__(self, error: str, status: int = 400):
+        super().__init__(error)
+        self.error = error
+        self.status = status
+
+
+@api_bp.errorhandler(ApiError)
+def _api_error(e: ApiError):
+    return jsonify({"ok": False, "error": e.error}), e.status
+
+
+def _load(token: str) -> Dict:
+    quiz_data = session_storage.get_quiz_data(token)
+    if not quiz_data or quiz_data.get("contest") not in ("national", "personal"):
+        raise ApiError("unknown_quiz", 404)
+    return quiz_data
+
+
+def _pending(job_id: str):
+    return (
+        jsonify(
+            {
+                "ok": True,
+                "status": "pending",
+                "job": job_id,
+                "poll": url_for("api.job", job_id=job_id),
+            }
+        ),
+        202,
+    )
+
+
+def _no_store(response):
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def _question_payload(question: Dict, number: int, total: int) -> Dict:
+    # The recommendation stays server-side until the answer is evaluated
+    return {
+        "ok": True,
+        "n": number,
+        "of": total,
+        "topic": question.get("topic"),
+        "vignette": question.get("vignette"),
+        "question": question.get("question"),
+    }
+
+
+def _evaluation_payload(evaluation: Dict) -> Dict:
+    recommendation = evaluation.get("recommendation") or {}
+    fields = RECOMMENDATION_FIELDS
+    if request.args.get("detail") == "1":
+        fields += RECOMMENDATION_DETAIL_FIELDS
+    return {
+        "ok": True,
+        "score": evaluation.get("score"),
+        "feedback": evaluation.get("feedback"),
+        "recommendation": {k: recommendation.get(k) for k in fields},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reference data
+# ---------------------------------------------------------------------------
+
+
+@api_bp.route("/topics")
+def topics():
+    """Themes with their topics as [topic, title, subtitle] triples."""
+    catalog = recommendations_db.topic_catalog()
+    response = jsonify(
+        {
+            "v": recommendations_db.version,
+            "themes": [
+                [theme, [[e["topic"], e["title"], e["subtitle"]] for e in entries]]
+                for theme, entries in catalog.items()
+            ],
+        }
+    )
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@api_bp.route("/teams")
+def teams():
+    response = jsonify({"teams": TEAM_LIST})
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@api_bp.route("/leaderboard")
+def leaderboard():
+    limit = request.args.get("limit", type=int)
+    rows = scoreboard.get_top_teams(limit=limit if limit and limit > 0 else None)
+    response = jsonify(
+        {
+            "teams": [
+                {
+                    "team": r["team_name"],
+                    "avg": r["average_score"],
+                    "total": r["total_score"],
+                    "players": r["player_count"],
+                }
+                for r in rows
+            ]
+        }
+    )
+    response.headers["Cache-Control"] = "public, max-age=5"
+    return response
+
+
+@api_bp.route("/jobs/<job_id>")
+def job(job_id):
+    job = job_manager.get(job_id)
+    if not job:
+        raise ApiError("unknown_job", 404)
+    status = public_status(job)
+    payload = {"ok": True, "status": status["status"], "progress": status["progress"]}
+    for key in ("stage", "eta_s", "error"):
+        if status.get(key) is not None:
+            payload[key] = status[key]
+    return _no_store(jsonify(payload))
+
+
+# ---------------------------------------------------------------------------
+# Quiz flow
+# ---------------------------------------------------------------------------
+
+
+@api_bp.route("/quiz", methods=["POST"])
+def start_quiz():
+    body = request.get_json(silent=True) or {}
+    contest = body.get("contest")
+    if contest == "national":
+        team = body.get("team")
+        if team not in TEAM_LIST:
+            raise ApiError("invalid_team")
+        token = create_national_quiz(team)
+    elif contest == "personal":
+        topics = body.get("topics")
+        available = set(list_topics())
+        selected = (
+            [t for t in topics if t in available] if isinstance(topics, list) else []
+        )
+        if not selected:
+            raise ApiError("invalid_topics")
+        token = create_personal_quiz(selected)
+    else:
+        raise ApiError("invalid_contest")
+    if not token:
+        raise ApiError("storage_unavailable", 503)
+    log.info("api_quiz_started", contest=contest)
+    return jsonify({"ok": True, "token": token, "contest": contest}), 201
+
+
+@api_bp.route("/quiz/<token>/question")
+def question(token):
+    quiz_data = _load(token)
+    if quiz_data["contest"] == "national":
+        question = get_daily_question()
+        if question is None:
+            job_id = start_daily_question_job()
+            if job_id:
+                return _pending(job_id)
+            question = get_daily_question()
+        return _no_store(jsonify(_question_payload(question, 1, 1)))
+
+    if not personal_question_ready(quiz_data):
+        if not active_topics(quiz_data):
+            return _no_store(jsonify({"ok": True, "finished": True}))
+        job_id = start_personal_question_job(token, quiz_data)
+        if job_id:
+            return _pending(job_id)
+        quiz_data = _load(token)
+    index = quiz_data.get("current_question", 0)
+    payload = _question_payload(
+        quiz_data["questions"][index], index + 1, len(active_topics(quiz_data))
+    )
+    return _no_store(jsonify(payload))
+
+
+@api_bp.route("/quiz/<token>/answer", methods=["POST"])
+def answer(token):
+    """Record the answer (first one wins) and start its evaluation."""
+    quiz_data = _load(token)
+    body = request.get_json(silent=True) or {}
+    user_answer = str(body.get("answer") or "").strip()
+
+    if quiz_data["contest"] == "national":
+        question = get_daily_question()
+        if question is None:
+            raise ApiError("no_question", 409)
+        if not submit_national_answer(token, question, user_answer):
+            raise ApiError("storage_unavailable", 503)
+    else:
+        if not personal_question_ready(quiz_data):
+            raise ApiError("no_question", 409)
+        if not submit_personal_answer(token, quiz_data, user_answer):
+            raise ApiError("storage_unavailable", 503)
+    return get_evaluation(token)
+
+
+def _stored_evaluation(quiz_data: Dict) -> Dict:
+    """Evaluation of the current answer ({} while pending); no_answer if none."""
+    if quiz_data["contest"] == "national":
+        if not national_submission(quiz_data):
+            raise ApiError("no_answer", 409)
+        return quiz_data.get("evaluation") or {}
+    submission = personal_submission(quiz_data, quiz_data.get("current_question", 0))
+    if submission is None:
+        raise ApiError("no_answer", 409)
+    return submission.get("evaluation") or {}
+
+
+@api_bp.route("/quiz/<token>/evaluation")
+def get_evaluation(token):
+    """The stored evaluation, or 202 with the job evaluating it."""
+    quiz_data = _load(token)
+    evaluation = _stored_evaluation(quiz_data)
+    if not evaluation:
+        try:
+            if quiz_data["contest"] == "national":
+                job_id = start_national_evaluation_job(token)
+            else:
+                job_id = start_personal_evaluation_job(token, quiz_data)
+        except Exception as e:
+            log.error(
+                "evaluate_failed", contest=quiz_data["contest"], api=True, error=str(e)
+            )
+            raise ApiError("exception", 500)
+        if job_id:
+            return _pending(job_id)
+        # Stored meanwhile by a job that just finished
+        evaluation = _stored_evaluation(_load(token))
+        if not evaluation:
+            raise ApiError("evaluation_unavailable", 503)
+    return _no_store(jsonify(_evaluation_payload(evaluation)))
+
+
+@api_bp.route("/quiz/<token>/next", methods=["POST"])
+def next_question(token):
+    """Personal contest: move past an evaluated question.
+
+    `{"n": <current question number>}` in the body makes retries safe: only
+    the first request for a given number moves the quiz forward.
+    """
+    quiz_data = _load(token)
+    if quiz_data["contest"] != "personal":
+        raise ApiError("not_personal", 409)
+    index = quiz_data.get("current_question", 0)
+    expected = (request.get_json(silent=True) or {}).get("n")
+    if expected is None or expected == index + 1:
+        submission = personal_submission(quiz_data, index)
+        if submission is None or not submission.get("evaluation"):
+            raise ApiError("not_evaluated", 409)
+        quiz_data["current_question"] = index + 1
+        if not session_storage.update_quiz_data(token, quiz_data):
+            raise ApiError("storage_unavailable", 503)
+    return _no_store(jsonify({"ok": True, "n": quiz_data["current_question"] + 1}))
+
+
+@api_bp.route("/quiz/<token>/results", methods=["POST"])
+def results(token):
+    """Final results. The national score enters the leaderboard once per quiz."""
+    quiz_data = _load(token)
+    if quiz_data["contest"] == "national":
+        evaluation = quiz_data.get("evaluation")
+        if not evaluation:
+            raise ApiError("not_evaluated", 409)
+        stats = national_results(evaluation)
+        ranked = counts_on_leaderboard(evaluation)
+        # The flag lives as long as the quiz data; the claim only guards
+        # concurrent requests
+        claim_key = f"api:results:{token}"
+        if (
+            ranked
+            and not quiz_data.get("score_recorded")
+            and idempotency_store.claim(claim_key)
+        ):
+            quiz_data["score_recorded"] = True
+            if not session_storage.update_quiz_data(token, quiz_data):
+                idempotency_store.release(claim_key)
+                raise ApiError("storage_unavailable", 503)
+            scoreboard.add_score(quiz_data["team"], stats["total_score"])
+        return _no_store(
+            jsonify(
+                {
+                    "ok": True,
+                    "team": quiz_data["team"],
+                    "score": stats["total_score"],
+                    "max": stats["max_possible"],
+                    "category": stats["category"],
+                    "ranked": ranked,
+                }
+            )
+        )
+
+    submission = personal_submission(quiz_data, quiz_data.get("current_question", 0))
+    if submission is not None and not submission.get("evaluation"):
+        raise ApiError("not_evaluated", 409)
+    stats = personal_results(quiz_data)
+    return _no_store(
+        jsonify(
+            {
+                "ok": True,
+                "mean": stats["mean_score"],
+                "answered": stats["answers_count"],
+                "topics": [
+                    {
+                        "topic": t["topic"],
+                        "answered": t["answered_count"],
+                        "available": t["total_available"],
+                        "avg": t["average_score"],
+                    }
+                    for t in stats["topic_stats"]
+                ],
+            }
+        )
+    )
@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, Response, abort, jsonify, render_template, request
+from app.utils.jobs import job_manager, public_status
+from app.utils.telemetry import llm_metrics, metrics_authorized
 
 main_bp = Blueprint("main", __name__)
 
@@ -6,3 +8,27 @@ main_bp = Blueprint("main", __name__)
 @main_bp.route("/")
 def index():
     return render_template("index.html")
+
+
+@main_bp.route("/metrics")
+def metrics():
+    """Prometheus text exposition of LLM telemetry (optionally token-protected)."""
+    if not metrics_authorized(
+        request.headers.get("Authorization"), request.args.get("token")
+    ):
+        abort(403)
+    return Response(
+        llm_metrics.render_prometheus(),
+        mimetype="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@main_bp.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Progress of a background job, polled by the loading pages."""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "unknown_job"}), 404
+    response = jsonify(dict(public_status(job), ok=True))
+    response.headers["Cache-Control"] = "no-store"
+    return response
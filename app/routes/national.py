@@ -1,61 +1,36 @@
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
-from datetime import datetime, timedelta
+from flask import (
+    Blueprint,
+    Response,
+    render_template,
+    request,
+    session,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+)
 from app.utils.constants import TEAM_LIST
-from app.utils.vignette import generate_vignette_and_question
-from app.utils.scorer import evaluate_answer, calculate_total_score
 from app.utils.scoreboard import scoreboard
+from app.utils.idempotency import idempotent
+from app.utils.leaderboard_stream import leaderboard_broadcaster, team_entry
 from app.utils.session_storage import session_storage
+from app.services.evaluation import (
+    national_submission,
+    start_national_evaluation_job,
+    submit_national_answer,
+)
+from app.services.quiz import get_daily_question, start_daily_question_job
+from app.services.results import counts_on_leaderboard, national_results
+from app.utils.log import get_logger
 import uuid
-import json
-import pytz
+
+log = get_logger("routes")
 
 TOTAL_QUESTIONS = 1
 
 national_bp = Blueprint("national", __name__)
 
 
-def _paris_today_str():
-    tz = pytz.timezone("Europe/Paris")
-    return datetime.now(tz).strftime("%Y-%m-%d")
-
-
-def _daily_question_key():
-    return f"national:question:{_paris_today_str()}"
-
-
-def _get_or_create_daily_question():
-    rc = session_storage.redis_client
-    key = _daily_question_key()
-    # Try fetch existing
-    if rc:
-        try:
-            raw = rc.get(key)
-            if raw:
-                if isinstance(raw, bytes):
-                    raw = raw.decode("utf-8")
-                return json.loads(raw)
-        except Exception as e:
-            print(f"WARNING: read daily question failed: {e}")
-
-    # Generate a new shared question
-    q = generate_vignette_and_question()
-    if not q:
-        return None
-    if rc:
-        try:
-            rc.setex(key, 26 * 3600, json.dumps(q, default=str))
-            # Best-effort cleanup of yesterday
-            try:
-                tz = pytz.timezone("Europe/Paris")
-                yday = (datetime.now(tz) - timedelta(days=1)).strftime("%Y-%m-%d")
-                rc.delete(f"national:question:{yday}")
-            except Exception:
-                pass
-        except Exception as e:
-            print(f"WARNING: store daily question failed: {e}")
-    return q
-
-
 @national_bp.route("/")
 def index():
     """National contest landing page with team selection."""
@@ -105,13 +80,15 @@ def quiz():
         flash("Session invalide, veuillez recommencer", "error")
         return redirect(url_for("national.index"))
 
-    # Use the daily shared question
-    question = _get_or_create_daily_question()
+    # Use the daily shared question; it is generated by a job behind the loading page
+    question = get_daily_question()
     if not question:
-        flash("Erreur lors de la préparation de la question du jour", "error")
-        return redirect(url_for("national.index"))
-    print(f"DEBUG: Displaying question, keys: {question.keys()}")
-    print(f"DEBUG: Session keys before rendering: {list(session.keys())}")
+        return redirect(url_for("national.quiz_loading"))
+    log.debug(
+        "question_displayed",
+        question_keys=lambda: list(question.keys()),
+        session_keys=lambda: list(session.keys()),
+    )
 
     return render_template(
         "quiz.html",
@@ -125,98 +102,141 @@ def quiz():
 
 @national_bp.route("/quiz_loading")
 def quiz_loading():
-    """Loading screen shown while preparing quiz data via OpenAI."""
+    """Loading screen polling the question preparation job."""
     if "team" not in session or session.get("contest_type") != "national":
         flash("Veuillez d'abord sélectionner votre équipe", "error")
         return redirect(url_for("national.index"))
-    return render_template("national/loading.html")
+    return render_template(
+        "loading.html",
+        heading="Préparation de la question du jour",
+        prepare_url=url_for("national.quiz_prepare"),
+        next_url=url_for("national.quiz"),
+        cancel_url=url_for("national.index"),
+    )
 
 
-@national_bp.route("/quiz_prepare")
+@national_bp.route("/quiz_prepare", methods=["POST"])
 def quiz_prepare():
-    """Prepare quiz data (idempotent). Returns JSON status."""
+    """Start (or join) the job preparing today's question. Returns JSON status."""
     if "team" not in session or session.get("contest_type") != "national":
         return jsonify({"ok": False, "error": "invalid_session"}), 400
 
     try:
-        if _get_or_create_daily_question() is None:
-            return jsonify({"ok": False, "error": "generation_failed"}), 500
-        return jsonify({"ok": True, "status": "ready"})
+        job_id = start_daily_question_job()
     except Exception as e:
-        print(f"ERROR: quiz_prepare failed: {e}")
+        log.error("quiz_prepare_failed", contest="national", error=str(e))
         return jsonify({"ok": False, "error": "exception"}), 500
+    if job_id is None:
+        return jsonify({"ok": True, "status": "ready"})
+    return jsonify(
+        {
+            "ok": True,
+            "status": "pending",
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+        }
+    ), 202
 
 
 @national_bp.route("/submit_answer", methods=["POST"])
+@idempotent
 def submit_answer():
-    """Process submitted answer and redirect to results."""
-    print(f"DEBUG: submit_answer called")
-    print(f"DEBUG: Session keys: {list(session.keys())}")
-    print(f"DEBUG: Session size estimate: {len(str(dict(session)))} bytes")
-    print(f"DEBUG: Contest type: {session.get('contest_type')}")
-    print(f"DEBUG: Team in session: {'team' in session}")
-    
+    """Record the answer, start its evaluation and redirect to the result page."""
     if "team" not in session or session.get("contest_type") != "national":
-        print("DEBUG: Redirecting to index - no team or wrong contest type")
         flash("Session expirée", "error")
         return redirect(url_for("national.index"))
 
     # Get today's question and session id
     quiz_session_id = session.get("quiz_session_id")
-    question_data = _get_or_create_daily_question()
+    question_data = get_daily_question()
     if not quiz_session_id or not question_data:
         flash("Session expirée - veuillez recommencer", "error")
         return redirect(url_for("national.index"))
 
     user_answer = request.form.get("answer", "").strip()
-    
-    print(f"DEBUG: User answer: {user_answer[:50]}...")
-    print(f"DEBUG: Question data keys: {question_data.keys()}")
-    
-    evaluation = evaluate_answer(user_answer, question_data)
-    print(f"DEBUG: Evaluation result: {evaluation}")
-
-    if not evaluation:
-        print("DEBUG: No evaluation returned, using fallback")
-        evaluation = {
-            "score": 0,
-            "feedback": "Erreur lors de l'évaluation - aucune réponse de l'IA",
-        }
+    if not submit_national_answer(quiz_session_id, question_data, user_answer):
+        flash("Erreur de stockage de session", "error")
+        return redirect(url_for("national.quiz"))
 
-    # Store results for this session (do not modify shared question key)
-    store = {"question": question_data, "user_answer": user_answer, "evaluation": evaluation}
-    if not session_storage.update_quiz_data(quiz_session_id, store):
-        print("WARNING: Failed to update quiz results in Redis")
-    
     session["quiz_completed"] = True
     session.modified = True
-    
-    print(f"DEBUG: Results stored in Redis, showing feedback")
-    print(f"DEBUG: Quiz completed flag: {session.get('quiz_completed')}")
-    print(f"DEBUG: Evaluation stored in Redis: {store.get('evaluation') is not None}")
-    print(f"DEBUG: Session keys after update: {list(session.keys())}")
+    return redirect(url_for("national.result"))
+
+
+@national_bp.route("/result")
+def result():
+    """Show the evaluation once stored; until then, poll the evaluation job."""
+    if "team" not in session or session.get("contest_type") != "national":
+        flash("Session expirée", "error")
+        return redirect(url_for("national.index"))
+
+    quiz_session_id = session.get("quiz_session_id")
+    quiz_data = (
+        session_storage.get_quiz_data(quiz_session_id) if quiz_session_id else None
+    )
+    if not national_submission(quiz_data):
+        return redirect(url_for("national.quiz"))
+
+    evaluation = quiz_data.get("evaluation")
+    if not evaluation:
+        return render_template(
+            "loading.html",
+            heading="Évaluation de votre réponse",
+            prepare_url=url_for("national.evaluate"),
+            next_url=url_for("national.result"),
+            cancel_url=url_for("national.index"),
+        )
 
     return render_template(
         "result.html",
         evaluation=evaluation,
-        question_data=question_data,
+        question_data=quiz_data["question"],
         question_number=1,
         total_questions=TOTAL_QUESTIONS,
         contest_type="national",
     )
 
 
+@national_bp.route("/evaluate", methods=["POST"])
+def evaluate():
+    """Start (or join) the evaluation job of the answer. Returns JSON status."""
+    quiz_session_id = session.get("quiz_session_id")
+    if (
+        "team" not in session
+        or session.get("contest_type") != "national"
+        or not quiz_session_id
+    ):
+        return jsonify({"ok": False, "error": "invalid_session"}), 400
+    if not national_submission(session_storage.get_quiz_data(quiz_session_id)):
+        return jsonify({"ok": False, "error": "no_answer"}), 400
+
+    try:
+        job_id = start_national_evaluation_job(quiz_session_id)
+    except Exception as e:
+        log.error("evaluate_failed", contest="national", error=str(e))
+        return jsonify({"ok": False, "error": "exception"}), 500
+    if job_id is None:
+        return jsonify({"ok": True, "status": "ready"})
+    return jsonify(
+        {
+            "ok": True,
+            "status": "pending",
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+        }
+    ), 202
 
 
 @national_bp.route("/results")
 def results():
     """Show final results and update leaderboard."""
-    print(f"DEBUG: Results route accessed")
-    print(f"DEBUG: Session keys in results: {list(session.keys())}")
-    print(f"DEBUG: Session size in results: {len(str(dict(session)))} bytes")
-    print(f"DEBUG: Quiz completed in results: {session.get('quiz_completed')}")
-    print(f"DEBUG: Evaluation exists in results: {session.get('evaluation') is not None}")
-    
+    log.debug(
+        "results_accessed",
+        session_keys=lambda: list(session.keys()),
+        session_size=lambda: len(str(dict(session))),
+        quiz_completed=lambda: session.get("quiz_completed"),
+    )
+
     if "team" not in session or session.get("contest_type") != "national":
         flash("Session expirée", "error")
         return redirect(url_for("national.index"))
@@ -230,22 +250,28 @@ def results():
     quiz_data = session_storage.get_quiz_data(quiz_session_id) if quiz_session_id else None
     
     if not quiz_session_id or not quiz_data:
-        print("DEBUG: No quiz session ID or quiz data not found in Redis")
+        log.debug("results_session_missing", has_session_id=bool(quiz_session_id))
         flash("Session expirée", "error")
         return redirect(url_for("national.index"))
     
     evaluation = quiz_data.get("evaluation")
     if not evaluation:
-        print("DEBUG: No evaluation found in Redis - redirecting to quiz")
-        flash("Résultats non trouvés", "error")
-        return redirect(url_for("national.quiz"))
+        # Evaluation still running: wait for it on the result page
+        return redirect(url_for("national.result"))
 
     # Calculate final score (single question)
-    final_stats = calculate_total_score([evaluation["score"]])
+    final_stats = national_results(evaluation)
     team = session["team"]
 
     # Add to leaderboard
-    scoreboard.add_score(team, final_stats["total_score"])
+    if counts_on_leaderboard(evaluation):
+        scoreboard.add_score(team, final_stats["total_score"])
+    else:
+        log.info("score_not_ranked", team=team, reason="degraded")
+        flash(
+            "Score provisoire : il n'est pas compté dans le classement de l'équipe",
+            "warning",
+        )
 
     # Get current leaderboard
     leaderboard = scoreboard.get_top_teams()
@@ -255,7 +281,7 @@ def results():
     # Clean up Redis session data
     if quiz_session_id:
         session_storage.delete_quiz_data(quiz_session_id)
-        print(f"DEBUG: Cleaned up Redis data for session {quiz_session_id[:8]}...")
+        log.debug("quiz_data_cleaned", session_id=quiz_session_id[:8])
 
     # Clear session
     for key in [
@@ -283,6 +309,27 @@ def leaderboard():
     return render_template("national/leaderboard.html", leaderboard=all_teams)
 
 
+@national_bp.route("/leaderboard/stream")
+def leaderboard_stream():
+    """Server-sent events: today's leaderboard, then score deltas as they happen."""
+    # Subscribed before the snapshot is read, so no update falls in between
+    subscription = leaderboard_broadcaster.subscribe()
+    if subscription is None:
+        return Response(status=503, headers={"Retry-After": "30"})
+    snapshot = {
+        "day": scoreboard.current_day(),
+        "teams": [
+            team_entry(r["team_name"], r["total_score"], r["player_count"])
+            for r in scoreboard.get_top_teams(limit=None)
+        ],
+    }
+    return Response(
+        leaderboard_broadcaster.stream(subscription, snapshot),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
 @national_bp.route("/clear_session")
 def clear_session():
     """Clear session for debugging - remove in production."""
@@ -1,10 +1,32 @@
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash
+from flask import (
+    Blueprint,
+    render_template,
+    request,
+    session,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+)
 from app.utils.constants import QUESTION_COUNT
 from app.utils.db import list_topics, recommendations_db
-from app.utils.vignette import generate_vignette_and_question
-from app.utils.scorer import evaluate_answer, calculate_total_score, get_score_category
+from app.utils.idempotency import idempotent
+from app.utils.log import get_logger
 from app.utils.session_storage import session_storage
-import uuid
+from app.services.evaluation import (
+    personal_submission,
+    start_personal_evaluation_job,
+    submit_personal_answer,
+)
+from app.services.results import personal_results
+from app.services.quiz import (
+    active_topics,
+    create_personal_quiz,
+    personal_question_ready,
+    start_personal_question_job,
+)
+
+log = get_logger("routes")
 
 personal_bp = Blueprint("personal", __name__)
 
@@ -12,35 +34,13 @@ personal_bp = Blueprint("personal", __name__)
 @personal_bp.route("/")
 def index():
     """Personal contest landing page with topic selection, grouped by Theme."""
-    # Default flat topics (fallback)
-    topics = list_topics()
-    topics_by_theme = {}
-    try:
-        df = recommendations_db.get_all_recommendations()
-        themes = recommendations_db.list_themes()
-        for theme in themes:
-            try:
-                theme_topics = (
-                    df[df["Theme"] == theme]["Topic"].dropna().unique().tolist()
-                )
-                theme_topics = sorted(theme_topics)
-            except Exception:
-                theme_topics = []
-            if theme_topics:
-                topics_by_theme[theme] = theme_topics
-        # Fallback bucket when no theme grouping found
-        if not topics_by_theme and topics:
-            topics_by_theme["Autres"] = topics
-    except Exception:
-        # If grouping fails, keep flat list
-        topics_by_theme = {"Autres": topics}
-
-    return render_template(
-        "personal/index.html", topics=topics, topics_by_theme=topics_by_theme
-    )
+    # Grouping and topic labels are computed once per dataset version
+    topics_by_theme = recommendations_db.topic_catalog()
+    return render_template("personal/index.html", topics_by_theme=topics_by_theme)
 
 
 @personal_bp.route("/select_topic", methods=["POST"])
+@idempotent
 def select_topic():
     """Handle topic selection (one or many) and start personal quiz."""
     selected = request.form.getlist("topics") or []
@@ -53,39 +53,15 @@ def select_topic():
         return redirect(url_for("personal.index"))
 
     # Create a server-side quiz session and minimal client session
-    quiz_session_id = str(uuid.uuid4())
+    quiz_session_id = create_personal_quiz(selected)
+    if not quiz_session_id:
+        flash("Erreur de stockage de session", "error")
+        return redirect(url_for("personal.index"))
     session.permanent = True
     session["contest_type"] = "personal"
     session["quiz_session_id"] = quiz_session_id
 
-    total_questions = len(selected)  # one question per selected topic per cycle
-
-    # Build per-topic pools of recommendations (shuffled)
-    import random
-    topic_pools = {}
-    for t in selected:
-        try:
-            recs = recommendations_db.get_recommendations_by_topic(t)
-        except Exception:
-            recs = []
-        random.shuffle(recs)
-        topic_pools[t] = recs
-
-    quiz_data = {
-        "topics": selected,
-        "current_question": 0,
-        "questions": [],
-        "answers": [],
-        "scores": [],
-        "total_questions": total_questions,
-        "topic_pools": topic_pools,
-    }
-
-    if not session_storage.store_quiz_data(quiz_session_id, quiz_data):
-        flash("Erreur de stockage de session", "error")
-        return redirect(url_for("personal.index"))
-
-    return redirect(url_for("personal.quiz"))
+    return redirect(url_for("personal.quiz_loading"))
 
 
 @personal_bp.route("/quiz")
@@ -106,36 +82,17 @@ def quiz():
         return redirect(url_for("personal.index"))
 
     current_q = quiz_data.get("current_question", 0)
-    topics = quiz_data.get("topics", [])
     # Total topics still active this round (with remaining recommendations)
-    pools = quiz_data.get("topic_pools", {})
-    active_topics = [t for t in topics if pools.get(t)] if topics else []
-    total_questions = len(active_topics)
-
-    # Generate new question if needed
-    if len(quiz_data["questions"]) <= current_q:
-        pools = quiz_data.get("topic_pools", {})
-        if not topics:
+    total_questions = len(active_topics(quiz_data))
+
+    # Questions are generated by a job behind the loading page
+    if not personal_question_ready(quiz_data):
+        if not quiz_data.get("topics"):
             flash("Aucun sujet sélectionné", "error")
             return redirect(url_for("personal.index"))
-        # Round-robin among active topics only; if none, finish
-        active_topics = [t for t in topics if pools.get(t)]
-        if not active_topics:
+        if not total_questions:
             return redirect(url_for("personal.results"))
-        target_topic = active_topics[current_q % len(active_topics)]
-        pool = pools.get(target_topic, [])
-        # Take next recommendation from the pool
-        recommendation = pool.pop(0)
-        pools[target_topic] = pool
-        quiz_data["topic_pools"] = pools
-        question_data = generate_vignette_and_question(topic=target_topic, recommendation=recommendation)
-        if not question_data:
-            flash("Erreur lors de la génération de la question", "error")
-            return redirect(url_for("personal.index"))
-        quiz_data["questions"].append(question_data)
-        if not session_storage.update_quiz_data(quiz_session_id, quiz_data):
-            flash("Erreur lors de la mise à jour de la session", "error")
-            return redirect(url_for("personal.index"))
+        return redirect(url_for("personal.quiz_loading"))
 
     question = quiz_data["questions"][current_q]
     question_number = current_q + 1
@@ -150,9 +107,54 @@ def quiz():
     )
 
 
+@personal_bp.route("/quiz_loading")
+def quiz_loading():
+    """Loading screen polling the question preparation job."""
+    if session.get("contest_type") != "personal" or not session.get("quiz_session_id"):
+        flash("Veuillez d'abord sélectionner votre/vos sujet(s)", "error")
+        return redirect(url_for("personal.index"))
+    return render_template(
+        "loading.html",
+        heading="Préparation de votre question",
+        prepare_url=url_for("personal.quiz_prepare"),
+        next_url=url_for("personal.quiz"),
+        cancel_url=url_for("personal.index"),
+    )
+
+
+@personal_bp.route("/quiz_prepare", methods=["POST"])
+def quiz_prepare():
+    """Start (or join) the job preparing the current question. Returns JSON status."""
+    quiz_session_id = session.get("quiz_session_id")
+    if session.get("contest_type") != "personal" or not quiz_session_id:
+        return jsonify({"ok": False, "error": "invalid_session"}), 400
+
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not quiz_data:
+        return jsonify({"ok": False, "error": "session_expired"}), 400
+
+    try:
+        job_id = start_personal_question_job(quiz_session_id, quiz_data)
+    except Exception as e:
+        log.error("quiz_prepare_failed", contest="personal", error=str(e))
+        return jsonify({"ok": False, "error": "exception"}), 500
+    if job_id is None:
+        # Question already there, or no topic left (the quiz page redirects to results)
+        return jsonify({"ok": True, "status": "ready"})
+    return jsonify(
+        {
+            "ok": True,
+            "status": "pending",
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+        }
+    ), 202
+
+
 @personal_bp.route("/submit_answer", methods=["POST"])
+@idempotent
 def submit_answer():
-    """Process submitted answer and show results (server-side)."""
+    """Record the answer, start its evaluation and redirect to the result page."""
     if session.get("contest_type") != "personal":
         flash("Session expirée", "error")
         return redirect(url_for("personal.index"))
@@ -174,31 +176,85 @@ def submit_answer():
         flash("Question non trouvée", "error")
         return redirect(url_for("personal.quiz"))
 
-    # Evaluate answer
-    question_data = quiz_data["questions"][current_q]
-    evaluation = evaluate_answer(user_answer, question_data)
-    if not evaluation:
-        evaluation = {
-            "score": 0,
-            "feedback": "Erreur lors de l'évaluation - aucune réponse de l'IA",
-        }
+    if not submit_personal_answer(quiz_session_id, quiz_data, user_answer):
+        flash("Erreur lors de la mise à jour de la session", "error")
+        return redirect(url_for("personal.quiz"))
 
-    # Store answer and score in server-side state
-    quiz_data["answers"].append(user_answer)
-    quiz_data["scores"].append(evaluation["score"])
-    session_storage.update_quiz_data(quiz_session_id, quiz_data)
+    return redirect(url_for("personal.result"))
+
+
+@personal_bp.route("/result")
+def result():
+    """Show the current question's evaluation once stored; until then, poll the job."""
+    if session.get("contest_type") != "personal":
+        flash("Session expirée", "error")
+        return redirect(url_for("personal.index"))
+
+    quiz_session_id = session.get("quiz_session_id")
+    quiz_data = (
+        session_storage.get_quiz_data(quiz_session_id) if quiz_session_id else None
+    )
+    if not quiz_data:
+        flash("Session expirée", "error")
+        return redirect(url_for("personal.index"))
+
+    current_q = quiz_data.get("current_question", 0)
+    submission = personal_submission(quiz_data, current_q)
+    if submission is None:
+        return redirect(url_for("personal.quiz"))
+
+    evaluation = submission.get("evaluation")
+    if not evaluation:
+        return render_template(
+            "loading.html",
+            heading="Évaluation de votre réponse",
+            prepare_url=url_for("personal.evaluate"),
+            next_url=url_for("personal.result"),
+            cancel_url=url_for("personal.index"),
+        )
 
     return render_template(
         "result.html",
         evaluation=evaluation,
-        question_data=question_data,
+        question_data=quiz_data["questions"][current_q],
         question_number=current_q + 1,
         total_questions=QUESTION_COUNT,
         contest_type="personal",
     )
 
 
+@personal_bp.route("/evaluate", methods=["POST"])
+def evaluate():
+    """Start (or join) the evaluation job of the current answer. Returns JSON status."""
+    quiz_session_id = session.get("quiz_session_id")
+    if session.get("contest_type") != "personal" or not quiz_session_id:
+        return jsonify({"ok": False, "error": "invalid_session"}), 400
+
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not quiz_data:
+        return jsonify({"ok": False, "error": "session_expired"}), 400
+    if personal_submission(quiz_data, quiz_data.get("current_question", 0)) is None:
+        return jsonify({"ok": False, "error": "no_answer"}), 400
+
+    try:
+        job_id = start_personal_evaluation_job(quiz_session_id, quiz_data)
+    except Exception as e:
+        log.error("evaluate_failed", contest="personal", error=str(e))
+        return jsonify({"ok": False, "error": "exception"}), 500
+    if job_id is None:
+        return jsonify({"ok": True, "status": "ready"})
+    return jsonify(
+        {
+            "ok": True,
+            "status": "pending",
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+        }
+    ), 202
+
+
 @personal_bp.route("/next_question", methods=["POST"])
+@idempotent
 def next_question():
     """Move to next question (server-side state)."""
     if session.get("contest_type") != "personal":
@@ -235,72 +291,16 @@ def results():
         flash("Session expirée", "error")
         return redirect(url_for("personal.index"))
 
-    scores = quiz_data.get("scores", [])
-    answers_count = len(scores)
-    mean_score = round(sum(scores) / answers_count, 1) if answers_count else 0
-
-    # Build per-topic statistics based on answered questions
-    questions = quiz_data.get("questions", [])
-    topic_map = {}
-    for i in range(min(len(questions), answers_count)):
-        q = questions[i] or {}
-        t = q.get("topic") or "Sujet inconnu"
-        s = scores[i] if i < len(scores) else 0
-        if t not in topic_map:
-            topic_map[t] = {
-                "topic": t,
-                "answered_count": 0,
-                "total_available": 0,  # will compute using pools below
-                "score_sum": 0.0,
-            }
-        topic_map[t]["answered_count"] += 1
-        topic_map[t]["score_sum"] += float(s or 0)
-
-    def score_level(avg: float) -> str:
-        # Map average score (0-5) to a discrete level for CSS classes
-        if avg >= 4.5:
-            return "excellent"
-        if avg >= 3.75:
-            return "tres-bien"
-        if avg >= 3.0:
-            return "bien"
-        if avg >= 2.0:
-            return "moyen"
-        return "insuffisant"
-
-    topic_stats = []
-    pools = quiz_data.get("topic_pools", {}) or {}
-    for t, v in topic_map.items():
-        answered = v["answered_count"]
-        remaining = len(pools.get(t, []))
-        total = answered + remaining
-        avg = round((v["score_sum"] / answered), 1) if answered else 0
-        percentage = round((avg / 5.0) * 100, 1)
-        answered_pct = round((answered / total) * 100, 1) if total > 0 else 0
-        topic_stats.append(
-            {
-                "topic": t,
-                "answered_count": answered,
-                "total_available": total,
-                "average_score": avg,
-                "percentage": percentage,
-                "answered_percentage": answered_pct,
-                "category": get_score_category(avg),
-                "level": score_level(avg),
-            }
-        )
+    submission = personal_submission(quiz_data, quiz_data.get("current_question", 0))
+    if submission is not None and not submission.get("evaluation"):
+        # Last answer still being evaluated: wait for it on the result page
+        return redirect(url_for("personal.result"))
 
-    # Sort by average score descending
-    topic_stats.sort(key=lambda x: x["average_score"], reverse=True)
+    stats = personal_results(quiz_data)
 
     # Clear server-side state and session keys
     session_storage.delete_quiz_data(quiz_session_id)
     for key in ["contest_type", "quiz_session_id"]:
         session.pop(key, None)
 
-    return render_template(
-        "personal/results.html",
-        mean_score=mean_score,
-        answers_count=answers_count,
-        topic_stats=topic_stats,
-    )
+    return render_template("personal/results.html", **stats)
@@ -0,0 +1,583 @@
+"""
+Bulk LLM work (question banks, re-scoring) through the provider's batch interface.
+
+A job lives in its own working directory:
+
+    job.json        state (task, batch id, status) - rewritten after every step
+    requests.jsonl  one Responses API request per line, keyed by custom_id
+    output.jsonl    raw provider output for the submitted batch
+    results.jsonl   parsed, successful items (appended; drives resume)
+    errors.jsonl    items that failed, with the reason
+
+Every step is idempotent, so an interrupted job is resumed by running it again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.utils.dataset import content_hash
+from app.utils.log import get_logger
+from app.utils.openai_client import (
+    build_request_body,
+    scoring_messages,
+    vignette_messages,
+)
+from app.utils.structured import (
+    SCORING_SCHEMA,
+    VIGNETTE_SCHEMA,
+    parse_scoring_output,
+    parse_vignette_output,
+)
+
+log = get_logger("batch")
+
+BATCH_ENDPOINT = "/v1/responses"
+
+# Provider-neutral statuses
+PENDING_STATUSES = {"validating", "in_progress", "finalizing"}
+DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def recommendation_key(recommendation: Dict) -> str:
+    """Identifier of a recommendation, preferring an explicit id."""
+    rid = recommendation.get("id")
+    if rid:
+        return str(rid)
+    h = hashlib.sha1()
+    for field in ("theme", "topic", "recommendation"):
+        h.update(str(recommendation.get(field, "")).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:12]
+
+
+def response_text(body: Dict) -> str:
+    """Concatenate output_text parts of a raw Responses API body."""
+    if not isinstance(body, dict):
+        return ""
+    if body.get("output_text"):
+        return body["output_text"]
+    chunks = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for part in item.get("content") or []:
+            if part.get("type") == "output_text":
+                chunks.append(part.get("text", ""))
+    return "".join(chunks)
+
+
+# ---------------------------------------------------------------------------
+# Tasks: how to build a request for an item and how to parse its result
+# ---------------------------------------------------------------------------
+
+
+def _vignette_request(recommendation: Dict) -> Dict:
+    # The content revision makes a re-run over an updated dataset only
+    # generate questions for added or changed recommendations
+    revision = content_hash(recommendation)[:8]
+    return {
+        "custom_id": f"vignette:{recommendation_key(recommendation)}:{revision}",
+        "body": build_request_body(
+            vignette_messages(recommendation), schema=VIGNETTE_SCHEMA
+        ),
+        "item": {"recommendation": recommendation},
+    }
+
+
+def _vignette_result(text: str, item: Dict) -> Optional[Dict]:
+    parsed, _ = parse_vignette_output(text)
+    if not parsed:
+        return None
+    recommendation = item["recommendation"]
+    return {
+        "vignette": parsed["vignette"],
+        "question": parsed["question"],
+        "recommendation": recommendation,
+        "topic": recommendation.get("topic", ""),
+        "theme": recommendation.get("theme", ""),
+    }
+
+
+def _scoring_request(item: Dict) -> Dict:
+    item_id = (
+        item.get("id")
+        or hashlib.sha1(
+            json.dumps(item, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:12]
+    )
+    messages = scoring_messages(
+        item.get("user_answer", ""),
+        item.get("recommendation", {}),
+        item.get("vignette", ""),
+        item.get("question", ""),
+    )
+    return {
+        "custom_id": f"scoring:{item_id}",
+        "body": build_request_body(messages, schema=SCORING_SCHEMA),
+        "item": item,
+    }
+
+
+def _scoring_result(text: str, item: Dict) -> Optional[Dict]:
+    evaluation, _ = parse_scoring_output(text)
+    # A salvaged output has no score: an error, retried by the next run
+    if not evaluation or evaluation["score"] is None:
+        return None
+    return dict(item, evaluation=evaluation)
+
+
+TASKS = {
+    "vignette": (_vignette_request, _vignette_result),
+    "scoring": (_scoring_request, _scoring_result),
+}
+
+
+# ---------------------------------------------------------------------------
+# Providers
+# ---------------------------------------------------------------------------
+
+
+class BatchProvider:
+    """Interface to an asynchronous batch backend."""
+
+    def submit(self, requests_path: str, metadata: Optional[Dict] = None) -> str:
+        """Upload a requests JSONL file and start a batch. Returns the batch id."""
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> Dict:
+        """Return {"status": ..., "counts": {...}} for a batch."""
+        raise NotImplementedError
+
+    def download(self, batch_id: str, dest_path: str) -> bool:
+        """Write the batch output (successes and errors) as JSONL to dest_path."""
+        raise NotImplementedError
+
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch API (24h completion window, discounted pricing)."""
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        if client is None:
+            import openai
+
+            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str, metadata: Optional[Dict] = None) -> str:
+        with open(requests_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata=metadata or None,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        return {
+            "status": batch.status,
+            "counts": {
+                "total": getattr(counts, "total", 0) if counts else 0,
+                "completed": getattr(counts, "completed", 0) if counts else 0,
+                "failed": getattr(counts, "failed", 0) if counts else 0,
+            },
+        }
+
+    def download(self, batch_id: str, dest_path: str) -> bool:
+        batch = self.client.batches.retrieve(batch_id)
+        file_ids = [fid for fid in (batch.output_file_id, batch.error_file_id) if fid]
+        if not file_ids:
+            return False
+        with open(dest_path, "wb") as out:
+            for fid in file_ids:
+                data = self.client.files.content(fid).content
+                out.write(data)
+                if data and not data.endswith(b"\n"):
+                    out.write(b"\n")
+        return True
+
+
+def _mock_responder(custom_id: str, body: Dict) -> str:
+    """Canned, well-formed answers matching each task's expected format."""
+    structured = "text" in body
+    if custom_id.startswith("scoring:"):
+        feedback = "Réponse correcte mais incomplète (réponse locale)."
+        if structured:
+            return json.dumps({"score": 3, "feedback": feedback}, ensure_ascii=False)
+        return f"SCORE: 3\nFEEDBACK: {feedback}"
+    vignette = "Patient de 45 ans pris en charge au bloc opératoire (réponse locale)."
+    question = "Quelle est votre prise en charge ?"
+    if structured:
+        return json.dumps(
+            {"vignette": vignette, "question": question}, ensure_ascii=False
+        )
+    return f"VIGNETTE:\n{vignette}\n\nQUESTION:\n{question}"
+
+
+class LocalBatchProvider(BatchProvider):
+    """File-based stand-in for the batch API, with no network.
+
+    Batches are "processed" on the first status poll after `delay` seconds, by
+    calling `responder(custom_id, body) -> text` for each request. `fail_every`
+    makes every n-th request fail, to exercise per-item error handling.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        responder: Callable[[str, Dict], str] = None,
+        delay: float = 0.0,
+        fail_every: int = 0,
+    ):
+        self.root_dir = root_dir
+        self.responder = responder or _mock_responder
+        self.delay = delay
+        self.fail_every = fail_every
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _dir(self, batch_id: str) -> str:
+        return os.path.join(self.root_dir, batch_id)
+
+    def submit(self, requests_path: str, metadata: Optional[Dict] = None) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._dir(batch_id))
+        shutil.copyfile(requests_path, os.path.join(self._dir(batch_id), "input.jsonl"))
+        self._write_meta(batch_id, {"status": "validating", "created": time.time()})
+        return batch_id
+
+    def _read_meta(self, batch_id: str) -> Dict:
+        with open(
+            os.path.join(self._dir(batch_id), "meta.json"), "r", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+
+    def _write_meta(self, batch_id: str, meta: Dict) -> None:
+        with open(
+            os.path.join(self._dir(batch_id), "meta.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(meta, f)
+
+    def _process(self, batch_id: str, meta: Dict) -> Dict:
+        counts = {"total": 0, "completed": 0, "failed": 0}
+        src = os.path.join(self._dir(batch_id), "input.jsonl")
+        dst = os.path.join(self._dir(batch_id), "output.jsonl")
+        with open(src, "r", encoding="utf-8") as fin, open(
+            dst, "w", encoding="utf-8"
+        ) as fout:
+            for line in fin:
+                if not line.strip():
+                    continue
+                req = json.loads(line)
+                counts["total"] += 1
+                custom_id = req["custom_id"]
+                if self.fail_every and counts["total"] % self.fail_every == 0:
+                    counts["failed"] += 1
+                    out = {
+                        "id": f"req_{counts['total']}",
+                        "custom_id": custom_id,
+                        "response": {"status_code": 500, "body": {}},
+                        "error": {
+                            "code": "server_error",
+                            "message": "simulated failure",
+                        },
+                    }
+                else:
+                    counts["completed"] += 1
+                    text = self.responder(custom_id, req.get("body") or {})
+                    out = {
+                        "id": f"req_{counts['total']}",
+                        "custom_id": custom_id,
+                        "response": {
+                            "status_code": 200,
+                            "body": {
+                                "output": [
+                                    {
+                                        "type": "message",
+                                        "content": [
+                                            {"type": "output_text", "text": text}
+                                        ],
+                                    }
+                                ]
+                            },
+                        },
+                        "error": None,
+                    }
+                fout.write(json.dumps(out, ensure_ascii=False) + "\n")
+        meta.update({"status": "completed", "counts": counts})
+        self._write_meta(batch_id, meta)
+        return meta
+
+    def status(self, batch_id: str) -> Dict:
+        meta = self._read_meta(batch_id)
+        if meta["status"] != "completed":
+            if time.time() - meta["created"] < self.delay:
+                meta["status"] = "in_progress"
+                self._write_meta(batch_id, meta)
+            else:
+                meta = self._process(batch_id, meta)
+        return {"status": meta["status"], "counts": meta.get("counts", {})}
+
+    def download(self, batch_id: str, dest_path: str) -> bool:
+        src = os.path.join(self._dir(batch_id), "output.jsonl")
+        if not os.path.exists(src):
+            return False
+        shutil.copyfile(src, dest_path)
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Job pipeline
+# ---------------------------------------------------------------------------
+
+
+class BatchJob:
+    """One resumable batch job rooted in a working directory."""
+
+    def __init__(self, workdir: str, provider: BatchProvider, task: str = "vignette"):
+        if task not in TASKS:
+            raise ValueError(f"Unknown batch task: {task}")
+        self.workdir = workdir
+        self.provider = provider
+        os.makedirs(workdir, exist_ok=True)
+        self.state = self._load_state() or {
+            "task": task,
+            "batch_id": None,
+            "status": "new",
+        }
+        self.task = self.state["task"]
+
+    # -- state -------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.workdir, name)
+
+    def _load_state(self) -> Optional[Dict]:
+        try:
+            with open(self._path("job.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_state(self) -> None:
+        tmp = self._path("job.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self._path("job.json"))
+
+    def _done_ids(self) -> set:
+        done = set()
+        try:
+            with open(self._path("results.jsonl"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        done.add(json.loads(line)["custom_id"])
+                    except (ValueError, KeyError):
+                        continue
+        except FileNotFoundError:
+            pass
+        return done
+
+    # -- steps -------------------------------------------------------------
+
+    def prepare(self, items: Iterable[Dict]) -> int:
+        """Write requests.jsonl for items not yet ingested. Returns request count."""
+        build_request, _ = TASKS[self.task]
+        done = self._done_ids()
+        seen = set()
+        count = 0
+        with open(self._path("requests.jsonl"), "w", encoding="utf-8") as reqs, open(
+            self._path("items.jsonl"), "w", encoding="utf-8"
+        ) as items_out:
+            for item in items:
+                req = build_request(item)
+                custom_id = req["custom_id"]
+                if custom_id in done or custom_id in seen:
+                    continue
+                seen.add(custom_id)
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": req["body"],
+                }
+                reqs.write(json.dumps(line, ensure_ascii=False) + "\n")
+                items_out.write(
+                    json.dumps(
+                        {"custom_id": custom_id, "item": req["item"]},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                count += 1
+        self.state.update(
+            {"status": "prepared", "batch_id": None, "request_count": count}
+        )
+        self._save_state()
+        log.info("prepared", requests=count, already_ingested=len(done))
+        return count
+
+    def submit(self) -> Optional[str]:
+        """Submit the prepared requests, unless a batch is already in flight."""
+        if self.state.get("batch_id"):
+            return self.state["batch_id"]
+        if not self.state.get("request_count"):
+            log.info("nothing_to_submit")
+            return None
+        batch_id = self.provider.submit(
+            self._path("requests.jsonl"), metadata={"task": self.task}
+        )
+        self.state.update(
+            {
+                "batch_id": batch_id,
+                "status": "submitted",
+                "submitted_at": datetime.now().isoformat(),
+            }
+        )
+        self._save_state()
+        log.info("submitted", batch_id=batch_id)
+        return batch_id
+
+    def poll(self, interval: float = 30.0, timeout: Optional[float] = None) -> str:
+        """Wait until the batch reaches a terminal status and return it."""
+        batch_id = self.state.get("batch_id")
+        if not batch_id:
+            raise RuntimeError("Batch job has not been submitted")
+        started = time.monotonic()
+        while True:
+            info = self.provider.status(batch_id)
+            status = info.get("status")
+            self.state.update(
+                {"provider_status": status, "counts": info.get("counts", {})}
+            )
+            self._save_state()
+            if status in DONE_STATUSES:
+                return status
+            if timeout is not None and time.monotonic() - started >= timeout:
+                return status
+            log.info(
+                "polling", batch_id=batch_id, status=status, next_poll_s=round(interval)
+            )
+            time.sleep(interval)
+
+    def ingest(self) -> Dict:
+        """Parse provider output into results.jsonl / errors.jsonl."""
+        batch_id = self.state.get("batch_id")
+        if not batch_id:
+            raise RuntimeError("Batch job has not been submitted")
+        output_path = self._path("output.jsonl")
+        if not self.provider.download(batch_id, output_path):
+            log.warning("no_output", batch_id=batch_id)
+            if self.state.get("provider_status") in DONE_STATUSES:
+                # A dead batch (failed, expired, cancelled): forget it so the
+                # next run prepares and submits the remaining items again
+                self.state.update(
+                    {"status": "failed", "batch_id": None, "failed_batch_id": batch_id}
+                )
+                self._save_state()
+            return {"ok": 0, "failed": 0, "skipped": 0}
+
+        items = {}
+        with open(self._path("items.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                items[entry["custom_id"]] = entry["item"]
+
+        _, parse_result = TASKS[self.task]
+        done = self._done_ids()
+        stats = {"ok": 0, "failed": 0, "skipped": 0}
+        with open(output_path, "r", encoding="utf-8") as fin, open(
+            self._path("results.jsonl"), "a", encoding="utf-8"
+        ) as ok_out, open(self._path("errors.jsonl"), "a", encoding="utf-8") as err_out:
+            for line in fin:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    custom_id = row["custom_id"]
+                except (ValueError, KeyError) as e:
+                    err_out.write(json.dumps({"error": f"unreadable line: {e}"}) + "\n")
+                    stats["failed"] += 1
+                    continue
+                if custom_id in done:
+                    stats["skipped"] += 1
+                    continue
+                error = self._row_error(row)
+                result = None
+                if not error:
+                    try:
+                        text = response_text(row["response"]["body"])
+                        result = parse_result(text, items.get(custom_id, {}))
+                    except Exception as e:
+                        error = f"parse error: {e}"
+                    if result is None and not error:
+                        error = "unparseable model output"
+                if error:
+                    err_out.write(
+                        json.dumps(
+                            {"custom_id": custom_id, "error": error}, ensure_ascii=False
+                        )
+                        + "\n"
+                    )
+                    stats["failed"] += 1
+                    continue
+                ok_out.write(
+                    json.dumps(
+                        {"custom_id": custom_id, "result": result}, ensure_ascii=False
+                    )
+                    + "\n"
+                )
+                done.add(custom_id)
+                stats["ok"] += 1
+
+        self.state.update({"status": "ingested", "ingest": stats})
+        self._save_state()
+        log.info("ingested", **stats)
+        return stats
+
+    @staticmethod
+    def _row_error(row: Dict) -> Optional[str]:
+        if row.get("error"):
+            err = row["error"]
+            return err.get("message") if isinstance(err, dict) else str(err)
+        response = row.get("response") or {}
+        if response.get("status_code") != 200:
+            return f"HTTP {response.get('status_code')}"
+        return None
+
+    def run(
+        self,
+        items: Iterable[Dict],
+        interval: float = 30.0,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """prepare -> submit -> poll -> ingest, resuming from the saved state."""
+        if self.state.get("status") in ("new", "ingested", "failed"):
+            if not self.prepare(items):
+                return {"ok": 0, "failed": 0, "skipped": 0}
+        self.submit()
+        status = self.poll(interval=interval, timeout=timeout)
+        if status not in DONE_STATUSES:
+            log.info("still_pending", status=status, hint="run again later to resume")
+            return {"ok": 0, "failed": 0, "skipped": 0}
+        return self.ingest()
+
+    def results(self) -> List[Dict]:
+        """All successfully ingested results."""
+        out = []
+        try:
+            with open(self._path("results.jsonl"), "r", encoding="utf-8") as f:
+                for line in f:
+                    out.append(json.loads(line)["result"])
+        except FileNotFoundError:
+            pass
+        return out
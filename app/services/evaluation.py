@@ -0,0 +1,242 @@
+"""
+Answer evaluation run as a background job (post-redirect-get).
+
+The submit POST only records the answer and starts the job, then redirects
+to a result page. That page shows the stored evaluation, or polls the job
+until it is stored. The evaluation is written once into the quiz session
+data, so reloading the result page never evaluates again. Job bodies have a
+coroutine twin (`*_async`) for JOBS_EXECUTOR=async.
+
+Stored layout:
+  national: quiz_data = {"question", "user_answer", "evaluation"}
+  personal: quiz_data["submissions"][str(index)] = {"answer", "evaluation"}
+"""
+
+from typing import Dict, Optional
+
+from app.utils.jobs import JobContext, JobFailed, job_manager
+from app.utils.openai_client import latency_tracker
+from app.utils.scorer import evaluate_answer, evaluate_answer_async
+from app.utils.session_storage import session_storage
+
+# Shown until enough scoring latencies are recorded for a real estimate
+DEFAULT_SCORING_ETA_S = 15.0
+
+FALLBACK_EVALUATION = {
+    "score": 0,
+    "feedback": "Erreur lors de l'évaluation - aucune réponse de l'IA",
+}
+
+
+def _scoring_eta() -> float:
+    return latency_tracker.percentile("scoring", 50) or DEFAULT_SCORING_ETA_S
+
+
+def _evaluate(ctx: Optional[JobContext], user_answer: str, question_data: Dict) -> Dict:
+    if ctx:
+        ctx.update(
+            "evaluating", 20, "Évaluation de votre réponse…", eta_s=_scoring_eta()
+        )
+    evaluation = evaluate_answer(user_answer, question_data)
+    if not evaluation:
+        evaluation = dict(FALLBACK_EVALUATION)
+    if ctx:
+        ctx.update("storing", 95, "Enregistrement du résultat…")
+    return evaluation
+
+
+async def _evaluate_async(
+    ctx: JobContext, user_answer: str, question_data: Dict
+) -> Dict:
+    await ctx.update_async(
+        "evaluating", 20, "Évaluation de votre réponse…", eta_s=_scoring_eta()
+    )
+    evaluation = await evaluate_answer_async(user_answer, question_data)
+    if not evaluation:
+        evaluation = dict(FALLBACK_EVALUATION)
+    await ctx.update_async("storing", 95, "Enregistrement du résultat…")
+    return evaluation
+
+
+# ---------------------------------------------------------------------------
+# National contest
+# ---------------------------------------------------------------------------
+
+
+def national_submission(quiz_data: Optional[Dict]) -> bool:
+    return bool(quiz_data) and quiz_data.get("user_answer") is not None
+
+
+def submit_national_answer(
+    quiz_session_id: str, question_data: Dict, user_answer: str
+) -> bool:
+    """Record the answer (first submission wins) and start its evaluation."""
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not national_submission(quiz_data):
+        # Keep fields stored at quiz start (team of API clients)
+        store = dict(
+            quiz_data or {},
+            question=question_data,
+            user_answer=user_answer,
+            evaluation=None,
+        )
+        if not session_storage.store_quiz_data(quiz_session_id, store):
+            return False
+    start_national_evaluation_job(quiz_session_id)
+    return True
+
+
+def _national_to_evaluate(quiz_session_id: str) -> Optional[Dict]:
+    """The quiz data whose answer needs evaluating, None if already evaluated."""
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not national_submission(quiz_data):
+        raise JobFailed("Réponse introuvable")
+    if quiz_data.get("evaluation"):
+        return None
+    return quiz_data
+
+
+def _store_national_evaluation(
+    quiz_session_id: str, quiz_data: Dict, evaluation: Dict
+) -> Dict:
+    # Re-read before writing so nothing stored meanwhile is overwritten
+    latest = session_storage.get_quiz_data(quiz_session_id) or quiz_data
+    if not latest.get("evaluation"):
+        latest["evaluation"] = evaluation
+        if not session_storage.update_quiz_data(quiz_session_id, latest):
+            raise JobFailed("Erreur lors de l'enregistrement du résultat")
+    return {"ready": True}
+
+
+def evaluate_national_answer(
+    quiz_session_id: str, ctx: Optional[JobContext] = None
+) -> Dict:
+    """Job body: evaluate the stored answer once and store the evaluation."""
+    quiz_data = _national_to_evaluate(quiz_session_id)
+    if quiz_data is None:
+        return {"ready": True}
+    evaluation = _evaluate(ctx, quiz_data["user_answer"], quiz_data["question"])
+    return _store_national_evaluation(quiz_session_id, quiz_data, evaluation)
+
+
+async def evaluate_national_answer_async(quiz_session_id: str, ctx: JobContext) -> Dict:
+    quiz_data = await ctx.run_blocking(_national_to_evaluate, quiz_session_id)
+    if quiz_data is None:
+        return {"ready": True}
+    evaluation = await _evaluate_async(
+        ctx, quiz_data["user_answer"], quiz_data["question"]
+    )
+    return await ctx.run_blocking(
+        _store_national_evaluation, quiz_session_id, quiz_data, evaluation
+    )
+
+
+def start_national_evaluation_job(quiz_session_id: str) -> Optional[str]:
+    """Job id evaluating the session's answer, or None when already evaluated."""
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if quiz_data and quiz_data.get("evaluation"):
+        return None
+    return job_manager.submit(
+        "national_evaluation",
+        lambda ctx: evaluate_national_answer(quiz_session_id, ctx),
+        dedupe_key=f"evaluation:national:{quiz_session_id}",
+        async_fn=lambda ctx: evaluate_national_answer_async(quiz_session_id, ctx),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Personal contest
+# ---------------------------------------------------------------------------
+
+
+def personal_submission(quiz_data: Dict, index: int) -> Optional[Dict]:
+    return (quiz_data.get("submissions") or {}).get(str(index))
+
+
+def submit_personal_answer(
+    quiz_session_id: str, quiz_data: Dict, user_answer: str
+) -> bool:
+    """Record the answer to the current question (first submission wins)."""
+    index = quiz_data.get("current_question", 0)
+    if personal_submission(quiz_data, index) is None:
+        quiz_data.setdefault("submissions", {})[str(index)] = {
+            "answer": user_answer,
+            "evaluation": None,
+        }
+        if not session_storage.update_quiz_data(quiz_session_id, quiz_data):
+            return False
+    start_personal_evaluation_job(quiz_session_id, quiz_data)
+    return True
+
+
+def _personal_to_evaluate(quiz_session_id: str, index: int) -> Optional[Dict]:
+    """Quiz data whose answer `index` needs evaluating, None if already evaluated."""
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not quiz_data:
+        raise JobFailed("Session expirée")
+    submission = personal_submission(quiz_data, index)
+    if submission is None or index >= len(quiz_data.get("questions", [])):
+        raise JobFailed("Réponse introuvable")
+    if submission.get("evaluation"):
+        return None
+    return quiz_data
+
+
+def _store_personal_evaluation(
+    quiz_session_id: str, quiz_data: Dict, index: int, evaluation: Dict
+) -> Dict:
+    # Re-read before writing so nothing stored meanwhile is overwritten
+    latest = session_storage.get_quiz_data(quiz_session_id) or quiz_data
+    submission = personal_submission(latest, index)
+    if submission is not None and not submission.get("evaluation"):
+        submission["evaluation"] = evaluation
+        latest["answers"].append(submission["answer"])
+        latest["scores"].append(evaluation["score"])
+        if not session_storage.update_quiz_data(quiz_session_id, latest):
+            raise JobFailed("Erreur lors de l'enregistrement du résultat")
+    return {"ready": True}
+
+
+def evaluate_personal_answer(
+    quiz_session_id: str, index: int, ctx: Optional[JobContext] = None
+) -> Dict:
+    """Job body: evaluate the answer to question `index` once and store it."""
+    quiz_data = _personal_to_evaluate(quiz_session_id, index)
+    if quiz_data is None:
+        return {"ready": True}
+    submission = personal_submission(quiz_data, index)
+    evaluation = _evaluate(ctx, submission["answer"], quiz_data["questions"][index])
+    return _store_personal_evaluation(quiz_session_id, quiz_data, index, evaluation)
+
+
+async def evaluate_personal_answer_async(
+    quiz_session_id: str, index: int, ctx: JobContext
+) -> Dict:
+    quiz_data = await ctx.run_blocking(_personal_to_evaluate, quiz_session_id, index)
+    if quiz_data is None:
+        return {"ready": True}
+    submission = personal_submission(quiz_data, index)
+    evaluation = await _evaluate_async(
+        ctx, submission["answer"], quiz_data["questions"][index]
+    )
+    return await ctx.run_blocking(
+        _store_personal_evaluation, quiz_session_id, quiz_data, index, evaluation
+    )
+
+
+def start_personal_evaluation_job(
+    quiz_session_id: str, quiz_data: Dict
+) -> Optional[str]:
+    """Job id evaluating the current answer, or None when nothing is pending."""
+    index = quiz_data.get("current_question", 0)
+    submission = personal_submission(quiz_data, index)
+    if submission is None or submission.get("evaluation"):
+        return None
+    return job_manager.submit(
+        "personal_evaluation",
+        lambda ctx: evaluate_personal_answer(quiz_session_id, index, ctx),
+        dedupe_key=f"evaluation:personal:{quiz_session_id}:{index}",
+        async_fn=lambda ctx: evaluate_personal_answer_async(
+            quiz_session_id, index, ctx
+        ),
+    )
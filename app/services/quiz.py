@@ -0,0 +1,302 @@
+"""
+Quiz question preparation shared by the contest routes (and run as jobs).
+
+Generation is slow (one model call), so routes never call it inline: they
+start a job with `start_daily_question_job` / `start_personal_question_job`
+and the loading page polls the job status until the question is stored.
+Each job body has a coroutine twin (`*_async`) for JOBS_EXECUTOR=async.
+"""
+
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import pytz
+
+from app.utils.db import get_random_recommendation, recommendations_db
+from app.utils.jobs import JobContext, JobFailed, job_manager
+from app.utils.log import get_logger
+from app.utils.openai_client import latency_tracker
+from app.utils.session_storage import session_storage
+from app.utils.vignette import (
+    generate_vignette_and_question,
+    generate_vignette_and_question_async,
+)
+
+log = get_logger("quiz")
+
+# Shown until enough vignette latencies are recorded for a real estimate
+DEFAULT_VIGNETTE_ETA_S = 20.0
+DAILY_QUESTION_TTL = 26 * 3600
+
+# Daily question fallback when Redis is not configured (single process only)
+_local_daily = {}
+
+
+def _vignette_eta() -> float:
+    return latency_tracker.percentile("vignette", 50) or DEFAULT_VIGNETTE_ETA_S
+
+
+def _pick_recommendation(topic: str = None, recommendation: Dict = None) -> Dict:
+    if recommendation is None:
+        recommendation = get_random_recommendation(topic)
+        if not recommendation:
+            raise JobFailed("Aucune recommandation disponible")
+    return recommendation
+
+
+def _generate(
+    ctx: Optional[JobContext], topic: str = None, recommendation: Dict = None
+):
+    """Generate one question, reporting the real stages to the job."""
+    if ctx:
+        ctx.update("selecting", 10, "Sélection d'une recommandation…")
+    recommendation = _pick_recommendation(topic, recommendation)
+    if ctx:
+        ctx.update(
+            "generating", 25, "Rédaction du cas clinique…", eta_s=_vignette_eta()
+        )
+    question = generate_vignette_and_question(
+        topic=topic, recommendation=recommendation
+    )
+    if not question:
+        raise JobFailed("La génération de la question a échoué")
+    if ctx:
+        ctx.update("storing", 90, "Enregistrement de la question…")
+    return question
+
+
+async def _generate_async(
+    ctx: JobContext, topic: str = None, recommendation: Dict = None
+):
+    await ctx.update_async("selecting", 10, "Sélection d'une recommandation…")
+    recommendation = _pick_recommendation(topic, recommendation)
+    await ctx.update_async(
+        "generating", 25, "Rédaction du cas clinique…", eta_s=_vignette_eta()
+    )
+    question = await generate_vignette_and_question_async(
+        topic=topic, recommendation=recommendation
+    )
+    if not question:
+        raise JobFailed("La génération de la question a échoué")
+    await ctx.update_async("storing", 90, "Enregistrement de la question…")
+    return question
+
+
+# ---------------------------------------------------------------------------
+# National contest: one shared question per day (Europe/Paris)
+# ---------------------------------------------------------------------------
+
+
+def _paris_today_str() -> str:
+    tz = pytz.timezone("Europe/Paris")
+    return datetime.now(tz).strftime("%Y-%m-%d")
+
+
+def create_national_quiz(team: str) -> Optional[str]:
+    """Store a new national quiz for `team` (already validated); its session id."""
+    quiz_session_id = str(uuid.uuid4())
+    if not session_storage.store_quiz_data(
+        quiz_session_id, {"contest": "national", "team": team}
+    ):
+        return None
+    return quiz_session_id
+
+
+def daily_question_key() -> str:
+    return f"national:question:{_paris_today_str()}"
+
+
+def get_daily_question() -> Optional[Dict]:
+    """Today's shared question if it was already generated."""
+    key = daily_question_key()
+    rc = session_storage.redis_client
+    if rc:
+        try:
+            raw = rc.get(key)
+            if raw:
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8")
+                return json.loads(raw)
+            return None
+        except Exception as e:
+            log.warning("daily_question_read_failed", error=str(e))
+    return _local_daily.get(key)
+
+
+def _store_daily_question(question: Dict) -> None:
+    key = daily_question_key()
+    rc = session_storage.redis_client
+    if rc:
+        try:
+            rc.setex(key, DAILY_QUESTION_TTL, json.dumps(question, default=str))
+            # Best-effort cleanup of yesterday
+            try:
+                tz = pytz.timezone("Europe/Paris")
+                yday = (datetime.now(tz) - timedelta(days=1)).strftime("%Y-%m-%d")
+                rc.delete(f"national:question:{yday}")
+            except Exception:
+                pass
+            return
+        except Exception as e:
+            log.warning("daily_question_store_failed", error=str(e))
+    _local_daily.clear()
+    _local_daily[key] = question
+
+
+def prepare_daily_question(ctx: Optional[JobContext] = None) -> Dict:
+    """Job body: generate and store today's question (no-op if it exists)."""
+    if get_daily_question() is None:
+        _store_daily_question(_generate(ctx))
+    return {"ready": True}
+
+
+async def prepare_daily_question_async(ctx: JobContext) -> Dict:
+    if await ctx.run_blocking(get_daily_question) is None:
+        question = await _generate_async(ctx)
+        await ctx.run_blocking(_store_daily_question, question)
+    return {"ready": True}
+
+
+def start_daily_question_job() -> Optional[str]:
+    """Job id preparing today's question, or None when it is already ready.
+
+    Every team starting at the same time shares a single generation job.
+    """
+    if get_daily_question() is not None:
+        return None
+    return job_manager.submit(
+        "national_question",
+        prepare_daily_question,
+        dedupe_key=daily_question_key(),
+        async_fn=prepare_daily_question_async,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Personal contest: one question per selected topic, round-robin
+# ---------------------------------------------------------------------------
+
+
+def create_personal_quiz(topics: List[str]) -> Optional[str]:
+    """Store a new personal quiz over `topics` (already validated); its session id.
+
+    Each topic gets a shuffled pool of its recommendations, drawn round-robin
+    as questions are prepared. None when the session could not be stored.
+    """
+    topic_pools = {}
+    for t in topics:
+        try:
+            recs = recommendations_db.get_recommendations_by_topic(t)
+        except Exception:
+            recs = []
+        random.shuffle(recs)
+        topic_pools[t] = recs
+
+    quiz_data = {
+        "contest": "personal",
+        "topics": topics,
+        "current_question": 0,
+        "questions": [],
+        "answers": [],
+        "scores": [],
+        # one question per selected topic per cycle
+        "total_questions": len(topics),
+        "topic_pools": topic_pools,
+    }
+    quiz_session_id = str(uuid.uuid4())
+    if not session_storage.store_quiz_data(quiz_session_id, quiz_data):
+        return None
+    return quiz_session_id
+
+
+def personal_question_ready(quiz_data: Dict) -> bool:
+    return len(quiz_data.get("questions", [])) > quiz_data.get("current_question", 0)
+
+
+def active_topics(quiz_data: Dict) -> list:
+    """Selected topics that still have unused recommendations."""
+    pools = quiz_data.get("topic_pools", {})
+    return [t for t in quiz_data.get("topics", []) if pools.get(t)]
+
+
+def _next_personal_draw(quiz_session_id: str) -> Union[Dict, Tuple[Dict, str, Dict]]:
+    """(quiz_data, topic, recommendation) of the question to generate at the
+    session's current index, or the job result when there is nothing to do."""
+    quiz_data = session_storage.get_quiz_data(quiz_session_id)
+    if not quiz_data:
+        raise JobFailed("Session expirée")
+    if personal_question_ready(quiz_data):
+        return {"ready": True}
+
+    topics = active_topics(quiz_data)
+    if not topics:
+        return {"ready": False, "finished": True}
+
+    current_q = quiz_data.get("current_question", 0)
+    target_topic = topics[current_q % len(topics)]
+    pools = quiz_data["topic_pools"]
+    recommendation = pools[target_topic].pop(0)
+    return quiz_data, target_topic, recommendation
+
+
+def _store_personal_question(
+    quiz_session_id: str, quiz_data: Dict, question: Dict
+) -> Dict:
+    # Re-read: an answer may have been recorded while the question was being
+    # generated, or another job may have stored this index already
+    index = len(quiz_data["questions"])
+    current = session_storage.get_quiz_data(quiz_session_id)
+    if not current:
+        raise JobFailed("Session expirée")
+    stored = len(current.get("questions", []))
+    if stored != index:
+        log.info("question_already_stored", index=index, stored=stored)
+        if stored < index:
+            raise JobFailed("Session expirée")
+        return {"ready": True}
+    current["questions"].append(question)
+    current["topic_pools"] = quiz_data["topic_pools"]
+    if not session_storage.update_quiz_data(quiz_session_id, current):
+        raise JobFailed("Erreur lors de la mise à jour de la session")
+    return {"ready": True}
+
+
+def prepare_personal_question(
+    quiz_session_id: str, ctx: Optional[JobContext] = None
+) -> Dict:
+    """Job body: generate the question at the session's current index."""
+    draw = _next_personal_draw(quiz_session_id)
+    if isinstance(draw, dict):
+        return draw
+    quiz_data, topic, recommendation = draw
+    question = _generate(ctx, topic=topic, recommendation=recommendation)
+    return _store_personal_question(quiz_session_id, quiz_data, question)
+
+
+async def prepare_personal_question_async(
+    quiz_session_id: str, ctx: JobContext
+) -> Dict:
+    draw = await ctx.run_blocking(_next_personal_draw, quiz_session_id)
+    if isinstance(draw, dict):
+        return draw
+    quiz_data, topic, recommendation = draw
+    question = await _generate_async(ctx, topic=topic, recommendation=recommendation)
+    return await ctx.run_blocking(
+        _store_personal_question, quiz_session_id, quiz_data, question
+    )
+
+
+def start_personal_question_job(quiz_session_id: str, quiz_data: Dict) -> Optional[str]:
+    """Job id preparing the current personal question, or None if nothing to do."""
+    if personal_question_ready(quiz_data) or not active_topics(quiz_data):
+        return None
+    current_q = quiz_data.get("current_question", 0)
+    return job_manager.submit(
+        "personal_question",
+        lambda ctx: prepare_personal_question(quiz_session_id, ctx),
+        dedupe_key=f"personal:{quiz_session_id}:{current_q}",
+        async_fn=lambda ctx: prepare_personal_question_async(quiz_session_id, ctx),
+    )
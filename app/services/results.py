@@ -0,0 +1,89 @@
+"""
+Final results of a quiz, shared by the HTML pages and the JSON API.
+"""
+
+from typing import Dict
+
+from app.utils.scorer import calculate_total_score, get_score_category
+
+
+def score_level(avg: float) -> str:
+    # Map average score (0-5) to a discrete level for CSS classes
+    if avg >= 4.5:
+        return "excellent"
+    if avg >= 3.75:
+        return "tres-bien"
+    if avg >= 3.0:
+        return "bien"
+    if avg >= 2.0:
+        return "moyen"
+    return "insuffisant"
+
+
+def national_results(evaluation: Dict) -> Dict:
+    """Final stats of the single national question."""
+    return calculate_total_score([evaluation["score"]])
+
+
+def counts_on_leaderboard(evaluation: Dict) -> bool:
+    """Whether a national score enters the leaderboard.
+
+    Degraded scores (model out of time, or no score in its output) are local
+    estimates: shown to the player, never added to a team's total.
+    """
+    return not evaluation.get("degraded")
+
+
+def personal_results(quiz_data: Dict) -> Dict:
+    """Mean score and per-topic statistics of the answered questions."""
+    scores = quiz_data.get("scores", [])
+    answers_count = len(scores)
+    mean_score = round(sum(scores) / answers_count, 1) if answers_count else 0
+
+    # Build per-topic statistics based on answered questions
+    questions = quiz_data.get("questions", [])
+    topic_map = {}
+    for i in range(min(len(questions), answers_count)):
+        q = questions[i] or {}
+        t = q.get("topic") or "Sujet inconnu"
+        s = scores[i] if i < len(scores) else 0
+        if t not in topic_map:
+            topic_map[t] = {
+                "topic": t,
+                "answered_count": 0,
+                "total_available": 0,  # will compute using pools below
+                "score_sum": 0.0,
+            }
+        topic_map[t]["answered_count"] += 1
+        topic_map[t]["score_sum"] += float(s or 0)
+
+    topic_stats = []
+    pools = quiz_data.get("topic_pools", {}) or {}
+    for t, v in topic_map.items():
+        answered = v["answered_count"]
+        remaining = len(pools.get(t, []))
+        total = answered + remaining
+        avg = round((v["score_sum"] / answered), 1) if answered else 0
+        percentage = round((avg / 5.0) * 100, 1)
+        answered_pct = round((answered / total) * 100, 1) if total > 0 else 0
+        topic_stats.append(
+            {
+                "topic": t,
+                "answered_count": answered,
+                "total_available": total,
+                "average_score": avg,
+                "percentage": percentage,
+                "answered_percentage": answered_pct,
+                "category": get_score_category(avg),
+                "level": score_level(avg),
+            }
+        )
+
+    # Sort by average score descending
+    topic_stats.sort(key=lambda x: x["average_score"], reverse=True)
+
+    return {
+        "mean_score": mean_score,
+        "answers_count": answers_count,
+        "topic_stats": topic_stats,
+    }
@@ -0,0 +1,95 @@
+document.addEventListener('DOMContentLoaded', function () {
+  var board = document.getElementById('leaderboard-live');
+  var empty = document.getElementById('leaderboard-empty');
+  if (!board || !board.dataset.streamUrl || !window.EventSource) return;
+
+  var MEDALS = ['🥇', '🥈', '🥉'];
+  // When the server refuses the stream (too many clients), try again later
+  var REFUSED_RETRY_MS = 30000;
+
+  var day = null;
+  var teams = {};
+
+  function el(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  function item(entry, index) {
+    var row = el('div', 'leaderboard-item' + (index < 3 ? ' rank-' + (index + 1) : ''));
+
+    var left = el('div');
+    left.style.display = 'flex';
+    left.style.alignItems = 'center';
+    left.appendChild(el('div', 'leaderboard-rank', index < 3 ? MEDALS[index] : (index + 1) + '.'));
+    var who = el('div');
+    who.appendChild(el('div', 'leaderboard-team', entry.team));
+    var players = el('div', null, entry.players + ' participant' + (entry.players > 1 ? 's' : ''));
+    players.style.fontSize = 'var(--font-size-sm)';
+    players.style.opacity = '0.8';
+    players.style.marginTop = 'var(--space-xs)';
+    who.appendChild(players);
+    left.appendChild(who);
+
+    var score = el('div', 'leaderboard-score');
+    var avg = el('div', null, Number(entry.avg).toFixed(1) + '/5');
+    avg.style.fontWeight = '700';
+    avg.style.fontSize = 'var(--font-size-xl)';
+    var total = el('div', null, entry.total + ' pts total');
+    total.style.fontSize = 'var(--font-size-sm)';
+    total.style.opacity = '0.8';
+    score.appendChild(avg);
+    score.appendChild(total);
+
+    row.appendChild(left);
+    row.appendChild(score);
+    return row;
+  }
+
+  function render() {
+    var entries = Object.keys(teams).map(function (name) { return teams[name]; });
+    entries.sort(function (a, b) {
+      return (b.avg - a.avg) || (b.total - a.total) || (a.team < b.team ? -1 : 1);
+    });
+    board.querySelectorAll('.leaderboard-item').forEach(function (node) { node.remove(); });
+    entries.forEach(function (entry, index) { board.appendChild(item(entry, index)); });
+    board.hidden = entries.length === 0;
+    if (empty) empty.hidden = entries.length > 0;
+  }
+
+  function connect() {
+    var source = new EventSource(board.dataset.streamUrl);
+
+    // Sent first on every (re)connection: the whole leaderboard
+    source.addEventListener('snapshot', function (e) {
+      var data = JSON.parse(e.data);
+      day = data.day;
+      teams = {};
+      data.teams.forEach(function (entry) { teams[entry.team] = entry; });
+      render();
+    });
+
+    // One team's new totals
+    source.addEventListener('delta', function (e) {
+      var entry = JSON.parse(e.data);
+      if (entry.day !== day) {
+        // First score of a new day: the leaderboard starts over
+        day = entry.day;
+        teams = {};
+      }
+      teams[entry.team] = entry;
+      render();
+    });
+
+    source.addEventListener('error', function () {
+      // EventSource reconnects by itself unless the server answered with an error status
+      if (source.readyState === EventSource.CLOSED) {
+        setTimeout(connect, REFUSED_RETRY_MS);
+      }
+    });
+  }
+
+  connect();
+});
@@ -48,60 +48,13 @@ document.addEventListener('DOMContentLoaded', function () {
     }
   }
 
-  function hideOverlay() {
-    var overlay = document.getElementById('eval-overlay');
-    if (overlay) overlay.style.display = 'none';
-  }
-
-  async function prepareQuiz() {
-    try {
-      var res = await fetch('/national/quiz_prepare', { method: 'GET', credentials: 'same-origin' });
-      if (res.ok) {
-        var data = await res.json();
-        if (data && data.ok) return true;
-      }
-    } catch (e) {}
-    await new Promise(r => setTimeout(r, 1000));
-    try {
-      var res2 = await fetch('/national/quiz_prepare', { method: 'GET', credentials: 'same-origin' });
-      if (res2.ok) {
-        var data2 = await res2.json();
-        if (data2 && data2.ok) return true;
-      }
-    } catch (e2) {}
-    return false;
-  }
-
-  form.addEventListener('submit', async function (ev) {
-    ev.preventDefault();
-    var team = (form.querySelector('[name="team"]') || {}).value;
-    if (!team) return;
-
-    showOverlay('Préparation de votre question…');
-
-    var csrf = (form.querySelector('[name="csrf_token"]') || {}).value || '';
-    var body = new URLSearchParams();
-    body.set('team', team);
-    if (csrf) body.set('csrf_token', csrf);
-
-    try {
-      await fetch(form.action, {
-        method: 'POST',
-        credentials: 'same-origin',
-        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-        body: body.toString()
-      });
-      var ok = await prepareQuiz();
-      if (ok) {
-        window.location.href = '/national/quiz';
-      } else {
-        hideOverlay();
-        alert('Une erreur est survenue lors de la préparation. Réessayez.');
-      }
-    } catch (e) {
-      hideOverlay();
-      alert('Erreur réseau. Réessayez.');
+  // Team selection redirects to the loading page, which polls the preparation job
+  form.addEventListener('submit', function () {
+    var btn = form.querySelector('button[type="submit"]');
+    if (btn) {
+      btn.disabled = true;
+      btn.textContent = 'Préparation…';
     }
+    showOverlay('Préparation de votre question…');
   });
 });
-
@@ -1,45 +1,100 @@
 document.addEventListener('DOMContentLoaded', function () {
-  const bar = document.getElementById('progress-bar');
-  const text = document.getElementById('progress-text');
-  if (!bar || !text) return;
-
-  const steps = [
-    { p: 20, t: 'Connexion au service…' },
-    { p: 45, t: 'Création de la vignette clinique…' },
-    { p: 70, t: 'Formulation de la question…' },
-    { p: 90, t: "Finalisation de l'exercice…" }
-  ];
-  let i = 0;
-  function advance() {
-    if (i < steps.length) {
-      bar.style.width = steps[i].p + '%';
-      text.textContent = steps[i].t;
-      i++;
-      setTimeout(advance, 900);
+  var root = document.getElementById('job-loading');
+  var bar = document.getElementById('progress-bar');
+  var text = document.getElementById('progress-text');
+  var container = document.getElementById('progress-container');
+  var retry = document.getElementById('job-retry');
+  if (!root || !bar || !text) return;
+
+  var prepareUrl = root.dataset.prepareUrl;
+  var nextUrl = root.dataset.nextUrl;
+  var csrf = root.dataset.csrfToken || '';
+
+  // Progress reached at the end of each stage reported by the server
+  var STAGE_END = { queued: 10, selecting: 25, generating: 90, evaluating: 95, storing: 100 };
+  var POLL_MIN_MS = 500;
+  var POLL_MAX_MS = 2000;
+  var MAX_NETWORK_ERRORS = 5;
+
+  var currentStage = null;
+  var stageSeenAt = 0;
+  var networkErrors = 0;
+
+  function setProgress(p, label) {
+    p = Math.max(0, Math.min(100, Math.round(p)));
+    bar.style.width = p + '%';
+    if (container) container.setAttribute('aria-valuenow', String(p));
+    if (label) text.textContent = label;
+  }
+
+  function fail(message) {
+    text.textContent = message || 'Une erreur est survenue. Veuillez réessayer.';
+    bar.style.background = 'var(--danger)';
+    if (retry) retry.hidden = false;
+  }
+
+  function finish() {
+    setProgress(100, 'Prêt !');
+    setTimeout(function () { window.location.href = nextUrl; }, 200);
+  }
+
+  function render(job) {
+    if (job.stage !== currentStage) {
+      currentStage = job.stage;
+      stageSeenAt = Date.now();
+    }
+    var start = job.progress || 0;
+    var end = STAGE_END[job.stage] || start;
+    var p = start;
+    if (job.eta_s && end > start) {
+      // Move through the stage at the pace of the observed median latency
+      var ratio = (Date.now() - stageSeenAt) / 1000 / job.eta_s;
+      p = start + (end - start) * Math.min(0.95, ratio);
     }
+    setProgress(p, job.message || (job.status === 'queued' ? 'En attente…' : null));
+  }
+
+  function poll(url, delay) {
+    fetch(url, { credentials: 'same-origin', headers: { Accept: 'application/json' } })
+      .then(function (res) { return res.json(); })
+      .then(function (job) {
+        networkErrors = 0;
+        if (!job.ok) throw new Error(job.error || 'unknown_job');
+        if (job.status === 'done') return finish();
+        if (job.status === 'failed') return fail(job.error && (job.error + '. Veuillez réessayer.'));
+        render(job);
+        setTimeout(function () { poll(url, Math.min(delay * 1.3, POLL_MAX_MS)); }, delay);
+      })
+      .catch(function (e) {
+        networkErrors += 1;
+        console.error('job status error', e);
+        if (networkErrors >= MAX_NETWORK_ERRORS) return fail();
+        setTimeout(function () { poll(url, POLL_MAX_MS); }, POLL_MAX_MS);
+      });
   }
-  advance();
-
-  function prepare() {
-    fetch('/national/quiz_prepare', { method: 'GET', credentials: 'same-origin' })
-      .then(async (res) => {
-        if (!res.ok) throw new Error('prepare_failed');
-        const data = await res.json();
-        if (data && data.ok) {
-          bar.style.width = '100%';
-          text.textContent = 'Prêt !';
-          setTimeout(() => { window.location.href = '/national/quiz'; }, 300);
-        } else {
-          throw new Error((data && data.error) || 'unknown_error');
-        }
+
+  function start() {
+    if (retry) retry.hidden = true;
+    bar.style.background = 'var(--accent-primary)';
+    currentStage = null;
+    setProgress(5, 'Initialisation…');
+    fetch(prepareUrl, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { Accept: 'application/json', 'X-CSRFToken': csrf }
+    })
+      .then(function (res) { return res.json(); })
+      .then(function (data) {
+        if (!data || !data.ok) throw new Error((data && data.error) || 'prepare_failed');
+        if (data.status === 'ready') return finish();
+        poll(data.status_url, POLL_MIN_MS);
       })
-      .catch((e) => {
-        text.textContent = 'Une erreur est survenue. Veuillez réessayer.';
-        bar.style.background = 'var(--danger)';
+      .catch(function (e) {
         console.error('quiz_prepare error', e);
+        fail();
       });
   }
 
-  setTimeout(prepare, 300);
+  if (retry) retry.addEventListener('click', start);
+  start();
 });
-
@@ -0,0 +1,150 @@
+"""
+Fingerprinted static assets with long-lived caching.
+
+`scripts/build_assets.py` copies every file of app/static into app/static/dist
+under a content-hashed name (css/design-system.3f2a1b9c04.css), alongside
+precompressed .br/.gz variants, and writes dist/manifest.json. With the
+manifest present, `url_for('static', filename='css/design-system.css')`
+returns the hashed name, and the static route serves it with an immutable
+Cache-Control and the best encoding the browser accepts.
+
+Without a build (e.g. fresh checkout), hashes are computed in memory on first
+use and appended as `?v=<hash>`; the original file is served, still immutable
+when the version matches. Either way a changed file gets a new URL, so
+browsers never need to re-validate.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from flask import request, send_from_directory
+
+from .log import get_logger
+
+log = get_logger("assets")
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Preferred first when the browser accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(filename: str, digest: str) -> str:
+    """css/app.css -> css/app.<digest>.css"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+
+class AssetManifest:
+    """Maps logical static filenames to fingerprinted ones."""
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        self._lock = threading.Lock()
+        # logical name -> {"file": hashed name, "encodings": [...]}
+        self.entries: Dict[str, Dict] = {}
+        # hashed name -> entry, for serving
+        self._by_file: Dict[str, Dict] = {}
+        # In-memory fallback: logical name -> (mtime, hash)
+        self._hashes: Dict[str, tuple] = {}
+        self.load()
+
+    def load(self) -> None:
+        path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("assets", {})
+            except Exception as e:
+                log.warning("manifest_unreadable", path=path, error=str(e))
+        with self._lock:
+            self.entries = entries
+            self._by_file = {e["file"]: e for e in entries.values()}
+            self._hashes = {}
+        log.info("assets_loaded", built=len(entries))
+
+    def _memory_hash(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(filename)
+        # Re-hashed when the file changes (edits during development)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, "rb") as f:
+                digest = content_hash(f.read())
+        except OSError:
+            return None
+        with self._lock:
+            self._hashes[filename] = (mtime, digest)
+        return digest
+
+    def url_values(self, values: Dict) -> None:
+        """url_defaults hook: rewrite url_for('static', ...) values in place."""
+        filename = values.get("filename")
+        if not filename or "v" in values:
+            return
+        entry = self.entries.get(filename)
+        if entry:
+            values["filename"] = f"{DIST_DIR}/{entry['file']}"
+            return
+        digest = self._memory_hash(filename)
+        if digest:
+            values["v"] = digest
+
+    def serve(self, filename: str):
+        """Static view: hashed files (with encodings) or originals."""
+        if filename.startswith(DIST_DIR + "/"):
+            entry = self._by_file.get(filename[len(DIST_DIR) + 1 :])
+            if entry:
+                return self._serve_built(filename[len(DIST_DIR) + 1 :], entry)
+
+        response = send_from_directory(self.static_folder, filename)
+        version = request.args.get("v")
+        if version and version == self._memory_hash(filename):
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+    def _serve_built(self, file: str, entry: Dict):
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if encoding in entry.get("encodings", []) and accepted[encoding]:
+                response = send_from_directory(self.dist_folder, file + suffix)
+                response.headers["Content-Encoding"] = encoding
+                # send_from_directory guesses the type from the .br/.gz suffix
+                response.mimetype = entry.get("mimetype") or response.mimetype
+                break
+        else:
+            response = send_from_directory(self.dist_folder, file)
+        if entry.get("encodings"):
+            response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+def init_app(app) -> None:
+    """Fingerprint url_for('static', ...) and serve assets with long-lived caching."""
+    manifest = AssetManifest(app.static_folder)
+    app.extensions["assets"] = manifest
+
+    @app.url_defaults
+    def _fingerprint_static(endpoint, values):
+        if endpoint == "static":
+            manifest.url_values(values)
+
+    app.view_functions["static"] = manifest.serve
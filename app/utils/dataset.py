@@ -0,0 +1,222 @@
+"""
+Stable identifiers and change reports for the recommendations dataset.
+
+A recommendation's ID is derived from its topic and recommendation text,
+normalized like answers are (case, accents, punctuation, spacing): fixing a
+typo in the evidence or re-formatting the topic keeps the ID, so that a
+change report can tell "changed" rows from "added"/"removed" ones. Rows are
+compared on a hash of all their fields.
+
+Change report (JSON):
+  {"added": [record], "changed": [{"id", "fields", "before", "after"}],
+   "removed": [record], "unchanged": <count>}
+
+Near-duplicates (texts that differ by a few words) are found with MinHash
+signatures over word shingles and locality-sensitive hashing: only records
+that share a band of their signature are compared, so the work grows with
+the number of records rather than the number of pairs.
+"""
+
+import csv
+import hashlib
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .eval_cache import normalize_answer
+
+# Record fields (lowercase CSV columns), in CSV order
+FIELDS = ("theme", "topic", "recommendation", "grade", "evidence", "references", "link")
+ID_LENGTH = 12
+
+
+def recommendation_id(topic: str, recommendation: str) -> str:
+    h = hashlib.sha1()
+    h.update(normalize_answer(topic).encode("utf-8"))
+    h.update(b"\x00")
+    h.update(normalize_answer(recommendation).encode("utf-8"))
+    return h.hexdigest()[:ID_LENGTH]
+
+
+def content_hash(record: Dict) -> str:
+    """Hash of every field of a record: differs as soon as one field does."""
+    h = hashlib.sha1()
+    for field in FIELDS:
+        h.update(str(record.get(field) or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class IdAssigner:
+    """Gives each record of one dataset its ID, suffixing repeats (-2, -3...)."""
+
+    def __init__(self):
+        self._seen = {}
+
+    def __call__(self, record: Dict) -> str:
+        rid = recommendation_id(
+            record.get("topic", ""), record.get("recommendation", "")
+        )
+        count = self._seen.get(rid, 0) + 1
+        self._seen[rid] = count
+        return rid if count == 1 else f"{rid}-{count}"
+
+
+def read_csv_records(path: str) -> Iterator[Dict]:
+    """Records of a dataset CSV, with their ID (computed when no Id column)."""
+    assign = IdAssigner()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            record = {field: (row.get(field.capitalize()) or "") for field in FIELDS}
+            record["id"] = row.get("Id") or assign(record)
+            yield record
+
+
+class DatasetDiff:
+    """Change report between the current dataset and new records fed one by one."""
+
+    def __init__(self, previous: Iterable[Dict]):
+        self._previous = {record["id"]: record for record in previous}
+        self._seen = set()
+        self.added: List[Dict] = []
+        self.changed: List[Dict] = []
+        self.unchanged = 0
+
+    def add(self, record: Dict) -> Optional[str]:
+        """Compare one new record; returns "added", "changed" or None."""
+        rid = record["id"]
+        self._seen.add(rid)
+        before = self._previous.get(rid)
+        if before is None:
+            self.added.append(record)
+            return "added"
+        if content_hash(before) == content_hash(record):
+            self.unchanged += 1
+            return None
+        fields = [f for f in FIELDS if (before.get(f) or "") != (record.get(f) or "")]
+        self.changed.append(
+            {
+                "id": rid,
+                "fields": fields,
+                "before": {f: before.get(f) or "" for f in fields},
+                "after": {f: record.get(f) or "" for f in fields},
+            }
+        )
+        return "changed"
+
+    @property
+    def removed(self) -> List[Dict]:
+        return [r for rid, r in self._previous.items() if rid not in self._seen]
+
+    def report(self) -> Dict:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+        }
+
+
+def changed_ids(report: Dict) -> set:
+    """IDs whose derived data (questions, indexes) must be rebuilt: added or changed."""
+    return {r["id"] for r in report.get("added", [])} | {
+        c["id"] for c in report.get("changed", [])
+    }
+
+
+# ---------------------------------------------------------------------------
+# Near-duplicates
+# ---------------------------------------------------------------------------
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.45 Jaccard similarity become candidates
+LSH_BANDS = 32
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """Hashes of the word n-grams of a normalized text."""
+    words = normalize_answer(text).split()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures: NUM_PERM random hash functions, min over a set."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a * h + b stays below 2**64 for 32-bit shingle hashes
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: set) -> np.ndarray:
+        if not hashes:
+            return np.full(len(self.a), _MERSENNE_PRIME, dtype=np.uint64)
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+        return ((self.a * values + self.b) % _MERSENNE_PRIME).min(axis=1)
+
+
+def near_duplicate_clusters(
+    texts: List[str], threshold: float = 0.8
+) -> List[List[int]]:
+    """Groups of indexes of `texts` whose word shingles overlap by `threshold` or more.
+
+    Each group is sorted, with the first index as its representative; texts
+    without a near-duplicate are left out.
+    """
+    sets = [shingles(t) for t in texts]
+    hasher = MinHasher()
+    signatures = [hasher.signature(s) for s in sets]
+    rows = NUM_PERM // LSH_BANDS
+
+    parent = list(range(len(texts)))
+    # Similar texts share many bands: each pair is compared once
+    compared = set()
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(LSH_BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, signature in enumerate(signatures):
+            if sets[i]:
+                key = signature[band * rows : (band + 1) * rows].tobytes()
+                buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            # Each member is compared with one member per group found so far
+            # in the bucket, not with every other member
+            leaders: List[int] = []
+            for i in members:
+                for leader in leaders:
+                    root_i, root_leader = find(i), find(leader)
+                    if root_i == root_leader:
+                        break
+                    if (leader, i) in compared:
+                        continue
+                    compared.add((leader, i))
+                    if jaccard(sets[i], sets[leader]) >= threshold:
+                        parent[max(root_i, root_leader)] = min(root_i, root_leader)
+                        break
+                else:
+                    leaders.append(i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
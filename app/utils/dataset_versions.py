@@ -0,0 +1,182 @@
+"""
+Content-addressed, compressed store of recommendations.csv versions.
+
+Replaces the full `.bak` copies made on every update. Each distinct content
+is stored once, gzipped, under its SHA-256; a small manifest records when a
+version was first stored and from which workbook:
+
+    versions/
+      manifest.json              {"versions": [{id, sha256, created, source,
+                                                rows, size, stored}]}
+      objects/<sha256>.csv.gz
+
+Saving content that is already stored only returns its entry. Rolling back
+decompresses a version over the dataset atomically. Garbage collection keeps
+the most recent versions (and the live one) and drops the rest.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+ID_LENGTH = 12
+# Versions kept by gc() whatever their age
+DEFAULT_KEEP = 10
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _count_rows(data: bytes) -> int:
+    reader = csv.reader(io.StringIO(data.decode("utf-8", errors="replace")))
+    return max(0, sum(1 for _ in reader) - 1)
+
+
+class VersionStore:
+    """Stores dataset versions once each, compressed, with a manifest."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifest_path = os.path.join(root, "manifest.json")
+
+    # -- manifest ------------------------------------------------------------
+
+    def _load(self) -> List[Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("versions", [])
+        except FileNotFoundError:
+            return []
+
+    def _save(self, versions: List[Dict]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"versions": versions}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, f"{sha256}.csv.gz")
+
+    def versions(self) -> List[Dict]:
+        """Stored versions, oldest first."""
+        return sorted(self._load(), key=lambda v: v["created"])
+
+    def find(self, version: str) -> Dict:
+        """The version whose id (or a prefix of it) is `version`."""
+        matches = [v for v in self._load() if v["sha256"].startswith(version)]
+        if not matches:
+            raise KeyError(f"unknown version: {version}")
+        if len(matches) > 1:
+            raise KeyError(f"ambiguous version: {version}")
+        return matches[0]
+
+    def stored_bytes(self) -> int:
+        return sum(v["stored"] for v in self._load())
+
+    # -- operations ----------------------------------------------------------
+
+    def save(self, path: str, source: str = "", created: Optional[str] = None) -> Dict:
+        """Store the file at `path` unless its content already is; returns its entry."""
+        with open(path, "rb") as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        versions = self._load()
+        for entry in versions:
+            if entry["sha256"] == sha256:
+                return entry
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        object_path = self._object_path(sha256)
+        tmp = f"{object_path}.tmp"
+        with open(tmp, "wb") as f:
+            # mtime=0: the same content always compresses to the same bytes
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        os.replace(tmp, object_path)
+
+        entry = {
+            "id": sha256[:ID_LENGTH],
+            "sha256": sha256,
+            "created": created or datetime.now().isoformat(timespec="seconds"),
+            "source": source,
+            "rows": _count_rows(data),
+            "size": len(data),
+            "stored": os.path.getsize(object_path),
+        }
+        versions.append(entry)
+        self._save(versions)
+        return entry
+
+    def restore(self, version: str, dest: str) -> Dict:
+        """Write a stored version to `dest` atomically.
+
+        The content being replaced is stored first, so a restore can be undone.
+        """
+        entry = self.find(version)
+        if os.path.exists(dest):
+            self.save(dest, source="before rollback")
+        with gzip.open(self._object_path(entry["sha256"]), "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"corrupt version object: {entry['id']}")
+        tmp = f"{dest}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, dest)
+        return entry
+
+    def gc(
+        self,
+        keep: int = DEFAULT_KEEP,
+        max_age_days: Optional[float] = None,
+        protect: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict:
+        """Drop versions beyond the `keep` most recent ones.
+
+        With `max_age_days`, only those older than that are dropped. The
+        version whose sha256 is `protect` (the live dataset) is always kept.
+        """
+        versions = self.versions()
+        cutoff = (
+            (datetime.now() - timedelta(days=max_age_days)).isoformat(
+                timespec="seconds"
+            )
+            if max_age_days is not None
+            else None
+        )
+        recent = {v["sha256"] for v in versions[-keep:]} if keep > 0 else set()
+        kept, removed = [], []
+        for entry in versions:
+            if (
+                entry["sha256"] in recent
+                or entry["sha256"] == protect
+                or (cutoff is not None and entry["created"] >= cutoff)
+            ):
+                kept.append(entry)
+            else:
+                removed.append(entry)
+
+        if not dry_run and removed:
+            self._save(kept)
+            for entry in removed:
+                try:
+                    os.remove(self._object_path(entry["sha256"]))
+                except FileNotFoundError:
+                    pass
+        return {
+            "removed": removed,
+            "kept": len(kept),
+            "freed": sum(v["stored"] for v in removed),
+        }
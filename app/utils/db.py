@@ -2,6 +2,21 @@ import pandas as pd
 import os
 import random
 from typing import List, Dict, Optional
+from .dataset import IdAssigner
+from .filters import normalize_link, topic_parts
+from .log import get_logger
+from .prompt_text import prompt_text
+
+log = get_logger("db")
+
+
+def _safe(v) -> str:
+    return "" if v is None or pd.isna(v) else str(v)
+
+
+def _topic_entry(topic: str) -> Dict:
+    title, subtitle = topic_parts(topic)
+    return {"topic": topic, "title": title, "subtitle": subtitle}
 
 
 class RecommendationsDB:
@@ -15,23 +30,75 @@ class RecommendationsDB:
         self.csv_path = csv_path
         self._df = None
         self._mtime = None
+        # Bumped on every (re)load; derived data below is rebuilt with it
+        self.version = 0
+        self._records = []
+        self._by_topic = {}
+        self._catalog = {}
         self._load_data()
 
     def _load_data(self):
         """Load recommendations from CSV file."""
         try:
-            self._df = pd.read_csv(self.csv_path)
+            # Ids are hex strings: read as text, not numbers
+            self._df = pd.read_csv(self.csv_path, dtype={"Id": str})
             # Clean up any NaN values in critical columns
             self._df = self._df.dropna(subset=["Recommendation", "Evidence"])
             try:
                 self._mtime = os.path.getmtime(self.csv_path)
             except Exception:
                 self._mtime = None
-            print(f"Loaded {len(self._df)} recommendations from {self.csv_path}")
+            log.info("recommendations_loaded", count=len(self._df), path=self.csv_path)
         except Exception as e:
-            print(f"Error loading recommendations: {e}")
+            log.error("recommendations_load_failed", path=self.csv_path, error=str(e))
             self._df = pd.DataFrame()
             self._mtime = None
+        self._prepare()
+
+    def _prepare(self):
+        """Build the per-version views: cleaned records and the topic catalog.
+
+        Record fields are converted once here rather than on every request,
+        and each topic label is split into (title, subtitle) once for the
+        topic selection page.
+        """
+        self.version += 1
+        records = []
+        by_topic = {}
+        assign_id = IdAssigner()
+        for rec in self._df.to_dict("records"):
+            item = {
+                "theme": _safe(rec.get("Theme")),
+                "topic": _safe(rec.get("Topic")),
+                "recommendation": _safe(rec.get("Recommendation")),
+                "grade": _safe(rec.get("Grade")),
+                "evidence": _safe(rec.get("Evidence")),
+                "references": _safe(rec.get("References")),
+                "link": normalize_link(rec.get("Link")),
+            }
+            # Stable across dataset updates (app/utils/dataset.py); computed
+            # for CSVs written before the Id column existed
+            item["id"] = _safe(rec.get("Id")) or assign_id(item)
+            records.append(item)
+            if item["topic"]:
+                by_topic.setdefault(item["topic"], []).append(item)
+
+        catalog = {}
+        for item in records:
+            if item["theme"] and item["topic"]:
+                catalog.setdefault(item["theme"], set()).add(item["topic"])
+        self._catalog = {
+            theme: [_topic_entry(t) for t in sorted(catalog[theme])]
+            for theme in sorted(catalog)
+        }
+        if not self._catalog and by_topic:
+            # Fallback bucket when no theme grouping found
+            self._catalog = {"Autres": [_topic_entry(t) for t in sorted(by_topic)]}
+        self._records = records
+        self._by_topic = by_topic
+        # Prompt forms of the fields, computed once per version (originals
+        # stay on the records for display)
+        prompt_text.prime(records)
 
     def _maybe_reload(self):
         """Reload CSV if the file changed on disk since last load."""
@@ -49,34 +116,12 @@ class RecommendationsDB:
 
     def get_random_recommendation(self, topic: str = None) -> Optional[Dict]:
         """Get a random recommendation, optionally filtered by topic."""
-        def _safe(v):
-            try:
-                import pandas as pd  # local import to avoid circular in some envs
-                return "" if pd.isna(v) else str(v)
-            except Exception:
-                return "" if v is None else str(v)
-
         self._maybe_reload()
-        if self._df.empty:
+        pool = self._by_topic.get(topic, []) if topic else self._records
+        if not pool:
             return None
-
-        df = self._df
-        if topic:
-            df = df[df["Topic"] == topic]
-            if df.empty:
-                return None
-
-        # Select random recommendation
-        rec = df.sample(n=1).iloc[0]
-        return {
-            "theme": _safe(rec.get("Theme")),
-            "topic": _safe(rec.get("Topic")),
-            "recommendation": _safe(rec.get("Recommendation")),
-            "grade": _safe(rec.get("Grade")),
-            "evidence": _safe(rec.get("Evidence")),
-            "references": _safe(rec.get("References")),
-            "link": _safe(rec.get("Link")),
-        }
+        # Copy: callers may modify the returned dict
+        return dict(random.choice(pool))
 
     def list_topics(self) -> List[str]:
         """Get list of all available topics."""
@@ -97,38 +142,17 @@ class RecommendationsDB:
         self._maybe_reload()
         if self._df.empty:
             return 0
-        return len(self._df[self._df["Topic"] == topic])
+        return len(self._by_topic.get(topic, []))
 
     def get_recommendations_by_topic(self, topic: str) -> List[Dict]:
         """Get all recommendations for a specific topic."""
         self._maybe_reload()
-        if self._df.empty:
-            return []
-
-        topic_df = self._df[self._df["Topic"] == topic]
-        recommendations = []
+        return [dict(rec) for rec in self._by_topic.get(topic, [])]
 
-        def _safe(v):
-            try:
-                import pandas as pd
-                return "" if pd.isna(v) else str(v)
-            except Exception:
-                return "" if v is None else str(v)
-
-        for _, rec in topic_df.iterrows():
-            recommendations.append(
-                {
-                    "theme": _safe(rec.get("Theme")),
-                    "topic": _safe(rec.get("Topic")),
-                    "recommendation": _safe(rec.get("Recommendation")),
-                    "grade": _safe(rec.get("Grade")),
-                    "evidence": _safe(rec.get("Evidence")),
-                    "references": _safe(rec.get("References")),
-                    "link": _safe(rec.get("Link")),
-                }
-            )
-
-        return recommendations
+    def topic_catalog(self) -> Dict[str, List[Dict]]:
+        """Topics by theme, labels pre-split: {theme: [{topic, title, subtitle}]}."""
+        self._maybe_reload()
+        return self._catalog
 
 
 # Global instance
@@ -0,0 +1,129 @@
+"""
+In-process cache of answer evaluations, keyed by normalized answer and question.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .prompts import SCORING_PROMPT_VERSION
+
+# Symbols that carry meaning in a clinical answer ("PAM > 65", "-5 %", "+1")
+_SYMBOLS = "<>=≤≥≠+\\-%"
+_SYMBOL_RE = re.compile(rf"\s*([{_SYMBOLS}])\s*")
+# Other punctuation, except decimal separators ("1,5" / "1.5")
+_PUNCTUATION_RE = re.compile(rf"[^\w\s.,{_SYMBOLS}]|(?<!\d)[.,]|[.,](?!\d)", re.UNICODE)
+_DECIMAL_COMMA_RE = re.compile(r"(?<=\d),(?=\d)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_answer(answer: str) -> str:
+    """Reduce an answer to a canonical form (case, accents, punctuation, spaces).
+
+    Comparison and arithmetic signs, percent signs and decimal numbers are
+    kept: "PAM > 65" and "PAM < 65" must not share a form.
+    """
+    s = unicodedata.normalize("NFKD", str(answer or ""))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.casefold().replace(">=", "≥").replace("<=", "≤")
+    s = _PUNCTUATION_RE.sub(" ", s)
+    s = _DECIMAL_COMMA_RE.sub(".", s)
+    s = _SYMBOL_RE.sub(r" \1 ", s)
+    return _WHITESPACE_RE.sub(" ", s).strip()
+
+
+def question_id(question_data: Dict) -> str:
+    """Stable identifier of a generated question (recommendation, vignette, text)."""
+    recommendation = question_data.get("recommendation") or {}
+    if not isinstance(recommendation, dict):
+        recommendation = {"recommendation": recommendation}
+    h = hashlib.sha1()
+    for part in (
+        recommendation.get("id", ""),
+        recommendation.get("recommendation", ""),
+        question_data.get("vignette", ""),
+        question_data.get("question", ""),
+    ):
+        h.update(str(part or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+class EvaluationCache:
+    """Bounded LRU cache with TTL for evaluation results (score + feedback)."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: int = 26 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, user_answer: str, question_data: Dict) -> str:
+        """Build the cache key: normalized answer hash, question ID, prompt version."""
+        answer_hash = hashlib.sha1(
+            normalize_answer(user_answer).encode("utf-8")
+        ).hexdigest()
+        return f"v{SCORING_PROMPT_VERSION}:{question_id(question_data)}:{answer_hash}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached evaluation, or None on miss/expiry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(value)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict) -> None:
+        """Store an evaluation, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        """Current size and hit statistics."""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+# Global evaluation cache instance
+evaluation_cache = EvaluationCache(
+    max_entries=int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "2048")),
+    ttl_seconds=int(os.getenv("EVAL_CACHE_TTL_SECONDS", str(26 * 3600))),
+)
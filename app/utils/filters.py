@@ -0,0 +1,163 @@
+"""
+Jinja template filters (markdown, topic labels, reference links).
+
+Patterns are compiled once at import. Rendered markdown is kept in a bounded
+LRU cache keyed by a hash of the text, so the same feedback shown on reloads,
+or the same recommendation shown to many teams, is converted only once.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import markdown
+from markupsafe import Markup
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_DOI = re.compile(r"^10\.\d{4,9}/\S+")
+# Separators left at the start of a topic subtitle once the title is removed
+_SUBTITLE_STRIP = " :–—-"
+
+
+class MarkdownCache:
+    """Bounded LRU of rendered markdown, keyed by content hash."""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("MARKDOWN_CACHE_SIZE", "512"))
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Markdown instances are not thread-safe: one per thread, reset per use
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _converter(self) -> markdown.Markdown:
+        md = getattr(self._local, "md", None)
+        if md is None:
+            md = self._local.md = markdown.Markdown(extensions=["nl2br"])
+        return md
+
+    def render(self, text: str) -> str:
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = self._converter().reset().convert(text)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = html
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return html
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Global markdown cache instance
+markdown_cache = MarkdownCache()
+
+
+def render_markdown(text) -> Markup:
+    """Convert markdown text to HTML."""
+    if not text:
+        return Markup("")
+    return Markup(markdown_cache.render(str(text)))
+
+
+def inline_bold(text) -> Markup:
+    """Render inline bold markers from Topic strings.
+
+    - Converts **bold** to <strong>bold</strong>
+    - Leaves existing HTML <b>/<strong> as-is
+    - Does not wrap in <p> (keeps inline)
+    """
+    if not text:
+        return Markup("")
+    return Markup(_BOLD.sub(r"<strong>\1</strong>", str(text)))
+
+
+@lru_cache(maxsize=2048)
+def _topic_parts(s: str) -> Tuple[str, str]:
+    # If markdown bold present, use first bold span as title
+    m = _BOLD.search(s)
+    if m:
+        title = m.group(1).strip()
+        # Remove the bold markers and title from the text to get remainder
+        remainder = (s[: m.start()] + s[m.end() :]).strip()
+        # Strip common separators at start
+        remainder = remainder.lstrip(_SUBTITLE_STRIP)
+        return (title, remainder.strip())
+    # Fallback: split at colon
+    if ":" in s:
+        left, right = s.split(":", 1)
+        return (left.strip(), right.strip())
+    return (s.strip(), "")
+
+
+def topic_parts(text) -> Tuple[str, str]:
+    """Split a Topic string into (title, subtitle).
+
+    Prefer bold-marked title (between ** **). If none, split at first colon.
+    Returns a 2-tuple of plain strings: (title, subtitle).
+    """
+    if not text:
+        return ("", "")
+    return _topic_parts(str(text))
+
+
+def normalize_link(value) -> str:
+    """Normalize link/DOI values to clickable URLs.
+
+    - Strips whitespace and trailing punctuation
+    - Converts "doi:10.xxxx/yyy" or "10.xxxx/yyy" to https://doi.org/...
+    - Adds https scheme to bare www.* links
+    """
+    try:
+        s = str(value or "").strip()
+        if not s or s.lower() == "nan":
+            return ""
+        s = s.rstrip(".,); ")
+        # Handle doi: prefix
+        if s.lower().startswith("doi:"):
+            s = s.split(":", 1)[1].strip()
+        # Raw DOI
+        if _DOI.match(s):
+            return f"https://doi.org/{s}"
+        # Bare domain
+        if s.startswith("www."):
+            return f"https://{s}"
+        return s
+    except Exception:
+        return ""
+
+
+def register_filters(app) -> None:
+    app.add_template_filter(render_markdown, "markdown")
+    app.add_template_filter(inline_bold, "inline_bold")
+    app.add_template_filter(topic_parts, "topic_parts")
+    app.add_template_filter(normalize_link, "normalize_link")
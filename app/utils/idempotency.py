@@ -0,0 +1,200 @@
+"""
+Idempotency tokens for state-changing form posts.
+
+Each rendered form carries a one-off token (`idempotency_token()` in
+templates, field `_idem`). The first POST with a token runs the view and
+records its outcome (redirect target and session changes) in the session
+store for a short TTL; any repeat of that token, such as a double click,
+a resubmitted form or a network retry, gets the same outcome replayed without
+running the view again. A repeat arriving while the first request is still
+running waits for it to finish.
+
+Records are keyed by the browser session that was issued the token, so a
+token replayed from another session never sees this session's outcome.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import redirect, request, session
+
+from .log import get_logger
+from .session_storage import session_storage
+
+log = get_logger("idempotency")
+
+FIELD = "_idem"
+TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "900"))
+# How long a repeat waits for the first request to finish
+WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# Session key of the browser identity that tokens are bound to
+OWNER_KEY = "idem_owner"
+# Session keys never replayed
+_SESSION_SKIP = {"csrf_token", OWNER_KEY}
+
+
+def issue_token() -> str:
+    """New token for one rendered form, bound to the current session."""
+    if OWNER_KEY not in session:
+        session[OWNER_KEY] = uuid.uuid4().hex
+    return uuid.uuid4().hex
+
+
+class IdempotencyStore:
+    """Token records in Redis, or in process memory without Redis."""
+
+    def __init__(self):
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return session_storage.redis_client
+
+    def claim(self, key: str) -> bool:
+        """Mark `key` as in progress; False if it was already used."""
+        record = json.dumps({"state": "pending"})
+        rc = self.redis_client
+        if rc:
+            try:
+                return bool(rc.set(key, record, nx=True, ex=TTL_SECONDS))
+            except Exception as e:
+                log.warning("redis_claim_failed", error=str(e))
+        with self._lock:
+            self._expire_local()
+            if key in self._local:
+                return False
+            self._local[key] = (record, time.time() + TTL_SECONDS)
+            return True
+
+    def get(self, key: str) -> Optional[Dict]:
+        rc = self.redis_client
+        raw = None
+        if rc:
+            try:
+                raw = rc.get(key)
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8")
+            except Exception as e:
+                log.warning("redis_read_failed", error=str(e))
+        if raw is None:
+            with self._lock:
+                entry = self._local.get(key)
+                raw = entry[0] if entry and entry[1] > time.time() else None
+        return json.loads(raw) if raw else None
+
+    def complete(self, key: str, outcome: Dict) -> None:
+        record = json.dumps(dict(outcome, state="done"), default=str)
+        rc = self.redis_client
+        if rc:
+            try:
+                rc.setex(key, TTL_SECONDS, record)
+                return
+            except Exception as e:
+                log.warning("redis_write_failed", error=str(e))
+        with self._lock:
+            self._local[key] = (record, time.time() + TTL_SECONDS)
+
+    def release(self, key: str) -> None:
+        """Forget a claim whose request did not produce a replayable outcome."""
+        rc = self.redis_client
+        if rc:
+            try:
+                rc.delete(key)
+            except Exception as e:
+                log.warning("redis_delete_failed", error=str(e))
+        with self._lock:
+            self._local.pop(key, None)
+
+    def _expire_local(self) -> None:
+        now = time.time()
+        for key in [k for k, (_, exp) in self._local.items() if exp <= now]:
+            self._local.pop(key, None)
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore()
+
+
+def _session_changes(before: Dict) -> Dict:
+    """Session keys set or removed by the view, to replay on repeats."""
+    changed = {
+        k: v
+        for k, v in session.items()
+        if k not in _SESSION_SKIP and (k not in before or before[k] != v)
+    }
+    removed = [k for k in before if k not in session and k not in _SESSION_SKIP]
+    return {"set": changed, "removed": removed}
+
+
+def _replay(outcome: Dict):
+    changes = outcome.get("session") or {}
+    for key in changes.get("removed", []):
+        session.pop(key, None)
+    for key, value in changes.get("set", {}).items():
+        session[key] = value
+    return redirect(outcome["location"], code=outcome.get("status", 302))
+
+
+def idempotent(view):
+    """Run a POST view at most once per idempotency token.
+
+    Only redirect outcomes are recorded; any other response releases the
+    token so that the form can be submitted again. Posts without a token,
+    or from a session the token was not issued to, run normally.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.form.get(FIELD)
+        owner = session.get(OWNER_KEY)
+        if request.method != "POST" or not token:
+            return view(*args, **kwargs)
+        if not owner:
+            # Not issued to this session (e.g. expired cookie): no record
+            log.info("unbound_token", endpoint=request.endpoint, token=token[:8])
+            return view(*args, **kwargs)
+
+        key = f"idem:{request.endpoint}:{owner}:{token}"
+        if not idempotency_store.claim(key):
+            deadline = time.monotonic() + WAIT_SECONDS
+            while True:
+                outcome = idempotency_store.get(key)
+                if outcome and outcome.get("state") == "done":
+                    log.info("replayed", endpoint=request.endpoint, token=token[:8])
+                    return _replay(outcome)
+                if outcome is None or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.1)
+            if outcome is not None or not idempotency_store.claim(key):
+                return "Requête déjà en cours de traitement", 409
+            # The first request released its claim: run this one instead
+
+        # Deep copy: views mutate session values in place (e.g. flashes)
+        before = copy.deepcopy(dict(session))
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            idempotency_store.release(key)
+            raise
+        status = getattr(response, "status_code", 200)
+        if 300 <= status < 400 and response.headers.get("Location"):
+            idempotency_store.complete(
+                key,
+                {
+                    "status": status,
+                    "location": response.headers["Location"],
+                    "session": _session_changes(before),
+                },
+            )
+        else:
+            idempotency_store.release(key)
+        return response
+
+    return wrapper
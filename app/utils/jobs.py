@@ -0,0 +1,322 @@
+"""
+Background jobs for slow work (question generation), with pollable status.
+
+Job state lives in Redis when available (shared by every worker process) and
+in process memory otherwise. Work runs on a thread pool; JOBS_EXECUTOR=inline
+runs it synchronously inside the submitting request instead, for platforms
+that freeze background threads once the response is sent.
+
+JOBS_EXECUTOR=async runs jobs that have a coroutine version on one event loop
+thread: a job waiting on the model holds no thread, so one process keeps
+hundreds of model calls in flight instead of JOBS_WORKERS. Their short
+blocking steps (session storage) go to a pool of JOBS_WORKERS threads.
+
+A job record:
+  {"id", "kind", "status": queued|running|done|failed, "stage", "progress",
+   "message", "eta_s", "result", "error", "created", "updated"}
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+from .log import get_logger
+from .session_storage import session_storage
+
+log = get_logger("jobs")
+
+JOB_TTL_SECONDS = int(os.getenv("JOBS_TTL_SECONDS", "3600"))
+TERMINAL = ("done", "failed")
+
+
+class JobFailed(Exception):
+    """Raised by job functions to fail with a user-facing message."""
+
+
+class JobContext:
+    """Handed to the job function to report progress."""
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+        # time.monotonic() at submission, for queue-time metrics
+        self.enqueued_at = time.monotonic()
+
+    def update(
+        self,
+        stage: str,
+        progress: int,
+        message: str = None,
+        eta_s: Optional[float] = None,
+    ) -> None:
+        fields = {"stage": stage, "progress": progress, "eta_s": eta_s}
+        if message is not None:
+            fields["message"] = message
+        self.manager._update(self.job_id, **fields)
+
+    async def update_async(self, *args, **kwargs) -> None:
+        """update() from an async job, off the event loop."""
+        await asyncio.to_thread(self.update, *args, **kwargs)
+
+    async def run_blocking(self, fn: Callable, *args):
+        """Run a blocking step (storage) of an async job off the event loop."""
+        return await asyncio.to_thread(fn, *args)
+
+
+class JobManager:
+    """Submit jobs, run them on workers and expose their status."""
+
+    def __init__(self, workers: int = None, executor: str = None):
+        self.executor = (executor or os.getenv("JOBS_EXECUTOR", "thread")).lower()
+        self._pool = None
+        self._loop = None
+        # Strong references: the event loop only keeps weak ones to its tasks
+        self._tasks = set()
+        self._workers = workers or int(os.getenv("JOBS_WORKERS", "8"))
+        self._local = {}
+        # dedupe_key -> (job_id, claimed at)
+        self._local_keys = {}
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return session_storage.redis_client
+
+    def _pool_instance(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="job"
+                )
+            return self._pool
+
+    def _loop_instance(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                # asyncio.to_thread (blocking steps of async jobs) runs here
+                loop.set_default_executor(
+                    ThreadPoolExecutor(
+                        max_workers=self._workers, thread_name_prefix="job-io"
+                    )
+                )
+                threading.Thread(
+                    target=loop.run_forever, name="job-loop", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    # -- storage ----------------------------------------------------------
+
+    def _save(self, job: Dict) -> None:
+        job["updated"] = time.time()
+        rc = self.redis_client
+        if rc:
+            try:
+                rc.setex(
+                    f"job:{job['id']}", JOB_TTL_SECONDS, json.dumps(job, default=str)
+                )
+                return
+            except Exception as e:
+                log.warning("redis_write_failed", job_id=job["id"], error=str(e))
+        with self._lock:
+            self._local[job["id"]] = dict(job)
+            self._expire_local()
+
+    def _expire_local(self) -> None:
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [k for k, j in self._local.items() if j["updated"] < cutoff]:
+            self._local.pop(job_id, None)
+        for key in [k for k, (_, at) in self._local_keys.items() if at < cutoff]:
+            self._local_keys.pop(key, None)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current job record, or None if unknown/expired."""
+        rc = self.redis_client
+        if rc:
+            try:
+                raw = rc.get(f"job:{job_id}")
+                if raw:
+                    if isinstance(raw, bytes):
+                        raw = raw.decode("utf-8")
+                    return json.loads(raw)
+            except Exception as e:
+                log.warning("redis_read_failed", job_id=job_id, error=str(e))
+        with self._lock:
+            job = self._local.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields) -> None:
+        job = self.get(job_id)
+        if not job:
+            return
+        job.update(fields)
+        self._save(job)
+
+    # -- de-duplication ---------------------------------------------------
+
+    def _claim(self, dedupe_key: str, job_id: str) -> Optional[str]:
+        """Register job_id under dedupe_key; return the live job already holding it."""
+        rc = self.redis_client
+        if rc:
+            try:
+                key = f"job_key:{dedupe_key}"
+                if rc.set(key, job_id, nx=True, ex=JOB_TTL_SECONDS):
+                    return None
+                existing = rc.get(key)
+                if isinstance(existing, bytes):
+                    existing = existing.decode("utf-8")
+                job = self.get(existing) if existing else None
+                # The key is claimed before the job is saved, and the record
+                # outlives the key: no record yet means a submit in progress
+                if existing and (job is None or job["status"] != "failed"):
+                    return existing
+                # Failed: take the key over
+                rc.set(key, job_id, ex=JOB_TTL_SECONDS)
+                return None
+            except Exception as e:
+                log.warning("redis_dedupe_failed", key=dedupe_key, error=str(e))
+        with self._lock:
+            # Same lifetimes as in Redis: keys expire with the records
+            self._expire_local()
+            existing, _ = self._local_keys.get(dedupe_key, (None, None))
+            job = self._local.get(existing) if existing else None
+            if existing and (job is None or job["status"] != "failed"):
+                return existing
+            self._local_keys[dedupe_key] = (job_id, time.time())
+            return None
+
+    # -- execution --------------------------------------------------------
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[JobContext], Dict],
+        dedupe_key: str = None,
+        async_fn: Callable[[JobContext], Awaitable[Dict]] = None,
+    ) -> str:
+        """Start `fn(ctx)` as a job and return its id.
+
+        With `dedupe_key`, a job already queued, running or done under the
+        same key is reused instead of starting another one. `async_fn` is the
+        coroutine version of `fn`, used by the async executor.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0,
+            "message": None,
+            "eta_s": None,
+            "result": None,
+            "error": None,
+            "created": now,
+            "updated": now,
+        }
+        # Claim first: a deduplicated submit must not leave a queued record
+        # that nobody runs
+        if dedupe_key:
+            existing = self._claim(dedupe_key, job_id)
+            if existing:
+                return existing
+        self._save(job)
+
+        ctx = JobContext(self, job_id)
+        log.debug("job_submitted", job_id=job_id, kind=kind, executor=self.executor)
+        # copy_context: the job logs under the submitting request's id
+        context = contextvars.copy_context()
+        if self.executor == "inline":
+            self._run(fn, ctx)
+        elif self.executor == "async" and async_fn is not None:
+            loop = self._loop_instance()
+            loop.call_soon_threadsafe(context.run, self._start_task, async_fn, ctx)
+        else:
+            self._pool_instance().submit(context.run, self._run, fn, ctx)
+        return job_id
+
+    def _start_task(
+        self, async_fn: Callable[[JobContext], Awaitable[Dict]], ctx: JobContext
+    ) -> None:
+        task = self._loop.create_task(self._run_async(async_fn, ctx))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _run(self, fn: Callable[[JobContext], Dict], ctx: JobContext) -> None:
+        self._update(ctx.job_id, status="running", started=time.time())
+        try:
+            self._finish(ctx, fn(ctx))
+        except Exception as e:
+            self._fail(ctx, e)
+
+    async def _run_async(
+        self, async_fn: Callable[[JobContext], Awaitable[Dict]], ctx: JobContext
+    ) -> None:
+        await asyncio.to_thread(
+            self._update, ctx.job_id, status="running", started=time.time()
+        )
+        try:
+            result = await async_fn(ctx)
+            await asyncio.to_thread(self._finish, ctx, result)
+        except Exception as e:
+            await asyncio.to_thread(self._fail, ctx, e)
+
+    @property
+    def in_flight(self) -> int:
+        """Async jobs currently running on the event loop."""
+        return len(self._tasks)
+
+    def _finish(self, ctx: JobContext, result: Dict) -> None:
+        log.debug(
+            "job_done",
+            job_id=ctx.job_id,
+            seconds=lambda: round(time.monotonic() - ctx.enqueued_at, 3),
+        )
+        self._update(
+            ctx.job_id,
+            status="done",
+            stage="done",
+            progress=100,
+            result=result,
+            finished=time.time(),
+        )
+
+    def _fail(self, ctx: JobContext, e: Exception) -> None:
+        log.error("job_failed", job_id=ctx.job_id, error=str(e))
+        message = str(e) if isinstance(e, JobFailed) else "Erreur interne"
+        self._update(
+            ctx.job_id,
+            status="failed",
+            stage="failed",
+            error=message,
+            finished=time.time(),
+        )
+
+
+def public_status(job: Dict) -> Dict:
+    """Fields exposed by the status endpoint."""
+    now = time.time()
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "finished": job["status"] in TERMINAL,
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0),
+        "message": job.get("message"),
+        "eta_s": job.get("eta_s"),
+        "elapsed_s": round(now - job.get("created", now), 1),
+        "result": job.get("result") if job["status"] == "done" else None,
+        "error": job.get("error") if job["status"] == "failed" else None,
+    }
+
+
+# Global job manager instance
+job_manager = JobManager()
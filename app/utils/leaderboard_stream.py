@@ -0,0 +1,196 @@
+"""
+Live leaderboard: score deltas fanned out to server-sent event streams.
+
+Every recorded score publishes a delta with the team's new totals
+({"day", "team", "avg", "total", "players"}). With a Redis client that
+supports pub/sub, deltas go through the `leaderboard:events` channel so that
+every app instance receives them; otherwise (no Redis, or the Upstash REST
+client) they are broadcast in-process.
+
+A stream sends one full snapshot, then only deltas. Each connection keeps its
+pending deltas keyed by team: since a delta carries absolute values, a newer
+one replaces the previous one for the same team, so a slow client holds at
+most one entry per team whatever the update rate.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .log import get_logger
+
+log = get_logger("leaderboard")
+
+CHANNEL = "leaderboard:events"
+# Browsers reconnect after this delay (ms) when a stream ends
+RECONNECT_MS = 5000
+LISTENER_RETRY_SECONDS = 5
+
+
+def team_entry(team: str, total: int, players: int) -> Dict:
+    """Compact leaderboard row, as sent in snapshots and deltas."""
+    average = round(total / players, 1) if players else 0
+    return {"team": team, "avg": average, "total": total, "players": players}
+
+
+def format_event(event: str, data: Dict) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """Pending deltas of one stream, at most one per team."""
+
+    __slots__ = ("_pending", "_cond", "closed")
+
+    def __init__(self):
+        self._pending: Dict[str, Dict] = {}
+        self._cond = threading.Condition(threading.Lock())
+        self.closed = False
+
+    def push(self, delta: Dict) -> None:
+        with self._cond:
+            # Re-inserted so that deltas go out in the order of their last update
+            self._pending.pop(delta["team"], None)
+            self._pending[delta["team"]] = delta
+            self._cond.notify()
+
+    def get(self, timeout: float) -> List[Dict]:
+        """Pending deltas, waiting up to `timeout` seconds for the first one."""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            deltas = list(self._pending.values())
+            self._pending.clear()
+        return deltas
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class LeaderboardBroadcaster:
+    """Publishes score deltas and fans them out to subscribed streams."""
+
+    def __init__(self, max_subscribers: int = None):
+        self.max_subscribers = (
+            max_subscribers
+            if max_subscribers is not None
+            else int(os.getenv("SSE_MAX_SUBSCRIBERS", "500"))
+        )
+        self.heartbeat_seconds = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+        self.max_stream_seconds = float(os.getenv("SSE_MAX_SECONDS", "300"))
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._listening = threading.Event()
+
+    @property
+    def redis_client(self):
+        # Imported here: the scoreboard publishes through this module
+        from .scoreboard import scoreboard
+
+        rc = scoreboard.redis_client
+        return rc if rc is not None and hasattr(rc, "pubsub") else None
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, delta: Dict) -> None:
+        rc = self.redis_client
+        if rc is not None:
+            try:
+                rc.publish(CHANNEL, json.dumps(delta, ensure_ascii=False))
+                return
+            except Exception as e:
+                log.warning("publish_failed", backend="redis", error=str(e))
+        self._fanout(delta)
+
+    def _fanout(self, delta: Dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(delta)
+        log.debug(
+            "delta_broadcast", team=delta.get("team"), subscribers=len(subscribers)
+        )
+
+    def subscribe(self) -> Optional[Subscription]:
+        """A new subscription, or None when the subscriber limit is reached."""
+        rc = self.redis_client
+        if rc is not None:
+            self._ensure_listener(rc)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                log.warning("subscriber_limit", limit=self.max_subscribers)
+                return None
+            subscription = Subscription()
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _ensure_listener(self, rc) -> None:
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listening.clear()
+            self._listener = threading.Thread(
+                target=self._listen, args=(rc,), name="leaderboard-events", daemon=True
+            )
+            self._listener.start()
+        # Deltas published before the channel subscription would be missed
+        self._listening.wait(1.0)
+
+    def _listen(self, rc) -> None:
+        while True:
+            try:
+                pubsub = rc.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                self._listening.set()
+                log.info("listener_started", channel=CHANNEL)
+                for message in pubsub.listen():
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    try:
+                        self._fanout(json.loads(data))
+                    except (TypeError, ValueError) as e:
+                        log.warning("bad_delta", error=str(e))
+            except Exception as e:
+                log.warning("listener_failed", error=str(e))
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+    def stream(self, subscription: Subscription, snapshot: Dict) -> Iterator[str]:
+        """SSE body: the snapshot, then deltas, with heartbeats.
+
+        The stream ends after SSE_MAX_SECONDS; the browser reconnects and gets
+        a fresh snapshot. The subscription is released when the client leaves.
+        """
+        try:
+            yield f"retry: {RECONNECT_MS}\n" + format_event("snapshot", snapshot)
+            deadline = time.monotonic() + self.max_stream_seconds
+            while time.monotonic() < deadline and not subscription.closed:
+                deltas = subscription.get(self.heartbeat_seconds)
+                if not deltas:
+                    # Keeps proxies from closing an idle connection
+                    yield ": ping\n\n"
+                    continue
+                yield "".join(format_event("delta", delta) for delta in deltas)
+        finally:
+            self.unsubscribe(subscription)
+
+
+# Global leaderboard broadcaster instance
+leaderboard_broadcaster = LeaderboardBroadcaster()
@@ -0,0 +1,190 @@
+"""
+Record/replay of LLM provider responses, keyed by request hash.
+
+LLM_REPLAY_MODE:
+  off     - normal operation (default)
+  record  - call the provider and save every successful response
+  replay  - answer from saved responses only; a miss raises ReplayMiss
+
+Recordings are one JSON file per request body under LLM_REPLAY_DIR, holding
+the response text, its usage block and the latency observed when recording.
+With LLM_REPLAY_LATENCY=recorded, replay sleeps for that latency (scaled by
+LLM_REPLAY_LATENCY_SCALE) so load tests see realistic waits.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from .log import get_logger
+
+log = get_logger("replay")
+
+MODES = ("off", "record", "replay")
+
+
+class ReplayMiss(Exception):
+    """No recording exists for this request in replay mode."""
+
+    # Treated like a provider 404 by the retry loop: retrying cannot help
+    status_code = 404
+
+
+def request_key(body: Dict) -> str:
+    """Stable hash of a request body (model, prompt, options)."""
+    canonical = json.dumps(
+        body, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _usage_dict(usage) -> Optional[Dict]:
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    return None
+
+
+def _namespace(value):
+    """Dicts to attribute access, so replayed usage looks like the SDK object."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    return value
+
+
+class ReplayStore:
+    """Directory of recorded responses."""
+
+    def __init__(
+        self,
+        directory: str,
+        mode: str = "off",
+        simulate_latency: bool = False,
+        latency_scale: float = 1.0,
+    ):
+        if mode not in MODES:
+            log.warning("unknown_mode", mode=mode, using="off")
+            mode = "off"
+        self.directory = directory
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, body: Dict) -> Optional[Dict]:
+        try:
+            with open(self._path(request_key(body)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("unreadable_recording", error=str(e))
+            return None
+
+    def record(self, body: Dict, response, latency: float) -> None:
+        """Save a provider response; never raises."""
+        text = getattr(response, "output_text", None)
+        if not text:
+            return
+        key = request_key(body)
+        entry = {
+            "key": key,
+            "model": body.get("model"),
+            "output_text": text,
+            "usage": _usage_dict(getattr(response, "usage", None)),
+            "latency_s": round(latency, 3),
+            "recorded_at": time.time(),
+        }
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            with self._lock:
+                self.recorded += 1
+        except Exception as e:
+            log.warning("record_failed", error=str(e))
+
+    def _entry(self, body: Dict) -> Dict:
+        entry = self.load(body)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            raise ReplayMiss(f"No recording for request {request_key(body)[:12]}")
+        return entry
+
+    def _delay(self, entry: Dict) -> float:
+        if not self.simulate_latency:
+            return 0.0
+        return float(entry.get("latency_s") or 0) * self.latency_scale
+
+    @staticmethod
+    def _response(entry: Dict):
+        return SimpleNamespace(
+            output_text=entry["output_text"], usage=_namespace(entry.get("usage"))
+        )
+
+    def replay(self, body: Dict, timeout: Optional[float] = None):
+        """Return a response-like object for `body`, or raise ReplayMiss."""
+        entry = self._entry(body)
+        delay = self._delay(entry)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Replayed request exceeded timeout ({timeout:.1f}s)")
+        if delay:
+            time.sleep(delay)
+        return self._response(entry)
+
+    async def replay_async(self, body: Dict, timeout: Optional[float] = None):
+        """replay() for async callers: the simulated latency does not block the loop."""
+        entry = self._entry(body)
+        delay = self._delay(entry)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"Replayed request exceeded timeout ({timeout:.1f}s)")
+        await asyncio.sleep(delay)
+        return self._response(entry)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "recorded": self.recorded,
+            }
+
+
+# Global replay store, configured from the environment
+replay_store = ReplayStore(
+    os.getenv(
+        "LLM_REPLAY_DIR",
+        os.path.join(os.path.dirname(__file__), "..", "..", "data", "llm_replay"),
+    ),
+    mode=os.getenv("LLM_REPLAY_MODE", "off").lower(),
+    simulate_latency=os.getenv("LLM_REPLAY_LATENCY", "none").lower() == "recorded",
+    latency_scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0")),
+)
@@ -0,0 +1,195 @@
+"""
+Per-task model routing with latency/error based fallback.
+
+Each task (vignette, scoring) has an ordered chain of profiles: the primary
+first, then faster fallbacks. A profile whose recent p95 latency or error rate
+exceeds the task's thresholds is skipped for a cooldown period, after which
+it is tried again with fresh statistics. Every switch is logged as one JSON
+line (stdout, and LLM_ROUTING_LOG if set) for later analysis.
+
+Profiles and chains can be overridden with LLM_ROUTING_JSON, e.g.
+  {"profiles": {"scoring": {"model": "gpt-5", "effort": "medium",
+                            "max_output_tokens": 3000}},
+   "routes": {"scoring": {"chain": ["scoring", "scoring-fast"], "max_p95_s": 15}}}
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .log import get_logger
+
+log = get_logger("routing")
+
+# Output caps include reasoning tokens, so they stay well above the visible text
+PROFILES = {
+    "vignette": {"model": "gpt-5", "effort": "low", "max_output_tokens": 2500},
+    "vignette-fast": {
+        "model": "gpt-5-mini",
+        "effort": "low",
+        "max_output_tokens": 2000,
+    },
+    "scoring": {"model": "gpt-5", "effort": "low", "max_output_tokens": 3000},
+    "scoring-fast": {"model": "gpt-5-mini", "effort": "low", "max_output_tokens": 2500},
+    "default": {"model": "gpt-5", "effort": "low", "max_output_tokens": 4000},
+}
+
+ROUTES = {
+    "vignette": {
+        "chain": ["vignette", "vignette-fast"],
+        "max_p95_s": 30.0,
+        "max_error_rate": 0.25,
+    },
+    "scoring": {
+        "chain": ["scoring", "scoring-fast"],
+        "max_p95_s": 20.0,
+        "max_error_rate": 0.25,
+    },
+    "default": {"chain": ["default"], "max_p95_s": None, "max_error_rate": None},
+}
+
+# Samples needed before a profile can be judged unhealthy
+MIN_SAMPLES = int(os.getenv("LLM_ROUTING_MIN_SAMPLES", "20"))
+# How long a tripped profile is skipped before being tried again (seconds)
+COOLDOWN_S = float(os.getenv("LLM_ROUTING_COOLDOWN_S", "120"))
+WINDOW = 100
+
+
+def _load_config():
+    profiles = {k: dict(v) for k, v in PROFILES.items()}
+    routes = {k: dict(v) for k, v in ROUTES.items()}
+    raw = os.getenv("LLM_ROUTING_JSON")
+    if raw:
+        try:
+            override = json.loads(raw)
+            for name, profile in override.get("profiles", {}).items():
+                profiles.setdefault(name, {}).update(profile)
+            for task, route in override.get("routes", {}).items():
+                routes.setdefault(task, {}).update(route)
+        except Exception as e:
+            log.warning("invalid_routing_json", error=str(e))
+    return profiles, routes
+
+
+class ProfileHealth:
+    """Rolling window of (latency, ok) attempt outcomes for one profile."""
+
+    def __init__(self, window: int = WINDOW):
+        self.samples = deque(maxlen=window)
+        self.tripped_until = 0.0
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        latencies = sorted(s for s, _ in self.samples)
+        return latencies[
+            min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))
+        ]
+
+    def error_rate(self) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+
+class Router:
+    """Chooses the profile for each call and tracks profile health."""
+
+    def __init__(self):
+        self.profiles, self.routes = _load_config()
+        self._health = {}
+        self._current = {}
+        self._lock = threading.Lock()
+        self.log_path = os.getenv("LLM_ROUTING_LOG")
+
+    def _route(self, task: str) -> Dict:
+        return self.routes.get(task) or self.routes["default"]
+
+    def _health_of(self, profile: str) -> ProfileHealth:
+        health = self._health.get(profile)
+        if health is None:
+            health = self._health[profile] = ProfileHealth()
+        return health
+
+    def select(self, task: str) -> Dict:
+        """Profile for the next call of `task`: the first healthy one in its chain."""
+        route = self._route(task)
+        chain = route["chain"]
+        now = time.time()
+        with self._lock:
+            chosen = chain[-1]
+            for name in chain:
+                health = self._health_of(name)
+                if health.tripped_until and now >= health.tripped_until:
+                    # Cooldown over: try it again on fresh statistics
+                    health.tripped_until = 0.0
+                    health.samples.clear()
+                if not health.tripped_until:
+                    chosen = name
+                    break
+            previous = self._current.get(task)
+            self._current[task] = chosen
+        if previous is not None and previous != chosen:
+            self._log("switch", task, chosen, previous=previous)
+        return dict(self.profiles[chosen], name=chosen)
+
+    def record(self, task: str, profile: str, seconds: float, ok: bool) -> None:
+        """Outcome of one attempt; may trip the profile."""
+        route = self._route(task)
+        if profile == route["chain"][-1]:
+            # The last resort is never skipped, but its stats still matter for logs
+            with self._lock:
+                self._health_of(profile).samples.append((seconds, ok))
+            return
+        max_p95, max_errors = route.get("max_p95_s"), route.get("max_error_rate")
+        reason = None
+        with self._lock:
+            health = self._health_of(profile)
+            health.samples.append((seconds, ok))
+            if health.tripped_until:
+                return
+            p95, errors = health.p95(), health.error_rate()
+            if max_p95 is not None and p95 is not None and p95 > max_p95:
+                reason = f"p95 {p95:.1f}s > {max_p95:.1f}s"
+            elif max_errors is not None and errors is not None and errors > max_errors:
+                reason = f"error rate {errors:.0%} > {max_errors:.0%}"
+            if reason:
+                health.tripped_until = time.time() + COOLDOWN_S
+        if reason:
+            self._log("trip", task, profile, reason=reason, cooldown_s=COOLDOWN_S)
+
+    def _log(self, event: str, task: str, profile: str, **fields) -> None:
+        entry = {
+            "event": event,
+            "task": task,
+            "profile": profile,
+            "ts": round(time.time(), 3),
+        }
+        entry.update(fields)
+        log.info(f"route_{event}", task=task, profile=profile, **fields)
+        line = json.dumps(entry, ensure_ascii=False)
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception as e:
+                log.warning("log_write_failed", path=self.log_path, error=str(e))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                name: {
+                    "samples": len(h.samples),
+                    "p95_s": h.p95(),
+                    "error_rate": h.error_rate(),
+                    "tripped": bool(h.tripped_until),
+                }
+                for name, h in self._health.items()
+            }
+
+
+# Global router instance
+router = Router()
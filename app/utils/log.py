@@ -0,0 +1,213 @@
+"""
+Leveled, structured logging with per-subsystem levels.
+
+    from app.utils.log import get_logger
+    log = get_logger("session")
+    log.debug("quiz_data_read", session_id=sid, size=lambda: len(raw))
+
+- One line per event: JSON by default (LOG_FORMAT=text for humans), with
+  level, subsystem, event name, request id and the given fields.
+- Levels: LOG_LEVEL (default "info") and per subsystem overrides in
+  LOG_LEVELS, e.g. "llm=debug,session=warning".
+- A disabled call returns after one integer comparison: nothing is formatted
+  or serialized. Field values that are callables are only evaluated when the
+  event is emitted, so expensive values cost nothing when it is not.
+- Debug events are sampled per request (LOG_DEBUG_SAMPLE, 0-1), so a sampled
+  request keeps its complete debug trace.
+- Each request gets an id (incoming X-Request-ID or a new one), attached to
+  every event and returned in the X-Request-ID response header. It follows
+  work handed to background threads through `contextvars`.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+_LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_debug_sampled: ContextVar[Optional[bool]] = ContextVar("debug_sampled", default=None)
+
+_output = logging.getLogger("quiz")
+_output.propagate = False
+if not _output.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _output.addHandler(_handler)
+_output.setLevel(logging.DEBUG)
+
+
+def _parse_level(value: str, default: int) -> int:
+    return LEVELS.get((value or "").strip().lower(), default)
+
+
+class _Config:
+    def __init__(self):
+        self.default = INFO
+        self.levels = {}
+        self.sample = 1.0
+        self.json = True
+
+    def load(self, env=os.environ) -> None:
+        self.default = _parse_level(env.get("LOG_LEVEL"), INFO)
+        self.levels = {}
+        for item in (env.get("LOG_LEVELS") or "").split(","):
+            if "=" in item:
+                name, value = item.split("=", 1)
+                self.levels[name.strip()] = _parse_level(value, self.default)
+        try:
+            self.sample = min(1.0, max(0.0, float(env.get("LOG_DEBUG_SAMPLE", "1"))))
+        except ValueError:
+            self.sample = 1.0
+        self.json = (env.get("LOG_FORMAT") or "json").lower() != "text"
+
+    def level_for(self, subsystem: str) -> int:
+        return self.levels.get(subsystem, self.default)
+
+
+_config = _Config()
+_config.load()
+_loggers: Dict[str, "Logger"] = {}
+
+
+class Logger:
+    """Logger for one subsystem; see the module docstring."""
+
+    __slots__ = ("subsystem", "level")
+
+    def __init__(self, subsystem: str, level: int):
+        self.subsystem = subsystem
+        self.level = level
+
+    @property
+    def is_debug(self) -> bool:
+        """True when debug events of this subsystem may be emitted."""
+        return self.level <= DEBUG and _debug_sampled_now()
+
+    def debug(self, event: str, **fields) -> None:
+        if self.level > DEBUG or not _debug_sampled_now():
+            return
+        _emit(DEBUG, self.subsystem, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        if self.level > INFO:
+            return
+        _emit(INFO, self.subsystem, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        if self.level > WARNING:
+            return
+        _emit(WARNING, self.subsystem, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        if self.level > ERROR:
+            return
+        _emit(ERROR, self.subsystem, event, fields)
+
+
+def get_logger(subsystem: str) -> Logger:
+    logger = _loggers.get(subsystem)
+    if logger is None:
+        logger = _loggers[subsystem] = Logger(subsystem, _config.level_for(subsystem))
+    return logger
+
+
+def configure(**env) -> None:
+    """Reload the configuration (from os.environ, overridden by `env`)."""
+    merged = dict(os.environ)
+    merged.update({k: str(v) for k, v in env.items()})
+    _config.load(merged)
+    for name, logger in _loggers.items():
+        logger.level = _config.level_for(name)
+
+
+def _debug_sampled_now() -> bool:
+    sampled = _debug_sampled.get()
+    if sampled is None:
+        # Outside a request: sample each event on its own
+        return _config.sample >= 1.0 or random.random() < _config.sample
+    return sampled
+
+
+def _value(v):
+    if callable(v):
+        try:
+            v = v()
+        except Exception as e:
+            v = f"<error: {e}>"
+    return v
+
+
+def _emit(level: int, subsystem: str, event: str, fields: Dict) -> None:
+    record = {
+        "ts": round(time.time(), 3),
+        "level": _LEVEL_NAMES[level],
+        "sub": subsystem,
+        "event": event,
+    }
+    rid = _request_id.get()
+    if rid:
+        record["rid"] = rid
+    for k, v in fields.items():
+        record[k] = _value(v)
+    if _config.json:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+    else:
+        extra = " ".join(
+            f"{k}={v!r}" if isinstance(v, str) and " " in v else f"{k}={v}"
+            for k, v in record.items()
+            if k not in ("ts", "level", "sub", "event")
+        )
+        line = f"{record['level'].upper():7} {subsystem:11} {event} {extra}".rstrip()
+    # makeRecord + handle: skips Logger.log's caller lookup (a stack walk)
+    _output.handle(_output.makeRecord(_output.name, level, "", 0, line, None, None))
+
+
+# ---------------------------------------------------------------------------
+# Request correlation
+# ---------------------------------------------------------------------------
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def start_request(request_id: Optional[str] = None) -> str:
+    """Bind a request id and a debug sampling decision to the current context."""
+    rid = (request_id or "").strip()[:64] or uuid.uuid4().hex[:16]
+    _request_id.set(rid)
+    _debug_sampled.set(_config.sample >= 1.0 or random.random() < _config.sample)
+    return rid
+
+
+def end_request() -> None:
+    _request_id.set(None)
+    _debug_sampled.set(None)
+
+
+def init_app(app) -> None:
+    """Attach request ids to every request of a Flask app."""
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        g.request_id = start_request(request.headers.get("X-Request-ID"))
+
+    @app.after_request
+    def _return_request_id(response):
+        rid = get_request_id()
+        if rid:
+            response.headers["X-Request-ID"] = rid
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exc=None):
+        end_request()
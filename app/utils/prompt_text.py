@@ -0,0 +1,101 @@
+"""
+Compact forms of recommendation fields for prompts.
+
+The CSV fields come from PDF extraction: sentences are broken by hard line
+breaks ("de\\ncomment orienter un traumatisé thoracique en\\nfonction"),
+words are hyphenated across lines ("pneumo-\\nthorax") and the evidence
+cites a reference list ("[3]") that is not part of the prompt. The compact
+form joins wrapped lines, keeps line breaks only before list items and at
+blank lines, drops citation markers and collapses whitespace.
+
+Records keep their original text for display; prompts use the compact form,
+computed once per distinct text (primed when the dataset is loaded).
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable
+
+# Fields sent to the model (references and link never are)
+PROMPT_FIELDS = ("theme", "topic", "recommendation", "grade", "evidence")
+
+# "pneumo-\nthorax" -> "pneumothorax" (not "-\n-item": a list item)
+_HYPHEN_BREAK_RE = re.compile(r"-(?<=[^\W\d_]-)[^\S\n]*\n[^\S\n]*(?=[a-zà-öø-ÿœ])")
+# List items: "-en cas de...", "• ...", "1) ..."
+_LIST_ITEM_RE = re.compile(r"^(?:[-•*–·]|\d{1,2}[.)]\s)")
+# Citation markers: [3], [4-6], [6, 7], [12; 14]. Not "[1,86–2,11]", a
+# confidence interval with decimal commas, nor the ambiguous "[6,7]".
+_NUM = r"\d{1,3}(?:\s*[-–]\s*\d{1,3})?"
+_CITATION_RE = re.compile(rf"\[{_NUM}(?:\s*(?:;\s*|,\s+){_NUM})*\]")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r" (?=[.,)])")
+
+
+def compact_text(text: str) -> str:
+    """Prompt form of a field: unwrapped lines, no citation markers, single spaces."""
+    if not text:
+        return text or ""
+    s = str(text).replace("\r\n", "\n").replace("\r", "\n")
+    if "-" in s:
+        s = _HYPHEN_BREAK_RE.sub("", s)
+    out = []
+    blank = False
+    for line in s.split("\n"):
+        # Any run of whitespace (tabs, no-break spaces) -> one space
+        line = " ".join(line.split())
+        if not line:
+            blank = True
+            continue
+        if out:
+            out.append("\n" if blank or _LIST_ITEM_RE.match(line) else " ")
+        out.append(line)
+        blank = False
+    s = "".join(out)
+    if "[" in s:
+        s = _CITATION_RE.sub("", s)
+        while "  " in s:
+            s = s.replace("  ", " ")
+        s = _SPACE_BEFORE_PUNCT_RE.sub("", s).replace("\n ", "\n")
+    return s.strip()
+
+
+class PromptText:
+    """Memo of compact_text results, so each distinct text is compacted once."""
+
+    def __init__(self, enabled: bool = True, max_entries: int = 20000):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._compact = {}
+        self._lock = threading.Lock()
+
+    def compact(self, text: str) -> str:
+        if not self.enabled or not text:
+            return text
+        result = self._compact.get(text)
+        if result is None:
+            result = compact_text(text)
+            with self._lock:
+                if len(self._compact) >= self.max_entries:
+                    # Texts of a replaced dataset: simply start over
+                    self._compact.clear()
+                self._compact[text] = result
+        return result
+
+    def fields(self, recommendation: Dict) -> Dict[str, str]:
+        """The prompt fields present in a recommendation, in compact form."""
+        return {
+            field: self.compact(str(recommendation[field] or ""))
+            for field in PROMPT_FIELDS
+            if field in recommendation
+        }
+
+    def prime(self, records: Iterable[Dict]) -> None:
+        """Compact the prompt fields of a freshly loaded dataset."""
+        for record in records:
+            self.fields(record)
+
+
+# Global prompt text instance
+prompt_text = PromptText(
+    enabled=os.getenv("PROMPT_COMPACT_TEXT", "true").lower() in ("1", "true", "yes")
+)
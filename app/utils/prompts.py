@@ -1,21 +1,21 @@
 """
 OpenAI prompt templates for the medical quiz application.
-"""
 
+Each prompt is split into static instructions (sent as the system message,
+identical for every call so the provider can cache the prefix) and a short
+user message carrying every variable field exactly once. Fields are sent in
+their compact form (app/utils/prompt_text.py): PDF line wraps joined,
+citation markers dropped.
+"""
 
-def get_vignette_prompt(recommendation: dict) -> str:
-    """Prompt for generating clinical vignette and question based on a specific recommendation."""
-    return f"""
+from .prompt_text import prompt_text
 
-ROLE
-Tu es un générateur de vignettes cliniques pour médecins anesthésistes-réanimateurs. 
-Chaque vignette est un quiz évaluant l’adhésion à UNE recommandation précise.
+# Bump whenever the scoring prompt changes, so cached evaluations are invalidated.
+SCORING_PROMPT_VERSION = 4
 
-RECOMMANDATION À UTILISER:
-Thème: {recommendation.get('theme', 'Non spécifié')}
-Sujet: {recommendation.get('topic', 'Non spécifié')}
-Recommandation: {recommendation.get('recommendation', '')}
-   
+VIGNETTE_INSTRUCTIONS = """ROLE
+Tu es un générateur de vignettes cliniques pour médecins anesthésistes-réanimateurs.
+Chaque vignette est un quiz évaluant l'adhésion à UNE recommandation précise, fournie dans le message de l'utilisateur.
 
 OBJECTIF
 1. Rédiger un cas clinique (3 à 5 phrases) réaliste, pertinent, centré sur la recommandation.
@@ -24,12 +24,12 @@ OBJECTIF
 
 CONTEXTE OBLIGATOIRE
 - Spécialité : anesthésie-réanimation.
-- La situation clinique doit rendre l’application de la recommandation évidente et centrale.
+- La situation clinique doit rendre l'application de la recommandation évidente et centrale.
 - Style sobre, médical. Aucune écriture inclusive.
 
 CONTRAINTES DE RÉDACTION
 - 3 à 5 phrases maximum pour la vignette.
-- Pas d’indice évident ni formulation révélant explicitement la recommandation.
+- Pas d'indice évident ni formulation révélant explicitement la recommandation.
 - Une seule question, fermée (attend une action/conduite précise).
 - Ne pas inclure la réponse dans la vignette ou la question.
 - Ne pas faire de piège.
@@ -40,33 +40,18 @@ VÉRIFICATIONS AVANT DE RENDRE
 - Contexte hospitalier bien présent.
 - Une seule question, une seule réponse idéale.
 - Aucune écriture inclusive.
-   
-FORMAT DE RÉPONSE:
-VIGNETTE:
-[Cas clinique ici]
-
-QUESTION:
-[Question ici]"""
-
-
-def get_scoring_prompt(recommendation: dict) -> str:
-    """Prompt for scoring user answers."""
-    return f"""
 
-Ta mission : noter la réponse d'un utilisateur sur une échelle ENTIER 0–5, en la comparant à la recommandation de référence.
+FORMAT DE RÉPONSE:
+Un objet JSON {"vignette": "[Cas clinique ici]", "question": "[Question ici]"}."""
 
-RECOMMANDATION DE RÉFÉRENCE:
-- Recommandation (gold standard) : {recommendation.get('recommendation', '')}
-- Sujet: {recommendation.get('topic', 'Non spécifié')}
-- Grade : {recommendation.get('grade', 'Non spécifié')}
-- Preuves (evidence) : {recommendation.get('evidence', '')}
+SCORING_INSTRUCTIONS = """Ta mission : noter la réponse d'un utilisateur sur une échelle ENTIER 0–5, en la comparant à la recommandation de référence (gold standard) fournie dans le message de l'utilisateur, avec son sujet, son grade et ses preuves (evidence).
 
 INSTRUCTIONS:
-1. Compare la réponse de l'utilisateur avec la recommandation de référence ({recommendation.get('recommendation', '')}).
+1. Compare la réponse de l'utilisateur avec la recommandation de référence.
 2. Vérifie la pertinence de la réponse de l'utilisateur par rapport au cas clinique.
-3. N'attends pas de la réponse de l'utilisateur des éléments non présents dans la recommandation de référence ({recommendation.get('recommendation', '')}) ou les preuves ({recommendation.get('evidence', '')}), pour générer le score de l'utilisateur.
-3. Attribue un score ENTIER de 0 à 5 selon les critères de notations ci-après.
-3. Fournis un feedback détaillé et pédagogique selon le format du feedback détaillé ci-après.
+3. N'attends pas de la réponse de l'utilisateur des éléments non présents dans la recommandation de référence ou les preuves, pour générer le score de l'utilisateur.
+4. Attribue un score ENTIER de 0 à 5 selon les critères de notations ci-après.
+5. Fournis un feedback détaillé et pédagogique selon le format du feedback détaillé ci-après.
 
 CRITÈRES DE NOTATION (0–5, entier):
 - 5: Réponse excellente, complète et parfaitement adaptée à la situation clinique. Démontre une maîtrise claire de la recommandation et de son application pratique.
@@ -78,19 +63,41 @@ CRITÈRES DE NOTATION (0–5, entier):
 
 FEEDBACK:
 Fournis un retour structuré et argumenté (max. 150 mots):
-* Indique clairement si la réponse de l'utilisateur est correcte, partiellement correcte, ou incorrecte au regard de la recommandation de référence ({recommendation.get('recommendation', '')}).
+* Indique clairement si la réponse de l'utilisateur est correcte, partiellement correcte, ou incorrecte au regard de la recommandation de référence.
 * Replace la réponse de l'utilisateur dans le contexte du cas clinique.
-* Mentionne explicitement le niveau d'accord GRADE selon {recommendation.get('grade', '')}, mais ne l'utilise pas pour générer le score.
-* Explique les preuves selon {recommendation.get('evidence', '')} et leur application au cas clinique. 
+* Mentionne explicitement le niveau d'accord GRADE de la recommandation, mais ne l'utilise pas pour générer le score.
+* Explique les preuves fournies et leur application au cas clinique.
 * Justifie pourquoi la recommandation s'applique (ou non) dans la situation décrite.
 * Adopte un ton professionnel, confraternel et pédagogique, en vouvoiement. Aucune écriture inclusive.
-* L'objectif est l'apprentissage et la consolidation des connaissances basées sur la recommendation
-* Utilise des retours à la ligne et un Markdown simple, clair et hierarchisé.
-
-
+* L'objectif est l'apprentissage et la consolidation des connaissances basées sur la recommandation.
+* Utilise des retours à la ligne et un Markdown simple, clair et hiérarchisé.
 
 FORMAT DE RÉPONSE:
-SCORE: [0-5]
-FEEDBACK: [Feedback détaillé et pédagogique]"""
-
-
+Un objet JSON {"score": [entier 0-5], "feedback": "[Feedback détaillé et pédagogique]"}."""
+
+
+def get_vignette_input(recommendation: dict) -> str:
+    """User message for vignette generation: the recommendation to use."""
+    fields = prompt_text.fields(recommendation)
+    return f"""RECOMMANDATION À UTILISER:
+Thème: {fields.get('theme', 'Non spécifié')}
+Sujet: {fields.get('topic', 'Non spécifié')}
+Recommandation: {fields.get('recommendation', '')}
+
+Génère maintenant la vignette clinique et la question basées sur cette recommandation."""
+
+
+def get_scoring_input(
+    recommendation: dict, vignette: str, question: str, user_answer: str
+) -> str:
+    """User message for scoring: reference recommendation, case and answer."""
+    fields = prompt_text.fields(recommendation)
+    return f"""RECOMMANDATION DE RÉFÉRENCE:
+- Recommandation (gold standard) : {fields.get('recommendation', '')}
+- Sujet : {fields.get('topic', 'Non spécifié')}
+- Grade : {fields.get('grade', 'Non spécifié')}
+- Preuves (evidence) : {fields.get('evidence', '')}
+
+VIGNETTE: {vignette}
+QUESTION: {question}
+RÉPONSE DE L'UTILISATEUR: {user_answer}"""
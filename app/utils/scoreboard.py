@@ -9,6 +9,11 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import pytz
 
+from .leaderboard_stream import leaderboard_broadcaster, team_entry
+from .log import get_logger
+
+log = get_logger("scoreboard")
+
 try:
     import redis
 
@@ -52,9 +57,9 @@ class Scoreboard:
 
                 # Test connection
                 self.redis_client.ping()
-                print("Redis connection established")
+                log.info("redis_connected")
         except Exception as e:
-            print(f"Redis connection failed: {e}")
+            log.error("redis_connection_failed", error=str(e))
             self.redis_client = None
 
     def _init_sqlite(self):
@@ -81,14 +86,17 @@ class Scoreboard:
                 """
                 )
                 conn.commit()
-                print("SQLite database initialized")
+                log.info("sqlite_initialized", path=self.db_path)
         except Exception as e:
-            print(f"SQLite initialization failed: {e}")
+            log.error("sqlite_init_failed", error=str(e))
+
+    def current_day(self) -> str:
+        """Today's date (Paris time), as YYYY-MM-DD."""
+        return datetime.now(self.timezone).strftime("%Y-%m-%d")
 
     def _get_current_day_key(self) -> str:
         """Get Redis key for current day leaderboard."""
-        now = datetime.now(self.timezone)
-        return f"leaderboard:{now.strftime('%Y-%m-%d')}"
+        return f"leaderboard:{self.current_day()}"
 
     def _is_today(self, timestamp_str: str) -> bool:
         """Check if timestamp is from today."""
@@ -109,15 +117,16 @@ class Scoreboard:
             try:
                 key = self._get_current_day_key()
                 # Increment team score and player count
-                self.redis_client.hincrby(f"{key}:scores", team_name, score)
-                self.redis_client.hincrby(f"{key}:counts", team_name, 1)
+                total = self.redis_client.hincrby(f"{key}:scores", team_name, score)
+                players = self.redis_client.hincrby(f"{key}:counts", team_name, 1)
                 # Set expiration for 25 hours (allows for timezone differences)
                 self.redis_client.expire(f"{key}:scores", 25 * 3600)
                 self.redis_client.expire(f"{key}:counts", 25 * 3600)
-                print(f"Score added to Redis: {team_name} = {score}")
+                log.info("score_added", backend="redis", team=team_name, score=score)
+                self._publish(team_name, int(total), int(players))
                 return True
             except Exception as e:
-                print(f"Redis add_score failed: {e}")
+                log.error("add_score_failed", backend="redis", error=str(e))
 
         # Fallback to SQLite
         try:
@@ -127,12 +136,31 @@ class Scoreboard:
                     (team_name, score, timestamp),
                 )
                 conn.commit()
-                print(f"Score added to SQLite: {team_name} = {score}")
+                # Timestamps are Paris ISO strings: their first 10 characters
+                # are the Paris day (SQLite's DATE() would convert to UTC)
+                total, players = conn.execute(
+                    """
+                    SELECT SUM(score), COUNT(*) FROM team_scores
+                    WHERE team_name = ? AND substr(timestamp, 1, 10) = ?
+                """,
+                    (team_name, self.current_day()),
+                ).fetchone()
+                log.info("score_added", backend="sqlite", team=team_name, score=score)
+                self._publish(team_name, total or score, players or 1)
                 return True
         except Exception as e:
-            print(f"SQLite add_score failed: {e}")
+            log.error("add_score_failed", backend="sqlite", error=str(e))
             return False
 
+    def _publish(self, team_name: str, total: int, players: int) -> None:
+        """Push the team's new totals to live leaderboard streams."""
+        try:
+            delta = team_entry(team_name, total, players)
+            delta["day"] = self.current_day()
+            leaderboard_broadcaster.publish(delta)
+        except Exception as e:
+            log.warning("publish_failed", error=str(e))
+
     def get_top_teams(self, limit: int = 3) -> List[Dict]:
         """Get top teams for today's leaderboard."""
         # Try Redis first
@@ -178,20 +206,20 @@ class Scoreboard:
                     
                     return leaderboard[:limit] if limit else leaderboard
             except Exception as e:
-                print(f"Redis get_top_teams failed: {e}")
+                log.error("get_top_teams_failed", backend="redis", error=str(e))
 
         # Fallback to SQLite
         try:
             with sqlite3.connect(self.db_path) as conn:
-                # Get today's scores
-                today = datetime.now(self.timezone).date().isoformat()
+                # Get today's scores (Paris day, as in add_score)
+                today = self.current_day()
                 if limit:
                     cursor = conn.execute(
                         """
                         SELECT team_name, SUM(score) as total_score, COUNT(*) as player_count,
                                ROUND(CAST(SUM(score) AS FLOAT) / CAST(COUNT(*) AS FLOAT), 1) as average_score
                         FROM team_scores
-                        WHERE DATE(timestamp) = DATE(?)
+                        WHERE substr(timestamp, 1, 10) = ?
                         GROUP BY team_name
                         ORDER BY average_score DESC
                         LIMIT ?
@@ -204,7 +232,7 @@ class Scoreboard:
                         SELECT team_name, SUM(score) as total_score, COUNT(*) as player_count,
                                ROUND(CAST(SUM(score) AS FLOAT) / CAST(COUNT(*) AS FLOAT), 1) as average_score
                         FROM team_scores
-                        WHERE DATE(timestamp) = DATE(?)
+                        WHERE substr(timestamp, 1, 10) = ?
                         GROUP BY team_name
                         ORDER BY average_score DESC
                     """,
@@ -225,7 +253,7 @@ class Scoreboard:
 
                 return results
         except Exception as e:
-            print(f"SQLite get_top_teams failed: {e}")
+            log.error("get_top_teams_failed", backend="sqlite", error=str(e))
             return []
 
     def reset_daily_scores(self):
@@ -235,7 +263,7 @@ class Scoreboard:
                 # Redis handles this automatically with expiration
                 pass
             except Exception as e:
-                print(f"Redis reset failed: {e}")
+                log.error("reset_failed", backend="redis", error=str(e))
 
         # For SQLite, we can clean up old scores periodically
         try:
@@ -249,7 +277,7 @@ class Scoreboard:
                 )
                 conn.commit()
         except Exception as e:
-            print(f"SQLite cleanup failed: {e}")
+            log.error("cleanup_failed", backend="sqlite", error=str(e))
 
 
 # Global scoreboard instance
@@ -4,68 +4,141 @@ Answer evaluation and scoring system.
 
 from typing import Dict, Optional
 from .openai_client import get_openai_client
+from .eval_cache import evaluation_cache
+from .log import get_logger
 
+log = get_logger("scorer")
 
-def evaluate_answer(user_answer: str, question_data: Dict) -> Optional[Dict]:
+NO_ANSWER = {
+    "score": 0,
+    "feedback": "Aucune réponse fournie.",
+}
+
+
+def evaluate_answer(
+    user_answer: str, question_data: Dict, budget: Optional[float] = None
+) -> Optional[Dict]:
     """
     Evaluate user's answer and provide score and feedback.
 
     Args:
         user_answer: User's free-text answer
         question_data: Dict containing vignette, question, and recommendation
+        budget: Latency budget in seconds for the model call (default per task)
 
     Returns:
         Dict with score, feedback, and educational content
     """
-    print(f"DEBUG: Starting evaluation for answer: {user_answer[:50]}...")
-
     if not user_answer or not question_data:
-        print("DEBUG: No answer or question data provided")
-        return {
-            "score": 0,
-            "feedback": "Aucune réponse fournie.",
-        }
+        log.debug("empty_answer")
+        return dict(NO_ANSWER)
+
+    cache_key = evaluation_cache.make_key(user_answer, question_data)
+    cached = _cached(cache_key, question_data)
+    if cached is not None:
+        return cached
 
     try:
         # Evaluate the answer
-        print("DEBUG: Getting OpenAI client...")
         client = get_openai_client()
-        print(f"DEBUG: Client type: {type(client)}")
-
-        print("DEBUG: Calling evaluate_answer...")
         evaluation = client.evaluate_answer(
             user_answer=user_answer.strip(),
             correct_recommendation=question_data["recommendation"],
             vignette=question_data["vignette"],
             question=question_data["question"],
+            budget=budget,
         )
-        print(f"DEBUG: Evaluation received: {evaluation}")
-
-        if not evaluation:
-            print("DEBUG: No evaluation returned")
-            return {
-                "score": 0,
-                "feedback": "Erreur lors de l'évaluation",
-            }
-
-        result = {
-            "score": evaluation["score"],
-            "feedback": evaluation["feedback"],
-            "recommendation": question_data["recommendation"],
-        }
-        print(f"DEBUG: Final result: {result}")
-        return result
+        return _result(evaluation, client, user_answer, question_data, cache_key)
+
+    except Exception as e:
+        return _failure(e)
+
+
+async def evaluate_answer_async(
+    user_answer: str, question_data: Dict, budget: Optional[float] = None
+) -> Optional[Dict]:
+    """evaluate_answer for async jobs (model call on the event loop)."""
+    if not user_answer or not question_data:
+        log.debug("empty_answer")
+        return dict(NO_ANSWER)
+
+    cache_key = evaluation_cache.make_key(user_answer, question_data)
+    cached = _cached(cache_key, question_data)
+    if cached is not None:
+        return cached
+
+    try:
+        client = get_openai_client()
+        evaluation = await client.evaluate_answer_async(
+            user_answer=user_answer.strip(),
+            correct_recommendation=question_data["recommendation"],
+            vignette=question_data["vignette"],
+            question=question_data["question"],
+            budget=budget,
+        )
+        return _result(evaluation, client, user_answer, question_data, cache_key)
 
     except Exception as e:
-        print(f"DEBUG: Exception in evaluate_answer: {e}")
-        import traceback
+        return _failure(e)
+
+
+def _cached(cache_key: str, question_data: Dict) -> Optional[Dict]:
+    cached = evaluation_cache.get(cache_key)
+    if cached is None:
+        return None
+    log.debug("cache_hit", stats=evaluation_cache.stats)
+    return {
+        "score": cached["score"],
+        "feedback": cached["feedback"],
+        "recommendation": question_data["recommendation"],
+    }
 
-        traceback.print_exc()
+
+def _result(
+    evaluation: Optional[Dict],
+    client,
+    user_answer: str,
+    question_data: Dict,
+    cache_key: str,
+) -> Dict:
+    if not evaluation:
+        log.warning("no_evaluation", client=type(client).__name__)
         return {
             "score": 0,
-            "feedback": f"Erreur lors de l'évaluation: {str(e)}",
+            "feedback": "Erreur lors de l'évaluation",
         }
 
+    result = {
+        "score": evaluation["score"],
+        "feedback": evaluation["feedback"],
+        "recommendation": question_data["recommendation"],
+    }
+    if evaluation.get("degraded"):
+        result["degraded"] = True
+    if not evaluation.get("error") and not evaluation.get("degraded"):
+        evaluation_cache.set(
+            cache_key,
+            {"score": evaluation["score"], "feedback": evaluation["feedback"]},
+        )
+    log.debug(
+        "evaluated",
+        score=result["score"],
+        degraded=bool(evaluation.get("degraded")),
+        error=bool(evaluation.get("error")),
+        answer_chars=len(user_answer),
+    )
+    return result
+
+
+def _failure(e: Exception) -> Dict:
+    import traceback
+
+    log.error("evaluation_failed", error=str(e), trace=traceback.format_exc)
+    return {
+        "score": 0,
+        "feedback": f"Erreur lors de l'évaluation: {str(e)}",
+    }
+
 
 def get_score_category(score: float) -> str:
     """Get descriptive category for a score."""
@@ -7,6 +7,10 @@ import os
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
+from .log import get_logger
+
+log = get_logger("session")
+
 
 class SessionStorage:
     """Handle server-side session storage using Redis/KV backend."""
@@ -25,19 +29,19 @@ class SessionStorage:
                     if token:
                         from upstash_redis import Redis
                         self.redis_client = Redis(url=redis_url, token=token)
-                        print("Session storage: Redis connection established")
+                        log.info("redis_connected", backend="upstash")
                 else:
                     import redis
                     self.redis_client = redis.from_url(redis_url)
-                    print("Session storage: Redis connection established")
+                    log.info("redis_connected", backend="redis")
         except Exception as e:
-            print(f"Session storage: Redis connection failed: {e}")
+            log.error("redis_connection_failed", error=str(e))
             self.redis_client = None
     
     def store_quiz_data(self, session_id: str, data: Dict[Any, Any], ttl_hours: int = 2) -> bool:
         """Store quiz data for a session with TTL."""
         if not self.redis_client:
-            print("Session storage: No Redis connection available")
+            log.warning("no_redis", op="store")
             return False
         
         try:
@@ -46,16 +50,21 @@ class SessionStorage:
             ttl_seconds = ttl_hours * 3600
             
             result = self.redis_client.setex(key, ttl_seconds, serialized_data)
-            print(f"Session storage: Stored quiz data for {session_id} (TTL: {ttl_hours}h)")
+            log.debug(
+                "quiz_data_stored",
+                session_id=session_id,
+                ttl_hours=ttl_hours,
+                size=len(serialized_data),
+            )
             return bool(result)
         except Exception as e:
-            print(f"Session storage: Failed to store quiz data: {e}")
+            log.error("quiz_data_store_failed", session_id=session_id, error=str(e))
             return False
     
     def get_quiz_data(self, session_id: str) -> Optional[Dict[Any, Any]]:
         """Retrieve quiz data for a session."""
         if not self.redis_client:
-            print("Session storage: No Redis connection available")
+            log.warning("no_redis", op="get")
             return None
         
         try:
@@ -66,13 +75,13 @@ class SessionStorage:
                 if isinstance(data, bytes):
                     data = data.decode('utf-8')
                 parsed_data = json.loads(data)
-                print(f"Session storage: Retrieved quiz data for {session_id}")
+                log.debug("quiz_data_read", session_id=session_id, size=len(data))
                 return parsed_data
             else:
-                print(f"Session storage: No data found for {session_id}")
+                log.debug("quiz_data_missing", session_id=session_id)
                 return None
         except Exception as e:
-            print(f"Session storage: Failed to retrieve quiz data: {e}")
+            log.error("quiz_data_read_failed", session_id=session_id, error=str(e))
             return None
     
     def update_quiz_data(self, session_id: str, data: Dict[Any, Any], ttl_hours: int = 2) -> bool:
@@ -87,10 +96,10 @@ class SessionStorage:
         try:
             key = f"quiz_session:{session_id}"
             result = self.redis_client.delete(key)
-            print(f"Session storage: Deleted quiz data for {session_id}")
+            log.debug("quiz_data_deleted", session_id=session_id)
             return bool(result)
         except Exception as e:
-            print(f"Session storage: Failed to delete quiz data: {e}")
+            log.error("quiz_data_delete_failed", session_id=session_id, error=str(e))
             return False
     
     def session_exists(self, session_id: str) -> bool:
@@ -103,7 +112,7 @@ class SessionStorage:
             exists = self.redis_client.exists(key)
             return bool(exists)
         except Exception as e:
-            print(f"Session storage: Failed to check session existence: {e}")
+            log.error("quiz_data_exists_failed", session_id=session_id, error=str(e))
             return False
 
 
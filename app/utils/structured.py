@@ -0,0 +1,239 @@
+"""
+Schema-constrained model output: JSON schemas, strict validation and local repair.
+
+Parsing never throws a successful model response away. Each response goes
+through, in order:
+  1. strict JSON validated against the schema,
+  2. a cheap local repair (code fences, surrounding prose, smart quotes,
+     trailing commas, score written as "4/5" or "4.0"),
+  3. the legacy text format (VIGNETTE:/QUESTION:, SCORE:/FEEDBACK:),
+  4. a last-resort salvage of whatever usable content is present.
+Every outcome is counted in `parse_stats`.
+"""
+
+import json
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+VIGNETTE_SCHEMA = {
+    "name": "vignette",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "vignette": {"type": "string"},
+            "question": {"type": "string"},
+        },
+        "required": ["vignette", "question"],
+        "additionalProperties": False,
+    },
+}
+
+SCORING_SCHEMA = {
+    "name": "evaluation",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "score": {"type": "integer", "enum": [0, 1, 2, 3, 4, 5]},
+            "feedback": {"type": "string"},
+        },
+        "required": ["score", "feedback"],
+        "additionalProperties": False,
+    },
+}
+
+# Used only when a generated case came back without any question
+GENERIC_QUESTION = "Quelle est votre conduite à tenir ?"
+
+OUTCOMES = ("json", "repaired", "legacy", "salvaged", "failed")
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_LEGACY_SCORE_RE = re.compile(r"SCORE\s*:\s*\**\s*(\d(?:[.,]\d+)?)", re.IGNORECASE)
+_SCORE_VALUE_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*(?:/\s*5)?\s*$")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"'})
+
+
+def response_format(schema: Dict) -> Dict:
+    """Responses API `text` parameter enforcing a JSON schema."""
+    return {
+        "format": {
+            "type": "json_schema",
+            "name": schema["name"],
+            "schema": schema["schema"],
+            "strict": True,
+        }
+    }
+
+
+class ParseStats:
+    """Thread-safe counters of parse outcomes per task."""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, outcome: str) -> None:
+        with self._lock:
+            per_task = self._counts.setdefault(task, dict.fromkeys(OUTCOMES, 0))
+            per_task[outcome] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {task: dict(counts) for task, counts in self._counts.items()}
+
+
+parse_stats = ParseStats()
+
+
+def _load_json(text: str) -> Optional[Dict]:
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _repair_json(text: str) -> Optional[Dict]:
+    """Best-effort fix of near-miss JSON (fences, prose around it, quotes, commas)."""
+    s = _FENCE_RE.sub("", text.strip())
+    start, end = s.find("{"), s.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    s = s[start : end + 1].translate(_SMART_QUOTES)
+    s = _TRAILING_COMMA_RE.sub(r"\1", s)
+    try:
+        # strict=False tolerates raw newlines inside strings
+        data = json.loads(s, strict=False)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _coerce_score(value) -> Optional[int]:
+    """Accept 4, 4.0, "4", "4/5"; reject anything outside 0-5."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        m = _SCORE_VALUE_RE.match(str(value or ""))
+        if not m:
+            return None
+        number = float(m.group(1).replace(",", "."))
+    score = int(round(number))
+    return score if 0 <= score <= 5 else None
+
+
+def _clean_str(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+# ---------------------------------------------------------------------------
+# Vignette
+# ---------------------------------------------------------------------------
+
+
+def _validate_vignette(data: Optional[Dict]) -> Optional[Dict]:
+    if not data:
+        return None
+    vignette, question = _clean_str(data.get("vignette")), _clean_str(
+        data.get("question")
+    )
+    if not vignette or not question:
+        return None
+    return {"vignette": vignette, "question": question}
+
+
+def _legacy_vignette(text: str) -> Optional[Dict]:
+    parts = re.split(r"\**QUESTION\s*:\s*\**", text, maxsplit=1, flags=re.IGNORECASE)
+    if len(parts) != 2:
+        return None
+    vignette = re.sub(r"^\s*\**VIGNETTE\s*:\s*\**", "", parts[0], flags=re.IGNORECASE)
+    return _validate_vignette({"vignette": vignette, "question": parts[1]})
+
+
+def _salvage_vignette(text: str) -> Optional[Dict]:
+    """Use the last paragraph (or last interrogative sentence) as the question.
+
+    A case without any question still gets used, with a generic question.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+    if len(paragraphs) >= 2:
+        return _validate_vignette(
+            {"vignette": "\n\n".join(paragraphs[:-1]), "question": paragraphs[-1]}
+        )
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    if len(sentences) >= 2 and sentences[-1].endswith("?"):
+        return _validate_vignette(
+            {"vignette": " ".join(sentences[:-1]), "question": sentences[-1]}
+        )
+    return _validate_vignette({"vignette": text, "question": GENERIC_QUESTION})
+
+
+def parse_vignette_output(text: str) -> Tuple[Optional[Dict], str]:
+    """Parse a vignette response. Returns (result or None, outcome)."""
+    result, outcome = None, "failed"
+    if text and text.strip():
+        for outcome, step in (
+            ("json", lambda t: _validate_vignette(_load_json(t))),
+            ("repaired", lambda t: _validate_vignette(_repair_json(t))),
+            ("legacy", _legacy_vignette),
+            ("salvaged", _salvage_vignette),
+        ):
+            result = step(text)
+            if result:
+                break
+        else:
+            outcome = "failed"
+    parse_stats.record("vignette", outcome)
+    return result, outcome
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+
+def _validate_scoring(data: Optional[Dict]) -> Optional[Dict]:
+    if not data:
+        return None
+    score = _coerce_score(data.get("score"))
+    feedback = _clean_str(data.get("feedback"))
+    if score is None or not feedback:
+        return None
+    return {"score": score, "feedback": feedback}
+
+
+def _legacy_scoring(text: str) -> Optional[Dict]:
+    m = _LEGACY_SCORE_RE.search(text)
+    if not m:
+        return None
+    feedback = ""
+    if "FEEDBACK:" in text:
+        feedback = text.split("FEEDBACK:", 1)[1]
+    return _validate_scoring({"score": m.group(1), "feedback": feedback or text})
+
+
+def parse_scoring_output(text: str) -> Tuple[Optional[Dict], str]:
+    """Parse a scoring response. Returns (result or None, outcome).
+
+    A "salvaged" result has feedback but `score` None: the caller decides how
+    to score it rather than silently defaulting to zero.
+    """
+    result, outcome = None, "failed"
+    if text and text.strip():
+        for outcome, step in (
+            ("json", lambda t: _validate_scoring(_load_json(t))),
+            ("repaired", lambda t: _validate_scoring(_repair_json(t))),
+            ("legacy", _legacy_scoring),
+        ):
+            result = step(text)
+            if result:
+                break
+        else:
+            data = _repair_json(text) or {}
+            feedback = _clean_str(data.get("feedback")) or text.strip()
+            result, outcome = {"score": None, "feedback": feedback}, "salvaged"
+    parse_stats.record("scoring", outcome)
+    return result, outcome
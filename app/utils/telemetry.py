@@ -0,0 +1,309 @@
+"""
+LLM call telemetry: latency histograms, retries, token usage and estimated cost,
+per task.
+"""
+
+import hmac
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+from .log import get_logger
+
+log = get_logger("telemetry")
+
+# Seconds; sized for reasoning-model latencies
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60, 90)
+QUEUE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+# USD per 1M tokens: (input, cached input, output). Reasoning tokens are billed
+# as output tokens and are already included in output_tokens.
+DEFAULT_PRICING = {
+    "gpt-5": (1.25, 0.125, 10.0),
+    "gpt-5-mini": (0.25, 0.025, 2.0),
+    "gpt-5-nano": (0.05, 0.005, 0.4),
+}
+
+
+def _load_pricing() -> Dict:
+    pricing = dict(DEFAULT_PRICING)
+    raw = os.getenv("LLM_PRICING_JSON")
+    if raw:
+        try:
+            pricing.update({k: tuple(v) for k, v in json.loads(raw).items()})
+        except Exception as e:
+            log.warning("invalid_pricing_json", error=str(e))
+    return pricing
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of the values (None when there are none)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + ("+Inf",), self.counts):
+            total += n
+            yield bound, total
+
+
+class LLMMetrics:
+    """Thread-safe per-task aggregates of LLM calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pricing = _load_pricing()
+        self._tasks = {}
+
+    def _task(self, task: str) -> Dict:
+        t = self._tasks.get(task)
+        if t is None:
+            t = {
+                "calls": {},
+                "routes": {},
+                "retries": 0,
+                "hedges": 0,
+                "requests": 0,
+                "latency": Histogram(LATENCY_BUCKETS),
+                "request_latency": Histogram(LATENCY_BUCKETS),
+                "queue": Histogram(QUEUE_BUCKETS),
+                "tokens": {"input": 0, "cached": 0, "output": 0, "reasoning": 0},
+                "cost_usd": 0.0,
+            }
+            self._tasks[task] = t
+        return t
+
+    def record_call(
+        self, task: str, seconds: float, outcome: str, attempts: int
+    ) -> None:
+        """One logical call (all attempts), as seen by the caller."""
+        with self._lock:
+            t = self._task(task)
+            t["calls"][outcome] = t["calls"].get(outcome, 0) + 1
+            t["retries"] += max(0, attempts - 1)
+            t["latency"].observe(seconds)
+
+    def record_route(self, task: str, profile: str) -> None:
+        """Routing profile chosen for one attempt."""
+        with self._lock:
+            routes = self._task(task)["routes"]
+            routes[profile] = routes.get(profile, 0) + 1
+
+    def record_request(
+        self,
+        task: str,
+        model: str,
+        seconds: float,
+        queue_seconds: float,
+        usage=None,
+        hedge: bool = False,
+    ) -> None:
+        """One HTTP request to the provider, with its usage block if any."""
+        tokens = usage_tokens(usage)
+        cost = self.estimate_cost(model, tokens)
+        with self._lock:
+            t = self._task(task)
+            t["requests"] += 1
+            t["hedges"] += 1 if hedge else 0
+            t["request_latency"].observe(seconds)
+            t["queue"].observe(max(0.0, queue_seconds))
+            for k, v in tokens.items():
+                t["tokens"][k] += v
+            t["cost_usd"] += cost
+
+    def estimate_cost(self, model: str, tokens: Dict) -> float:
+        price = self.pricing.get(model)
+        if not price:
+            return 0.0
+        input_price, cached_price, output_price = price
+        uncached = max(0, tokens.get("input", 0) - tokens.get("cached", 0))
+        return (
+            uncached * input_price
+            + tokens.get("cached", 0) * cached_price
+            + tokens.get("output", 0) * output_price
+        ) / 1_000_000
+
+    def snapshot(self) -> Dict:
+        """Plain-dict summary, e.g. for structured logs."""
+        with self._lock:
+            return {
+                task: {
+                    "calls": dict(t["calls"]),
+                    "routes": dict(t["routes"]),
+                    "retries": t["retries"],
+                    "hedges": t["hedges"],
+                    "requests": t["requests"],
+                    "latency_avg_s": (
+                        round(t["latency"].sum / t["latency"].count, 3)
+                        if t["latency"].count
+                        else None
+                    ),
+                    "tokens": dict(t["tokens"]),
+                    "cost_usd": round(t["cost_usd"], 6),
+                }
+                for task, t in self._tasks.items()
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of LLM, cache and parse metrics."""
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, help_text, attr):
+            header(name, "histogram", help_text)
+            for task, t in tasks:
+                h = t[attr]
+                for bound, total in h.cumulative():
+                    lines.append(f'{name}_bucket{{task="{task}",le="{bound}"}} {total}')
+                lines.append(f'{name}_sum{{task="{task}"}} {h.sum:.6f}')
+                lines.append(f'{name}_count{{task="{task}"}} {h.count}')
+
+        with self._lock:
+            tasks = sorted(self._tasks.items())
+
+            header("llm_calls_total", "counter", "Logical LLM calls by outcome.")
+            for task, t in tasks:
+                for outcome, n in sorted(t["calls"].items()):
+                    lines.append(
+                        f'llm_calls_total{{task="{task}",outcome="{outcome}"}} {n}'
+                    )
+            header(
+                "llm_requests_total", "counter", "HTTP requests sent to the provider."
+            )
+            for task, t in tasks:
+                lines.append(f'llm_requests_total{{task="{task}"}} {t["requests"]}')
+            header("llm_route_total", "counter", "Attempts per routing profile.")
+            for task, t in tasks:
+                for profile, n in sorted(t["routes"].items()):
+                    lines.append(
+                        f'llm_route_total{{task="{task}",profile="{profile}"}} {n}'
+                    )
+            header("llm_retries_total", "counter", "Retried attempts.")
+            for task, t in tasks:
+                lines.append(f'llm_retries_total{{task="{task}"}} {t["retries"]}')
+            header("llm_hedges_total", "counter", "Hedged duplicate requests.")
+            for task, t in tasks:
+                lines.append(f'llm_hedges_total{{task="{task}"}} {t["hedges"]}')
+
+            histogram(
+                "llm_call_seconds",
+                "Wall time of a logical call, retries included.",
+                "latency",
+            )
+            histogram(
+                "llm_request_seconds",
+                "Wall time of one provider request.",
+                "request_latency",
+            )
+            histogram(
+                "llm_queue_seconds", "Time a request waited before being sent.", "queue"
+            )
+
+            header("llm_tokens_total", "counter", "Tokens reported in response usage.")
+            for task, t in tasks:
+                for kind, n in sorted(t["tokens"].items()):
+                    lines.append(f'llm_tokens_total{{task="{task}",kind="{kind}"}} {n}')
+            header("llm_cost_usd_total", "counter", "Estimated spend from token usage.")
+            for task, t in tasks:
+                lines.append(f'llm_cost_usd_total{{task="{task}"}} {t["cost_usd"]:.6f}')
+
+        from .eval_cache import evaluation_cache
+        from .structured import parse_stats
+
+        cache = evaluation_cache.stats()
+        header("eval_cache_requests_total", "counter", "Evaluation cache lookups.")
+        lines.append(f'eval_cache_requests_total{{result="hit"}} {cache["hits"]}')
+        lines.append(f'eval_cache_requests_total{{result="miss"}} {cache["misses"]}')
+        header("eval_cache_entries", "gauge", "Entries in the evaluation cache.")
+        lines.append(f"eval_cache_entries {cache['size']}")
+
+        header("llm_parse_total", "counter", "Model output parse outcomes.")
+        for task, counts in sorted(parse_stats.snapshot().items()):
+            for outcome, n in counts.items():
+                lines.append(
+                    f'llm_parse_total{{task="{task}",outcome="{outcome}"}} {n}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def usage_tokens(usage) -> Dict:
+    """Extract token counts from a Responses API usage object or dict."""
+
+    def get(obj, name, default=0):
+        if obj is None:
+            return default
+        if isinstance(obj, dict):
+            return obj.get(name, default) or default
+        return getattr(obj, name, default) or default
+
+    input_details = get(usage, "input_tokens_details", None)
+    output_details = get(usage, "output_tokens_details", None)
+    return {
+        "input": int(get(usage, "input_tokens")),
+        "cached": int(get(input_details, "cached_tokens")),
+        "output": int(get(usage, "output_tokens")),
+        "reasoning": int(get(output_details, "reasoning_tokens")),
+    }
+
+
+# Global metrics instance
+llm_metrics = LLMMetrics()
+
+
+def _is_production() -> bool:
+    return (
+        os.getenv("VERCEL_ENV") == "production"
+        or os.getenv("FLASK_ENV") == "production"
+    )
+
+
+def metrics_authorized(auth_header: Optional[str], token_param: Optional[str]) -> bool:
+    """Check METRICS_TOKEN for /metrics (closed in production without one)."""
+    expected = os.getenv("METRICS_TOKEN")
+    if not expected:
+        return not _is_production()
+    expected_header = f"Bearer {expected}"
+    if auth_header and hmac.compare_digest(
+        auth_header.encode("utf-8"), expected_header.encode("utf-8")
+    ):
+        return True
+    return bool(token_param) and hmac.compare_digest(
+        token_param.encode("utf-8"), expected.encode("utf-8")
+    )
+
+
+def check_metrics_token() -> None:
+    """Warn at startup when /metrics has no token."""
+    if os.getenv("METRICS_TOKEN"):
+        return
+    if _is_production():
+        log.warning("metrics_disabled", reason="METRICS_TOKEN not set in production")
+    else:
+        log.warning("metrics_public", reason="METRICS_TOKEN not set")
@@ -7,13 +7,16 @@ from .db import get_random_recommendation
 from .openai_client import get_openai_client
 
 
-def generate_vignette_and_question(topic: str = None, recommendation: Dict = None) -> Optional[Dict]:
+def generate_vignette_and_question(
+    topic: str = None, recommendation: Dict = None, budget: Optional[float] = None
+) -> Optional[Dict]:
     """
     Generate a clinical vignette and question from a random recommendation.
 
     Args:
         topic: Optional topic to filter recommendations
         recommendation: Optional explicit recommendation dict to use
+        budget: Latency budget in seconds for the model call (default per task)
 
     Returns:
         Dict with vignette, question, and recommendation data
@@ -26,7 +29,29 @@ def generate_vignette_and_question(topic: str = None, recommendation: Dict = Non
 
     # Generate vignette and question using OpenAI
     client = get_openai_client()
-    result = client.generate_vignette_and_question(recommendation)
+    result = client.generate_vignette_and_question(recommendation, budget=budget)
+    return _with_recommendation(result, recommendation)
+
+
+async def generate_vignette_and_question_async(
+    topic: str = None, recommendation: Dict = None, budget: Optional[float] = None
+) -> Optional[Dict]:
+    """generate_vignette_and_question for async jobs (model call on the event loop)."""
+    if recommendation is None:
+        recommendation = get_random_recommendation(topic)
+        if not recommendation:
+            return None
+
+    client = get_openai_client()
+    result = await client.generate_vignette_and_question_async(
+        recommendation, budget=budget
+    )
+    return _with_recommendation(result, recommendation)
+
+
+def _with_recommendation(
+    result: Optional[Dict], recommendation: Dict
+) -> Optional[Dict]:
     if not result:
         return None
 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Run bulk LLM work through the provider's batch interface.
+
+Usage:
+  # Pre-generate a question bank for one topic (OpenAI Batch API)
+  python scripts/batch_jobs.py run --task vignette --topic "..." \
+      --workdir data/batches/bank-trauma
+
+  # After a dataset update, running the same command again in the same
+  # workdir only generates questions for added or changed recommendations
+
+  # Same pipeline end to end against the local file-based stand-in (no network)
+  python scripts/batch_jobs.py run --task vignette --provider local --limit 20 \
+      --workdir /tmp/bank
+
+  # Re-score stored answers (JSONL of {vignette, question, user_answer, recommendation})
+  python scripts/batch_jobs.py run --task scoring --input answers.jsonl \
+      --workdir data/batches/rescore
+
+Steps can also be run one at a time (prepare, submit, poll, ingest); each one
+resumes from the job state saved in the working directory.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.batch import (  # noqa: E402
+    BatchJob,
+    LocalBatchProvider,
+    OpenAIBatchProvider,
+)
+
+
+def load_items(args) -> list:
+    if args.task == "scoring":
+        if not args.input:
+            raise SystemExit("--input is required for the scoring task")
+        with open(args.input, "r", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+    else:
+        from app.utils.db import recommendations_db
+
+        if args.topic:
+            items = recommendations_db.get_recommendations_by_topic(args.topic)
+        else:
+            items = []
+            for topic in recommendations_db.list_topics():
+                items.extend(recommendations_db.get_recommendations_by_topic(topic))
+    if args.limit:
+        items = items[: args.limit]
+    return items
+
+
+def make_provider(args):
+    if args.provider == "local":
+        return LocalBatchProvider(
+            os.path.join(args.workdir, "local-provider"),
+            delay=args.local_delay,
+            fail_every=args.local_fail_every,
+        )
+    return OpenAIBatchProvider()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Batch LLM jobs (question banks, re-scoring)."
+    )
+    ap.add_argument(
+        "step", choices=["prepare", "submit", "poll", "ingest", "run", "status"]
+    )
+    ap.add_argument("--workdir", required=True, help="Job working directory")
+    ap.add_argument("--task", choices=["vignette", "scoring"], default="vignette")
+    ap.add_argument("--provider", choices=["openai", "local"], default="openai")
+    ap.add_argument("--topic", help="Restrict vignette generation to one topic")
+    ap.add_argument("--input", help="Scoring items JSONL")
+    ap.add_argument("--limit", type=int, default=0, help="Process at most N items")
+    ap.add_argument("--interval", type=float, default=30.0, help="Poll interval (s)")
+    ap.add_argument(
+        "--timeout", type=float, default=None, help="Stop polling after N seconds"
+    )
+    ap.add_argument(
+        "--local-delay",
+        type=float,
+        default=0.0,
+        help="Local provider processing delay (s)",
+    )
+    ap.add_argument(
+        "--local-fail-every",
+        type=int,
+        default=0,
+        help="Local provider: fail every n-th item",
+    )
+    args = ap.parse_args()
+
+    job = BatchJob(args.workdir, make_provider(args), task=args.task)
+
+    if args.step == "prepare":
+        job.prepare(load_items(args))
+    elif args.step == "submit":
+        job.submit()
+    elif args.step == "poll":
+        print(f"Batch status: {job.poll(interval=args.interval, timeout=args.timeout)}")
+    elif args.step == "ingest":
+        job.ingest()
+    elif args.step == "status":
+        print(json.dumps(job.state, indent=2))
+    else:
+        interval = (
+            args.interval if args.provider == "openai" else min(args.interval, 0.5)
+        )
+        job.run(load_items(args), interval=interval, timeout=args.timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of the app's hot paths, with a stored baseline.
+
+  db.*          RecommendationsDB load and queries (data/recommendations.csv)
+  session.*     SessionStorage store/get of a personal quiz in progress
+  scoreboard.*  Scoreboard add_score / get_top_teams, Redis stand-in and SQLite
+  template.*    quiz.html and result.html rendering
+  filters.*     Jinja filters over the dataset (topics, links, feedback)
+
+Each benchmark is calibrated to run for about --min-time seconds per sample,
+then sampled --repeat times; the best sample counts (the least disturbed by
+the machine), the median is shown alongside. Each sample is paired with a
+fixed pure-Python workload, and comparisons are made relative to it: a
+machine that is slower overall (shared CPU, frequency scaling) does not
+show up as a regression of every benchmark.
+
+Usage:
+  # Run and print
+  python scripts/bench.py [--only db,session]
+
+  # Store the results as the baseline (scripts/bench_baseline.json)
+  python scripts/bench.py --save
+
+  # Compare with the baseline, same loop counts; exit 1 when a benchmark is
+  # more than --threshold (default 25%) slower, in up to 3 runs of it
+  python scripts/bench.py --compare --threshold 0.25
+
+Redis is replaced by an in-process stand-in (scripts/memory_redis.py) and
+SQLite works on a temporary file, so results do not depend on a server.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+os.environ.setdefault("LOG_LEVEL", "warning")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.utils.constants import TEAM_LIST  # noqa: E402
+from app.utils.db import RecommendationsDB, recommendations_db  # noqa: E402
+from app.utils.filters import (  # noqa: E402
+    _topic_parts,
+    inline_bold,
+    markdown_cache,
+    normalize_link,
+    render_markdown,
+)
+from app.utils.scoreboard import Scoreboard, scoreboard  # noqa: E402
+from app.utils.session_storage import SessionStorage  # noqa: E402
+from memory_redis import MemoryRedis  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json"
+)
+DEFAULT_THRESHOLD = 0.25
+# --compare: extra runs of a benchmark before reporting it as a regression
+CONFIRM_RUNS = 2
+
+FEEDBACK = (
+    "**Réponse partiellement correcte.** Vous identifiez la détresse respiratoire, "
+    "mais la stratégie ventilatoire n'est pas précisée.\n\n"
+    "**Points positifs** :\n"
+    "- analgésie multimodale précoce\n"
+    "- surveillance en unité de soins continus\n\n"
+    "**À améliorer** :\n"
+    "- la ventilation non invasive n'est pas discutée\n"
+    "- les critères de gravité (âge, nombre de fractures) manquent\n\n"
+    "Niveau d'accord **GRADE 1+** : relisez la recommandation sur la *prise en charge "
+    "des 48 premières heures* du traumatisé thoracique."
+)
+VIGNETTE = (
+    "Patient de 72 ans admis aux urgences après une chute dans les escaliers. "
+    "Il présente des fractures des 4e à 7e côtes droites, une FR à 28/min et une SpO2 "
+    "à 91 % sous 6 L/min d'oxygène. La douleur est cotée à 8/10 malgré le paracétamol."
+)
+QUESTION = "Quelle est votre prise en charge ventilatoire et antalgique initiale ?"
+ANSWER = (
+    "Analgésie multimodale avec ALR (péridurale thoracique), "
+    "kinésithérapie respiratoire, "
+    "VNI précoce en l'absence de contre-indication, surveillance en soins continus."
+)
+# Selected topics of the personal quiz payload
+PERSONAL_TOPICS = 5
+# Scores already recorded today when top-N is measured
+SEED_SCORES = 2000
+
+
+class LocalScoreboard(Scoreboard):
+    """Scoreboard on a given SQLite file, with an optional Redis stand-in."""
+
+    def __init__(self, db_path, redis_client=None):
+        self.timezone = scoreboard.timezone
+        self.redis_client = redis_client
+        self.db_path = db_path
+        self._init_sqlite()
+
+
+_REFERENCE_DOC = {
+    "topic": "**Traumatisme thoracique**: prise en charge des 48 premières heures",
+    "scores": list(range(50)),
+    "feedback": FEEDBACK,
+}
+
+
+def reference_work() -> None:
+    """Fixed mix of the interpreter work the benchmarks do (json, str, dict)."""
+    for _ in range(20):
+        doc = json.loads(json.dumps(_REFERENCE_DOC))
+        words = {}
+        for word in doc["feedback"].lower().split():
+            words[word] = words.get(word, 0) + 1
+        sum(doc["scores"])
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+class Benchmark:
+    """A named callable; `setup` runs before each sample, untimed."""
+
+    def __init__(self, name, fn, setup=None, unit="call"):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.unit = unit
+
+    def _sample(self, number: int) -> float:
+        if self.setup:
+            self.setup()
+        fn = self.fn
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return (time.perf_counter() - start) / number
+
+    def calibrate(self, min_time: float) -> int:
+        """Loop count for which one sample lasts at least `min_time`."""
+        number = 1
+        while True:
+            elapsed = self._sample(number) * number
+            if elapsed >= min_time or number >= 1 << 20:
+                return number
+            # Aim a little past min_time from the rate measured so far
+            number = max(number * 2, int(number * min_time * 1.2 / max(elapsed, 1e-9)))
+
+    def run(self, number: int, repeat: int) -> dict:
+        samples, reference = [], []
+        for _ in range(repeat):
+            reference.append(min(_timed(reference_work) for _ in range(3)))
+            samples.append(self._sample(number))
+        return {
+            "number": number,
+            "best": min(samples),
+            "median": statistics.median(samples),
+            "reference": min(reference),
+            "unit": self.unit,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+
+def personal_quiz_payload(db: RecommendationsDB) -> dict:
+    """A personal quiz midway: pools of 5 topics, 3 questions, 2 evaluated."""
+    topics = db.list_topics()[:PERSONAL_TOPICS]
+    pools = {t: db.get_recommendations_by_topic(t) for t in topics}
+    questions, submissions = [], {}
+    for index, topic in enumerate(topics[:3]):
+        recommendation = pools[topic].pop(0)
+        questions.append(
+            {
+                "vignette": VIGNETTE,
+                "question": QUESTION,
+                "recommendation": recommendation,
+                "topic": recommendation["topic"],
+                "theme": recommendation["theme"],
+            }
+        )
+        evaluation = (
+            {"score": 3, "feedback": FEEDBACK, "recommendation": recommendation}
+            if index < 2
+            else None
+        )
+        submissions[str(index)] = {"answer": ANSWER, "evaluation": evaluation}
+    return {
+        "contest": "personal",
+        "topics": topics,
+        "current_question": 2,
+        "questions": questions,
+        "answers": [ANSWER, ANSWER],
+        "scores": [3, 4],
+        "total_questions": len(topics),
+        "topic_pools": pools,
+        "submissions": submissions,
+    }
+
+
+def db_benchmarks():
+    db = recommendations_db
+    topics = db.list_topics()
+    topic = topics[len(topics) // 2]
+    return [
+        Benchmark("db.load", lambda: RecommendationsDB(db.csv_path)),
+        Benchmark(
+            "db.random_recommendation", lambda: db.get_random_recommendation(topic)
+        ),
+        Benchmark(
+            "db.recommendations_by_topic",
+            lambda: db.get_recommendations_by_topic(topic),
+        ),
+        Benchmark("db.list_topics", db.list_topics),
+        Benchmark("db.topic_catalog", db.topic_catalog),
+    ]
+
+
+def session_benchmarks():
+    storage = SessionStorage.__new__(SessionStorage)
+    storage.redis_client = MemoryRedis()
+    payload = personal_quiz_payload(recommendations_db)
+    session_id = str(uuid.uuid4())
+    storage.store_quiz_data(session_id, payload)
+    size = len(json.dumps(payload, default=str))
+
+    def roundtrip():
+        data = storage.get_quiz_data(session_id)
+        storage.update_quiz_data(session_id, data)
+
+    return [
+        Benchmark(
+            "session.store_personal",
+            lambda: storage.store_quiz_data(session_id, payload),
+            unit=f"call ({size // 1024} KiB)",
+        ),
+        Benchmark("session.get_personal", lambda: storage.get_quiz_data(session_id)),
+        Benchmark("session.get_update_personal", roundtrip),
+    ]
+
+
+def scoreboard_benchmarks(tmp_dir: str):
+    redis_board = LocalScoreboard(os.path.join(tmp_dir, "unused.db"), MemoryRedis())
+    sqlite_path = os.path.join(tmp_dir, "leaderboard.db")
+    sqlite_board = LocalScoreboard(sqlite_path)
+    state = {"i": 0}
+
+    def next_team():
+        state["i"] += 1
+        return TEAM_LIST[state["i"] % len(TEAM_LIST)], state["i"] % 6
+
+    def seed_redis():
+        redis_board.redis_client.flushall()
+        for i in range(SEED_SCORES):
+            redis_board.add_score(TEAM_LIST[i % len(TEAM_LIST)], i % 6)
+
+    def seed_sqlite():
+        # Same table size for every sample: the add query sums the team's day
+        if os.path.exists(sqlite_path):
+            os.remove(sqlite_path)
+        sqlite_board._init_sqlite()
+        with sqlite3.connect(sqlite_path) as conn:
+            now = datetime.now(scoreboard.timezone).isoformat()
+            conn.executemany(
+                "INSERT INTO team_scores (team_name, score, timestamp) "
+                "VALUES (?, ?, ?)",
+                [
+                    (TEAM_LIST[i % len(TEAM_LIST)], i % 6, now)
+                    for i in range(SEED_SCORES)
+                ],
+            )
+
+    return [
+        Benchmark(
+            "scoreboard.redis.add_score",
+            lambda: redis_board.add_score(*next_team()),
+            setup=seed_redis,
+        ),
+        Benchmark(
+            "scoreboard.redis.top_teams",
+            lambda: redis_board.get_top_teams(limit=None),
+            setup=seed_redis,
+        ),
+        Benchmark(
+            "scoreboard.sqlite.add_score",
+            lambda: sqlite_board.add_score(*next_team()),
+            setup=seed_sqlite,
+        ),
+        Benchmark(
+            "scoreboard.sqlite.top_teams",
+            lambda: sqlite_board.get_top_teams(limit=None),
+            setup=seed_sqlite,
+        ),
+    ]
+
+
+def template_benchmarks(app):
+    recommendation = recommendations_db.get_random_recommendation() or {}
+    question = {
+        "vignette": VIGNETTE,
+        "question": QUESTION,
+        "recommendation": recommendation,
+        "topic": recommendation.get("topic"),
+        "theme": recommendation.get("theme"),
+    }
+    evaluation = {"score": 3, "feedback": FEEDBACK, "recommendation": recommendation}
+
+    def render_quiz():
+        with app.test_request_context("/personnel/quiz"):
+            render_template(
+                "quiz.html",
+                question=question,
+                question_number=2,
+                total_questions=5,
+                contest_type="personal",
+                topic=question["topic"],
+            )
+
+    def render_result():
+        with app.test_request_context("/personnel/result"):
+            render_template(
+                "result.html",
+                evaluation=evaluation,
+                question_data=question,
+                question_number=2,
+                total_questions=5,
+                contest_type="personal",
+            )
+
+    def render_result_cold():
+        markdown_cache.clear()
+        render_result()
+
+    return [
+        Benchmark("template.quiz", render_quiz),
+        Benchmark("template.result", render_result),
+        Benchmark("template.result_cold_markdown", render_result_cold),
+    ]
+
+
+def filter_benchmarks():
+    records = recommendations_db._records
+    topics = [r["topic"] for r in records]
+    links = [r["link"] for r in records]
+    texts = [r["recommendation"] for r in records[:50]]
+
+    def topic_parts_cold():
+        _topic_parts.cache_clear()
+        for t in topics:
+            _topic_parts(t)
+
+    def markdown_cold():
+        markdown_cache.clear()
+        for t in texts:
+            render_markdown(t)
+
+    def markdown_warm():
+        for t in texts:
+            render_markdown(t)
+
+    return [
+        Benchmark(
+            "filters.inline_bold",
+            lambda: [inline_bold(t) for t in topics],
+            unit=f"{len(topics)} topics",
+        ),
+        Benchmark(
+            "filters.topic_parts_cold", topic_parts_cold, unit=f"{len(topics)} topics"
+        ),
+        Benchmark(
+            "filters.normalize_link",
+            lambda: [normalize_link(v) for v in links],
+            unit=f"{len(links)} links",
+        ),
+        Benchmark("filters.markdown_cold", markdown_cold, unit=f"{len(texts)} texts"),
+        Benchmark("filters.markdown_warm", markdown_warm, unit=f"{len(texts)} texts"),
+    ]
+
+
+def all_benchmarks(app, tmp_dir: str):
+    return (
+        db_benchmarks()
+        + session_benchmarks()
+        + scoreboard_benchmarks(tmp_dir)
+        + template_benchmarks(app)
+        + filter_benchmarks()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict) -> None:
+    data = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine(),
+        "benchmarks": results,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _us(seconds: float) -> str:
+    return f"{seconds * 1e6:11.1f}"
+
+
+def _scaled_base(result: dict, base: dict) -> float:
+    """Baseline best time scaled to this machine's speed, by the reference
+    workload, when both runs measured it."""
+    if result.get("reference") and base.get("reference"):
+        return base["best"] * result["reference"] / base["reference"]
+    return base["best"]
+
+
+def _change(result: dict, base: dict) -> float:
+    """Slowdown against the (scaled) baseline."""
+    return result["best"] / _scaled_base(result, base) - 1
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float, partial: bool = False
+) -> list:
+    """Names of the benchmarks slower than the baseline by more than `threshold`."""
+    regressions = []
+    reference = baseline.get("benchmarks", {})
+    for name, r in results.items():
+        base = reference.get(name)
+        if base is None:
+            print(f"  {name:34} {_us(r['best'])} us   (new, no baseline)")
+            continue
+        change = _change(r, base) if base["best"] > 0 else 0.0
+        status = (
+            "REGRESSION"
+            if change > threshold
+            else ("faster" if change < -threshold else "ok")
+        )
+        # The percentage compares the two printed times
+        scaled = "scaled" if r.get("reference") and base.get("reference") else "raw"
+        print(
+            f"  {name:34} {_us(r['best'])} us   "
+            f"baseline {_us(_scaled_base(r, base))} us {scaled:6}  "
+            f"{change:+7.1%}  {status}"
+        )
+        if change > threshold:
+            regressions.append(name)
+    if not partial:
+        for name in sorted(set(reference) - set(results)):
+            print(f"  {name:34} (in baseline, not run)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--only", help="Comma-separated name prefixes (e.g. db,template.quiz)"
+    )
+    parser.add_argument("--repeat", type=int, default=7, help="Samples per benchmark")
+    parser.add_argument(
+        "--min-time", type=float, default=0.1, help="Seconds per sample"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument(
+        "--save", action="store_true", help="Store the results as the baseline"
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare with the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="--compare: allowed slowdown before failing (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"No usable baseline at {args.baseline}: {e}")
+            return 2
+        if baseline.get("machine") != machine():
+            print(
+                f"Note: baseline measured on another machine: {baseline.get('machine')}"
+            )
+
+    app = create_app()
+    prefixes = [p.strip() for p in args.only.split(",")] if args.only else None
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        benchmarks = [
+            b
+            for b in all_benchmarks(app, tmp_dir)
+            if not prefixes or any(b.name.startswith(p) for p in prefixes)
+        ]
+        print(
+            f"{len(benchmarks)} benchmarks, {args.repeat} samples each "
+            "(best / median per op):"
+        )
+        for bench in benchmarks:
+            base = (baseline or {}).get("benchmarks", {}).get(bench.name)
+            # Same workload as the baseline, which matters for growing tables
+            number = base["number"] if base else bench.calibrate(args.min_time)
+            result = bench.run(number, args.repeat)
+            retries = 0
+            while (
+                base
+                and retries < CONFIRM_RUNS
+                and _change(result, base) > args.threshold
+            ):
+                # A slow sample set is often the machine: measure again
+                retries += 1
+                again = bench.run(number, args.repeat)
+                if _change(again, base) < _change(result, base):
+                    result = again
+            results[bench.name] = result
+            print(
+                f"  {bench.name:34} {_us(result['best'])} us {_us(result['median'])} us"
+                f"   x{number:<7} per {result['unit']}"
+                + (f"  (measured {retries + 1} times)" if retries else "")
+            )
+
+    if args.save:
+        if prefixes and os.path.exists(args.baseline):
+            # Partial run: update those entries only
+            merged = load_baseline(args.baseline).get("benchmarks", {})
+            merged.update(results)
+            results = merged
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+
+    if baseline is not None:
+        print(
+            f"\nAgainst baseline {baseline.get('created')} "
+            f"(threshold {args.threshold:.0%}; baseline times scaled to this "
+            "machine by the reference workload):"
+        )
+        regressions = compare(results, baseline, args.threshold, partial=bool(prefixes))
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("No regression.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted static assets into app/static/dist (see app/utils/assets.py).
+
+For every file under app/static (dist excluded):
+  - dist/<name>.<hash><ext>      content-hashed copy
+  - dist/<name>.<hash><ext>.gz   gzip copy (text formats, when smaller)
+  - dist/<name>.<hash><ext>.br   brotli copy (same, if the brotli module is installed)
+and dist/manifest.json mapping original names to hashed ones. Files of
+previous builds that are no longer referenced are removed.
+
+  python scripts/build_assets.py
+  python scripts/build_assets.py --clean   # remove dist (back to in-memory hashes)
+"""
+
+import argparse
+import gzip
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.assets import (  # noqa: E402
+    DIST_DIR,
+    MANIFEST_NAME,
+    content_hash,
+    hashed_name,
+)
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+STATIC_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "static"
+)
+# Already-compressed formats (png, jpg, woff2...) gain nothing
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".ico")
+
+
+def iter_sources(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == DIST_DIR or rel_root.startswith(DIST_DIR + os.sep):
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            rel = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+            yield rel
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build(static_folder):
+    dist = os.path.join(static_folder, DIST_DIR)
+    assets = {}
+    produced = {MANIFEST_NAME}
+    totals = {"files": 0, "bytes": 0, "gzip": 0, "br": 0}
+
+    for rel in iter_sources(static_folder):
+        with open(os.path.join(static_folder, rel), "rb") as f:
+            data = f.read()
+        file = hashed_name(rel, content_hash(data))
+        entry = {
+            "file": file,
+            "size": len(data),
+            "mimetype": mimetypes.guess_type(rel)[0] or "application/octet-stream",
+            "encodings": [],
+        }
+        write(os.path.join(dist, file), data)
+        produced.add(file)
+        totals["files"] += 1
+        totals["bytes"] += len(data)
+
+        if rel.lower().endswith(COMPRESSIBLE):
+            variants = [("gzip", ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.insert(0, ("br", ".br", brotli.compress(data, quality=11)))
+            for encoding, suffix, compressed in variants:
+                if len(compressed) < len(data):
+                    write(os.path.join(dist, file + suffix), compressed)
+                    produced.add(file + suffix)
+                    entry["encodings"].append(encoding)
+                    entry[f"{encoding}_size"] = len(compressed)
+                    totals[encoding] += len(compressed)
+        assets[rel] = entry
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"assets": assets}, f, indent=2, sort_keys=True)
+
+    # Drop files from previous builds
+    removed = 0
+    for root, _, files in os.walk(dist):
+        for name in files:
+            rel = os.path.relpath(os.path.join(root, name), dist).replace(os.sep, "/")
+            if rel not in produced:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return assets, totals, removed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--static", default=STATIC_FOLDER, help="static folder")
+    parser.add_argument("--clean", action="store_true", help="remove the dist folder")
+    args = parser.parse_args()
+
+    dist = os.path.join(args.static, DIST_DIR)
+    if args.clean:
+        shutil.rmtree(dist, ignore_errors=True)
+        print(f"Removed {dist}")
+        return 0
+
+    assets, totals, removed = build(args.static)
+    for rel, entry in sorted(assets.items()):
+        sizes = ", ".join(f"{e} {entry[f'{e}_size']}" for e in entry["encodings"])
+        print(
+            f"  {rel:40} -> {entry['file']}  "
+            f"({entry['size']} B{', ' + sizes if sizes else ''})"
+        )
+    print(
+        f"Built {totals['files']} assets ({totals['bytes']} B) into {dist}; "
+        f"gzip {totals['gzip']} B, brotli "
+        f"{totals['br'] if brotli is not None else 'skipped (pip install brotli)'}; "
+        f"{removed} stale files removed"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
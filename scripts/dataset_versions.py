@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Manage the stored versions of data/recommendations.csv (app/utils/dataset_versions.py).
+
+Usage:
+  # Versions, with the live one marked, and disk usage
+  python scripts/dataset_versions.py list
+
+  # Put a previous version back (id or id prefix); the replaced content is stored first
+  python scripts/dataset_versions.py rollback 51ccffd1
+
+  # Keep the 10 most recent versions (and the live one), or only drop old ones
+  python scripts/dataset_versions.py gc --keep 10 --max-age-days 90 --dry-run
+
+  # Move legacy recommendations.csv.*.bak copies into the store
+  python scripts/dataset_versions.py import-backups --delete
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.dataset_versions import (  # noqa: E402
+    DEFAULT_KEEP,
+    VersionStore,
+    file_sha256,
+)
+
+DEFAULT_OUTPUT = os.path.join("data", "recommendations.csv")
+BACKUP_STAMP = re.compile(r"\.(\d{8}-\d{6})\.bak$")
+
+
+def default_store(output: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(output)), "versions")
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:.2f} MB"
+
+
+def cmd_list(store: VersionStore, args) -> int:
+    live = file_sha256(args.output) if os.path.exists(args.output) else None
+    versions = store.versions()
+    for v in versions:
+        mark = "*" if v["sha256"] == live else " "
+        print(
+            f"{mark} {v['id']}  {v['created']}  {v['rows']:>5} rows  "
+            f"{_mb(v['size']):>9} -> {_mb(v['stored']):>8}  {v['source']}"
+        )
+    raw = sum(v["size"] for v in versions)
+    stored = _mb(store.stored_bytes())
+    print(
+        f"{len(versions)} versions: {_mb(raw)} of CSV stored in {stored}"
+        + (
+            ""
+            if live is None or any(v["sha256"] == live for v in versions)
+            else "; live dataset not stored"
+        )
+    )
+    return 0
+
+
+def cmd_rollback(store: VersionStore, args) -> int:
+    try:
+        entry = store.restore(args.version, args.output)
+    except (KeyError, ValueError) as e:
+        print(str(e).strip("'\""))
+        return 1
+    print(
+        f"Restored version {entry['id']} ({entry['created']}, {entry['rows']} rows) "
+        f"to {args.output}"
+    )
+    return 0
+
+
+def cmd_gc(store: VersionStore, args) -> int:
+    live = file_sha256(args.output) if os.path.exists(args.output) else None
+    result = store.gc(
+        keep=args.keep,
+        max_age_days=args.max_age_days,
+        protect=live,
+        dry_run=args.dry_run,
+    )
+    verb = "Would remove" if args.dry_run else "Removed"
+    for v in result["removed"]:
+        print(f"{verb} {v['id']}  {v['created']}  {v['source']}")
+    print(
+        f"{verb} {len(result['removed'])} versions ({_mb(result['freed'])}), "
+        f"kept {result['kept']}"
+    )
+    return 0
+
+
+def cmd_import_backups(store: VersionStore, args) -> int:
+    backups = sorted(glob.glob(f"{args.output}.*.bak"))
+    if not backups:
+        print("No backups to import.")
+        return 0
+    before = sum(os.path.getsize(p) for p in backups)
+    for path in backups:
+        stamp = BACKUP_STAMP.search(path)
+        created = (
+            datetime.strptime(stamp.group(1), "%Y%m%d-%H%M%S").isoformat()
+            if stamp
+            else datetime.fromtimestamp(os.path.getmtime(path)).isoformat(
+                timespec="seconds"
+            )
+        )
+        entry = store.save(
+            path, source=f"backup {os.path.basename(path)}", created=created
+        )
+        print(f"{os.path.basename(path)} -> {entry['id']}")
+        if args.delete:
+            os.remove(path)
+    after = store.stored_bytes()
+    print(
+        f"{len(backups)} backups ({_mb(before)}) -> "
+        f"{len(store.versions())} stored versions "
+        f"({_mb(after)}), {100 * (1 - after / before):.0f}% less disk"
+    )
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    ap.add_argument("--output", default=DEFAULT_OUTPUT, help="Dataset CSV path")
+    ap.add_argument(
+        "--store", help="Version store directory (default: versions/ next to the CSV)"
+    )
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("version", help="Version id (or prefix)")
+    gc = sub.add_parser("gc")
+    gc.add_argument(
+        "--keep", type=int, default=DEFAULT_KEEP, help="Most recent versions kept"
+    )
+    gc.add_argument(
+        "--max-age-days", type=float, help="Only remove versions older than this"
+    )
+    gc.add_argument("--dry-run", action="store_true")
+    backups = sub.add_parser("import-backups")
+    backups.add_argument(
+        "--delete", action="store_true", help="Delete the .bak files once stored"
+    )
+    args = ap.parse_args()
+
+    store = VersionStore(args.store or default_store(args.output))
+    commands = {
+        "list": cmd_list,
+        "rollback": cmd_rollback,
+        "gc": cmd_gc,
+        "import-backups": cmd_import_backups,
+    }
+    return commands[args.command](store, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI Responses API, with simulated latency and errors.
+
+Point the app (or any benchmark) at it with:
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-local python run.py
+
+Usage:
+  # Log-normal latency around 8s (p95 ~18s), 2% HTTP 500, 1% requests that hang
+  python scripts/fake_responses_server.py --latency lognormal --median 8 --sigma 0.5 \
+      --error-rate 0.02 --hang-rate 0.01
+
+  # Same shape 20x faster, serving recorded answers when they exist
+  python scripts/fake_responses_server.py --latency lognormal --median 8 --scale 0.05 \
+      --replay-dir data/llm_replay
+
+The response body follows the Responses API shape (output_text content and a
+usage block), answering in JSON when the request asks for a JSON schema and in
+the legacy text format otherwise.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.llm_replay import ReplayStore  # noqa: E402
+
+
+class LatencyModel:
+    """Draws simulated service times (seconds)."""
+
+    def __init__(
+        self,
+        kind: str,
+        median: float,
+        sigma: float,
+        low: float,
+        high: float,
+        scale: float,
+    ):
+        self.kind = kind
+        self.median = median
+        self.sigma = sigma
+        self.low = low
+        self.high = high
+        self.scale = scale
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                value = self.median
+            elif self.kind == "uniform":
+                value = self._rng.uniform(self.low, self.high)
+            else:
+                value = self._rng.lognormvariate(math.log(self.median), self.sigma)
+        return max(0.0, value * self.scale)
+
+
+def response_text(body: dict) -> str:
+    """Well-formed answer for the task implied by the request."""
+    fmt = (body.get("text") or {}).get("format") or {}
+    name = fmt.get("name")
+    prompt = json.dumps(body.get("input", ""), ensure_ascii=False)
+    scoring = name == "evaluation" or (
+        name is None and "RÉPONSE DE L'UTILISATEUR" in prompt
+    )
+    if scoring:
+        feedback = (
+            "Réponse partiellement correcte au regard de la recommandation "
+            "(serveur local)."
+        )
+        if name:
+            return json.dumps({"score": 3, "feedback": feedback}, ensure_ascii=False)
+        return f"SCORE: 3\nFEEDBACK: {feedback}"
+    vignette = (
+        "Patient de 62 ans admis au bloc opératoire pour une chirurgie programmée "
+        "(serveur local)."
+    )
+    question = "Quelle est votre prise en charge ?"
+    if name:
+        return json.dumps(
+            {"vignette": vignette, "question": question}, ensure_ascii=False
+        )
+    return f"VIGNETTE:\n{vignette}\n\nQUESTION:\n{question}"
+
+
+def response_payload(body: dict, text: str, usage: dict = None) -> dict:
+    input_tokens = len(json.dumps(body.get("input", ""), ensure_ascii=False)) // 4
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": body.get("model", "gpt-5"),
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": usage
+        or {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "error": 0, "hang": 0, "replayed": 0}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self, outcome: str):
+        with self.lock:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(
+                self.counts,
+                in_flight=self.in_flight,
+                peak_in_flight=self.peak_in_flight,
+            )
+
+
+class Server(ThreadingHTTPServer):
+    # Listen backlog (default 5): load tests open hundreds of connections at once
+    request_queue_size = 1024
+
+
+def make_handler(args, latency: LatencyModel, stats: Stats, replay: ReplayStore):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes: without this, delayed ACKs
+        # add ~40 ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, fmt, *a):
+            if args.verbose:
+                super().log_message(fmt, *a)
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send(200, stats.snapshot())
+            else:
+                self._send(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(
+                    400,
+                    {
+                        "error": {
+                            "message": "Invalid JSON",
+                            "type": "invalid_request_error",
+                        }
+                    },
+                )
+                return
+            if self.path.rstrip("/") != "/v1/responses":
+                self._send(404, {"error": {"message": "Not found"}})
+                return
+
+            stats.enter()
+            outcome = "ok"
+            try:
+                roll = random.random()
+                if roll < args.hang_rate:
+                    # Longer than any sane client timeout
+                    outcome = "hang"
+                    time.sleep(args.hang_seconds)
+                    self._send(
+                        504,
+                        {
+                            "error": {
+                                "message": "Simulated hang",
+                                "type": "server_error",
+                            }
+                        },
+                    )
+                    return
+                time.sleep(latency.sample())
+                if roll < args.hang_rate + args.error_rate:
+                    outcome = "error"
+                    self._send(
+                        args.error_status,
+                        {
+                            "error": {
+                                "message": "Simulated failure",
+                                "type": "server_error",
+                            }
+                        },
+                    )
+                    return
+
+                entry = replay.load(body) if replay else None
+                if entry:
+                    outcome = "replayed"
+                    self._send(
+                        200,
+                        response_payload(
+                            body, entry["output_text"], entry.get("usage")
+                        ),
+                    )
+                else:
+                    self._send(200, response_payload(body, response_text(body)))
+            except (BrokenPipeError, ConnectionResetError):
+                # Client gave up (timeout or hedge winner elsewhere)
+                pass
+            finally:
+                stats.leave(outcome)
+
+    return Handler
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Local Responses API stand-in with simulated latency."
+    )
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument(
+        "--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal"
+    )
+    ap.add_argument(
+        "--median", type=float, default=8.0, help="Fixed value or log-normal median (s)"
+    )
+    ap.add_argument("--sigma", type=float, default=0.5, help="Log-normal shape")
+    ap.add_argument(
+        "--min", dest="low", type=float, default=2.0, help="Uniform lower bound (s)"
+    )
+    ap.add_argument(
+        "--max", dest="high", type=float, default=15.0, help="Uniform upper bound (s)"
+    )
+    ap.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply every latency (e.g. 0.05)"
+    )
+    ap.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests failing"
+    )
+    ap.add_argument(
+        "--error-status", type=int, default=500, help="HTTP status of failures"
+    )
+    ap.add_argument(
+        "--hang-rate", type=float, default=0.0, help="Share of requests that hang"
+    )
+    ap.add_argument("--hang-seconds", type=float, default=300.0)
+    ap.add_argument(
+        "--replay-dir", help="Serve recorded responses from this directory when present"
+    )
+    ap.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    latency = LatencyModel(
+        args.latency, args.median, args.sigma, args.low, args.high, args.scale
+    )
+    if args.seed is not None:
+        latency._rng.seed(args.seed)
+    replay = ReplayStore(args.replay_dir, mode="replay") if args.replay_dir else None
+    stats = Stats()
+
+    server = Server((args.host, args.port), make_handler(args, latency, stats, replay))
+    server.daemon_threads = True
+    print(f"Fake Responses API on http://{args.host}:{args.port}/v1 (stats: /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Final stats: {json.dumps(stats.snapshot())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
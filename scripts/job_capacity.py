@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Concurrent-user capacity of one process for model-bound jobs, per executor.
+
+Every simulated user submits an answer at the same moment, which starts an
+evaluation job (what the submit_answer routes do). For JOBS_EXECUTOR=thread
+(JOBS_WORKERS threads) and JOBS_EXECUTOR=async, the script reports how long
+users wait for their evaluation, how many of them get it within the SLO, and
+how many model requests and threads the process holds at peak.
+
+Run it against the local stand-in, never against the real API:
+  python scripts/fake_responses_server.py --latency fixed --median 2 &
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-local \
+      python scripts/job_capacity.py --users 300 --slo 5
+
+Hedging is off by default here (LLM_HEDGE_ENABLED=false) so that both
+executors send exactly one request per user.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_HEDGE_ENABLED", "false")
+
+from app.utils.db import recommendations_db  # noqa: E402
+from app.utils.eval_cache import evaluation_cache  # noqa: E402
+from app.utils.jobs import TERMINAL, JobManager  # noqa: E402
+from app.utils.scorer import evaluate_answer, evaluate_answer_async  # noqa: E402
+from app.utils.telemetry import percentile  # noqa: E402
+
+ANSWER = "Stabilisation hémodynamique puis traitement étiologique en urgence"
+
+
+def server_in_flight(base_url):
+    """In-flight requests reported by fake_responses_server (None if unavailable)."""
+    try:
+        url = base_url.rstrip("/").rsplit("/v1", 1)[0] + "/stats"
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.load(response).get("in_flight")
+    except Exception:
+        return None
+
+
+def run(executor, users, workers, slo, question_data, base_url):
+    manager = JobManager(workers=workers, executor=executor)
+    evaluation_cache.clear()
+    peaks = {"threads": threading.active_count(), "in_flight": 0}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peaks["threads"] = max(peaks["threads"], threading.active_count())
+            in_flight = server_in_flight(base_url) if base_url else None
+            if in_flight is not None:
+                peaks["in_flight"] = max(peaks["in_flight"], in_flight)
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    started = time.time()
+    job_ids = []
+    for i in range(users):
+        # A distinct answer per user, so the evaluation cache never answers
+        answer = f"{ANSWER} utilisateur{i}"
+        job_ids.append(
+            manager.submit(
+                "capacity",
+                lambda ctx, a=answer: evaluate_answer(a, question_data),
+                async_fn=lambda ctx, a=answer: evaluate_answer_async(a, question_data),
+            )
+        )
+
+    waits = {}
+    outcomes = {}
+    while len(waits) < users:
+        for job_id in job_ids:
+            if job_id in waits:
+                continue
+            job = manager.get(job_id)
+            if job and job["status"] in TERMINAL:
+                waits[job_id] = job.get("finished", time.time()) - started
+                result = job.get("result") or {}
+                outcome = (
+                    job["status"]
+                    if job["status"] == "failed"
+                    else ("degraded" if result.get("degraded") else "ok")
+                )
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        time.sleep(0.05)
+    done.set()
+    sampler.join()
+
+    values = list(waits.values())
+    return {
+        "executor": executor,
+        "users": users,
+        "wall_s": round(max(values), 2),
+        "wait_p50_s": round(percentile(values, 50), 2),
+        "wait_p95_s": round(percentile(values, 95), 2),
+        f"within_{slo:g}s": sum(1 for v in values if v <= slo),
+        "peak_in_flight": peaks["in_flight"] if base_url else None,
+        "peak_threads": peaks["threads"],
+        "outcomes": outcomes,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("JOBS_WORKERS", "8")),
+        help="JOBS_WORKERS",
+    )
+    parser.add_argument("--slo", type=float, default=5.0, help="acceptable wait (s)")
+    parser.add_argument(
+        "--executors",
+        default="thread,async",
+        help="comma-separated executors to compare",
+    )
+    args = parser.parse_args()
+
+    base_url = os.getenv("OPENAI_BASE_URL")
+    if not base_url:
+        print(
+            "OPENAI_BASE_URL is not set: start scripts/fake_responses_server.py first."
+        )
+        return 1
+
+    topic = recommendations_db.list_topics()[0]
+    question_data = {
+        "recommendation": recommendations_db.get_recommendations_by_topic(topic)[0],
+        "vignette": "Vignette de test.",
+        "question": "Question de test ?",
+    }
+
+    reports = [
+        run(executor, args.users, args.workers, args.slo, question_data, base_url)
+        for executor in args.executors.split(",")
+    ]
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
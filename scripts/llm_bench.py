@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Concurrent LLM benchmark through the app's own client (budgets, retries, hedging).
+
+Run it against the local stand-in or recorded responses, never against real
+traffic by accident:
+  python scripts/fake_responses_server.py --median 8 --scale 0.1 --error-rate 0.05 &
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-local \
+      python scripts/llm_bench.py --task scoring --requests 200 --concurrency 20
+
+  # Offline replay of a recorded session, with the recorded latencies
+  LLM_REPLAY_MODE=replay LLM_REPLAY_LATENCY=recorded python scripts/llm_bench.py
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.db import recommendations_db  # noqa: E402
+from app.utils.openai_client import get_openai_client  # noqa: E402
+from app.utils.telemetry import llm_metrics, percentile  # noqa: E402
+
+ANSWERS = [
+    "Prise en charge selon la recommandation, avec surveillance et traitement adapté.",
+    "Je ne sais pas.",
+    "Stabilisation hémodynamique puis traitement étiologique en urgence.",
+]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Concurrent LLM benchmark.")
+    ap.add_argument("--task", choices=["vignette", "scoring"], default="scoring")
+    ap.add_argument("--requests", type=int, default=50)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--budget", type=float, default=None, help="Per-call budget (s)")
+    ap.add_argument(
+        "--seed", type=int, default=42, help="Fixes which recommendations are used"
+    )
+    args = ap.parse_args()
+
+    client = get_openai_client()
+    base_url = os.getenv("OPENAI_BASE_URL", "default")
+    print(f"Client: {type(client).__name__} (base URL: {base_url})")
+
+    rng = random.Random(args.seed)
+    recs = []
+    for topic in recommendations_db.list_topics():
+        recs.extend(recommendations_db.get_recommendations_by_topic(topic))
+    work = [(rng.choice(recs), rng.choice(ANSWERS)) for _ in range(args.requests)]
+
+    def one(item):
+        rec, answer = item
+        started = time.monotonic()
+        try:
+            if args.task == "vignette":
+                result = client.generate_vignette_and_question(rec, budget=args.budget)
+                outcome = "ok" if result else "failed"
+            else:
+                result = client.evaluate_answer(
+                    answer,
+                    rec,
+                    "Vignette de test.",
+                    "Question de test ?",
+                    budget=args.budget,
+                )
+                outcome = (
+                    "degraded"
+                    if result.get("degraded")
+                    else ("error" if result.get("error") else "ok")
+                )
+        except Exception as e:
+            print(f"Request failed: {e}")
+            outcome = "exception"
+        return outcome, time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, work))
+    wall = time.monotonic() - started
+
+    latencies = [s for _, s in results]
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    report = {
+        "task": args.task,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(args.requests / wall, 2) if wall else None,
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "max_s": round(max(latencies), 3),
+        "outcomes": outcomes,
+        "metrics": llm_metrics.snapshot().get(args.task),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the national contest, in process.
+
+Each simulated player uses its own Flask test client (cookies, CSRF tokens,
+idempotency tokens taken from the rendered pages) and goes through the flow
+the browser follows:
+
+  GET  /national/                 team selection form
+  POST /national/select_team
+  GET  /national/quiz_loading     then POST quiz_prepare and poll /jobs/<id>
+  GET  /national/quiz
+  POST /national/submit_answer
+  GET  /national/result           loading page: POST evaluate and poll /jobs/<id>
+  GET  /national/result           evaluation
+  GET  /national/results          score added to the leaderboard
+
+Players are spread over all the teams of TEAM_LIST. Redis is an in-process
+stand-in (scripts/memory_redis.py) and the model is the local Responses API
+stand-in (scripts/fake_responses_server.py) served on a loopback port, with
+configurable latency and errors: nothing external is needed, and the app's
+own LLM client (budgets, retries, hedging) and job workers are exercised.
+
+Usage:
+  # 260 players (10 per team), 26 at a time, model answering in ~2s
+  python scripts/load_test.py --players 260 --concurrency 26 --llm-median 2
+
+  # Peak: 100 players at once, slower model with 2% errors, JSON report
+  JOBS_WORKERS=32 python scripts/load_test.py --players 520 --concurrency 100 \\
+      --llm-median 6 --llm-error-rate 0.02 --report load.json
+
+Reports players per minute, requests per second, p50/p95/p99 latency and
+error rate per route. Exits 1 when a player could not finish.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Local services only: no Redis URL, the model behind a loopback stand-in
+for _name in (
+    "KV_REST_API_URL",
+    "UPSTASH_REDIS_REST_URL",
+    "UPSTASH_REDIS_URL",
+    "REDIS_URL",
+    "LLM_REPLAY_MODE",
+):
+    os.environ.pop(_name, None)
+os.environ.setdefault("LOG_LEVEL", "warning")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_responses_server import (  # noqa: E402
+    LatencyModel,
+    Server,
+    Stats,
+    make_handler,
+)
+from memory_redis import MemoryRedis  # noqa: E402
+
+from app.utils.telemetry import percentile  # noqa: E402
+
+ANSWERS = [
+    "Stabilisation hémodynamique, remplissage vasculaire et transfusion précoce.",
+    "Intubation orotrachéale après préoxygénation, puis ventilation protectrice.",
+    "Analgésie multimodale, kinésithérapie respiratoire et VNI précoce.",
+    "Antibiothérapie probabiliste dans l'heure et contrôle de la source.",
+    "Je ne sais pas.",
+]
+
+_CSRF_FIELD_RE = re.compile(r'name="csrf_token" value="([^"]+)"')
+_CSRF_DATA_RE = re.compile(r'data-csrf-token="([^"]+)"')
+_IDEM_RE = re.compile(r'name="_idem" value="([^"]+)"')
+
+# Job polling of the loading page (quiz_loading.js): 0.5s, x1.3, up to 2s
+POLL_MIN_S = 0.5
+POLL_MAX_S = 2.0
+
+
+class FlowError(Exception):
+    """A step of the flow did not get the expected response."""
+
+
+class Recorder:
+    """Latencies and outcomes per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            routes = {}
+            for route, values in self.latencies.items():
+                routes[route] = {
+                    "requests": len(values),
+                    "errors": self.errors[route],
+                    "error_rate": self.errors[route] / len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "max_ms": max(values) * 1000,
+                }
+            return routes
+
+
+class Player:
+    """One browser going through the national flow."""
+
+    def __init__(
+        self, app, recorder: Recorder, team: str, answer: str, poll_min: float
+    ):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.team = team
+        self.answer = answer
+        self.poll_min = poll_min
+
+    def _request(self, route: str, method: str, url: str, expect, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.client.open(url, method=method, **kwargs)
+        except Exception as e:
+            self.recorder.record(route, time.perf_counter() - started, False)
+            raise FlowError(f"{route}: {type(e).__name__}: {e}")
+        ok = response.status_code in expect
+        self.recorder.record(route, time.perf_counter() - started, ok)
+        if not ok:
+            raise FlowError(f"{route}: HTTP {response.status_code}")
+        return response
+
+    @staticmethod
+    def _find(pattern, response, what: str) -> str:
+        match = pattern.search(response.get_data(as_text=True))
+        if not match:
+            raise FlowError(f"no {what} in {response.request.path}")
+        return match.group(1)
+
+    def _run_job(self, route: str, prepare_url: str, csrf: str) -> None:
+        """POST the prepare URL, then poll the job like the loading page does."""
+        response = self._request(
+            route,
+            "POST",
+            prepare_url,
+            (200, 202),
+            headers={"X-CSRFToken": csrf, "Accept": "application/json"},
+        )
+        data = response.get_json() or {}
+        if data.get("status") == "ready":
+            return
+        delay = self.poll_min
+        while True:
+            time.sleep(delay)
+            job = self._request(
+                "job_status", "GET", data["status_url"], (200,)
+            ).get_json()
+            if job.get("finished"):
+                if job.get("status") == "done":
+                    return
+                raise FlowError(f"{route} job {job.get('status')}: {job.get('error')}")
+            delay = min(delay * 1.3, POLL_MAX_S)
+
+    def run(self) -> None:
+        page = self._request("index", "GET", "/national/", (200,))
+        csrf = self._find(_CSRF_FIELD_RE, page, "CSRF token")
+        self._request(
+            "select_team",
+            "POST",
+            "/national/select_team",
+            (302,),
+            data={"team": self.team, "csrf_token": csrf},
+        )
+
+        page = self._request("quiz_loading", "GET", "/national/quiz_loading", (200,))
+        self._run_job(
+            "quiz_prepare",
+            "/national/quiz_prepare",
+            self._find(_CSRF_DATA_RE, page, "CSRF token"),
+        )
+
+        page = self._request("quiz", "GET", "/national/quiz", (200,))
+        self._request(
+            "submit_answer",
+            "POST",
+            "/national/submit_answer",
+            (302,),
+            data={
+                "answer": self.answer,
+                "csrf_token": self._find(_CSRF_FIELD_RE, page, "CSRF token"),
+                "_idem": self._find(_IDEM_RE, page, "idempotency token"),
+            },
+        )
+
+        page = self._request("result", "GET", "/national/result", (200,))
+        if b"job-loading" in page.data:
+            self._run_job(
+                "evaluate",
+                "/national/evaluate",
+                self._find(_CSRF_DATA_RE, page, "CSRF token"),
+            )
+            page = self._request("result", "GET", "/national/result", (200,))
+        if b"job-loading" in page.data:
+            raise FlowError("result: evaluation still pending after its job finished")
+
+        self._request("results", "GET", "/national/results", (200,))
+
+
+def start_llm_stub(args):
+    """Serve the Responses API stand-in on a free loopback port.
+
+    Returns (server, stats).
+    """
+    latency = LatencyModel(
+        args.llm_latency,
+        args.llm_median,
+        args.llm_sigma,
+        args.llm_median / 2,
+        args.llm_median * 2,
+        1.0,
+    )
+    latency._rng.seed(args.seed)
+    stats = Stats()
+    handler_args = argparse.Namespace(
+        hang_rate=0.0,
+        hang_seconds=0.0,
+        error_rate=args.llm_error_rate,
+        error_status=500,
+        verbose=False,
+    )
+    server = Server(("127.0.0.1", 0), make_handler(handler_args, latency, stats, None))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    ap.add_argument(
+        "--players",
+        type=int,
+        default=260,
+        help="Players in total (spread over all teams)",
+    )
+    ap.add_argument(
+        "--concurrency", type=int, default=26, help="Players in the flow at once"
+    )
+    ap.add_argument(
+        "--llm-latency", choices=["fixed", "uniform", "lognormal"], default="lognormal"
+    )
+    ap.add_argument(
+        "--llm-median", type=float, default=2.0, help="Model latency median (s)"
+    )
+    ap.add_argument("--llm-sigma", type=float, default=0.5, help="Log-normal shape")
+    ap.add_argument(
+        "--llm-error-rate", type=float, default=0.0, help="Share of model calls failing"
+    )
+    ap.add_argument(
+        "--poll", type=float, default=POLL_MIN_S, help="First job poll delay (s)"
+    )
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--report", help="Write the results (JSON) to this path")
+    args = ap.parse_args()
+
+    server, llm_stats = start_llm_stub(args)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-local"
+
+    # Imported once the environment points at local services
+    from app import create_app
+    from app.utils.constants import TEAM_LIST
+    from app.utils.jobs import job_manager
+    from app.utils.scoreboard import scoreboard
+    from app.utils.session_storage import session_storage
+
+    redis = MemoryRedis()
+    session_storage.redis_client = redis
+    scoreboard.redis_client = redis
+    app = create_app()
+
+    rng = random.Random(args.seed)
+    players = [
+        (TEAM_LIST[i % len(TEAM_LIST)], f"{rng.choice(ANSWERS)} (joueur {i})")
+        for i in range(args.players)
+    ]
+    recorder = Recorder()
+    failures = defaultdict(int)
+    durations = []
+    lock = threading.Lock()
+
+    def play(item):
+        team, answer = item
+        started = time.perf_counter()
+        try:
+            Player(app, recorder, team, answer, args.poll).run()
+        except FlowError as e:
+            with lock:
+                failures[str(e).split(":")[0]] += 1
+            return False
+        with lock:
+            durations.append(time.perf_counter() - started)
+        return True
+
+    print(
+        f"{args.players} players over {len(TEAM_LIST)} teams, "
+        f"{args.concurrency} at a time; model {args.llm_latency} "
+        f"~{args.llm_median}s, {args.llm_error_rate:.0%} errors; "
+        f"jobs: {job_manager.executor} executor"
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        completed = sum(pool.map(play, players))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    routes = recorder.summary()
+    total_requests = sum(r["requests"] for r in routes.values())
+    total_errors = sum(r["errors"] for r in routes.values())
+    top = scoreboard.get_top_teams(limit=None)
+    result = {
+        "players": args.players,
+        "completed": completed,
+        "failed": args.players - completed,
+        "failures": dict(failures),
+        "elapsed_s": round(elapsed, 2),
+        "players_per_minute": round(completed / elapsed * 60, 1),
+        "requests_per_second": round(total_requests / elapsed, 1),
+        "flow_p50_s": percentile(durations, 50),
+        "flow_p95_s": percentile(durations, 95),
+        "teams_scored": len(top),
+        "llm": llm_stats.snapshot(),
+        "routes": routes,
+    }
+
+    print(
+        f"\n{completed}/{args.players} players finished in {elapsed:.1f}s: "
+        f"{result['players_per_minute']} players/min, "
+        f"{result['requests_per_second']} requests/s"
+    )
+    if durations:
+        print(
+            f"Whole flow: p50 {result['flow_p50_s']:.2f}s, "
+            f"p95 {result['flow_p95_s']:.2f}s"
+        )
+    columns = ("requests", "errors", "p50 ms", "p95 ms", "p99 ms", "max ms")
+    print(f"\n  {'route':14} " + " ".join(f"{c:>9}" for c in columns))
+    order = [
+        "index",
+        "select_team",
+        "quiz_loading",
+        "quiz_prepare",
+        "quiz",
+        "submit_answer",
+        "result",
+        "evaluate",
+        "job_status",
+        "results",
+    ]
+    for route in sorted(
+        routes, key=lambda r: order.index(r) if r in order else len(order)
+    ):
+        r = routes[route]
+        print(
+            f"  {route:14} {r['requests']:>9} {r['error_rate']:>9.1%} "
+            f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+            f"{r['max_ms']:>9.1f}"
+        )
+    print(f"\n  all routes: {total_requests} requests, {total_errors} errors")
+    print(
+        f"Teams on the leaderboard: {len(top)}/{len(TEAM_LIST)}; "
+        f"model calls: {result['llm']}"
+    )
+    for step, count in sorted(failures.items()):
+        print(f"  failed at {step}: {count} players")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.report}")
+    return 0 if completed == args.players else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Per-request logging overhead: the former print() statements vs app/utils/log.py.
+
+One simulated national request (submit, evaluation, results) goes through the
+logging its code paths do, with output sent to /dev/null so only the
+formatting and serialization work of the log calls is measured:
+  before        the print() calls of the original code, verbatim
+  info          structured logger at the default level (debug off)
+  debug         structured logger with every debug event emitted
+  debug@10%     debug sampled on 10% of requests (LOG_DEBUG_SAMPLE=0.1)
+The structured rows include binding a request id, also shown on its own.
+
+  python scripts/log_overhead.py --requests 10000
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import log as logmod  # noqa: E402
+
+SESSION_ID = "3f1c2a9e-8b7d-4c55-9e0a-1d2f3a4b5c6d"
+
+
+def sample_data():
+    """Session, question and evaluation shaped like the real ones."""
+    question = {
+        "topic": "Cardiologie",
+        "vignette": "Patient de 67 ans, hypertendu, admis pour douleur thoracique. "
+        * 12,
+        "question": "Quelle est votre prise en charge initiale ?",
+        "recommendation": "Recommandation de la société savante. " * 8,
+        "evidence": "Grade A",
+        "reference": "doi:10.1093/eurheartj/ehad191",
+    }
+    session = {
+        "contest_type": "national",
+        "team": "CHU de Bordeaux",
+        "quiz_session_id": SESSION_ID,
+        "quiz_completed": True,
+        "csrf_token": "a" * 40,
+    }
+    evaluation = {
+        "score": 14,
+        "feedback": "Bonne démarche diagnostique, traitement incomplet. " * 6,
+        "recommendation": question["recommendation"],
+    }
+    quiz_data = {
+        "question": question,
+        "user_answer": "Aspirine, ECG, troponine. " * 4,
+        "evaluation": evaluation,
+    }
+    return session, question, evaluation, quiz_data
+
+
+SERIALIZED_SIZE = len(json.dumps(sample_data()[3]))
+
+
+def request_before(session, question, evaluation, quiz_data):
+    """The print() statements on the original request path."""
+    user_answer = quiz_data["user_answer"]
+    # national.submit_answer
+    print("DEBUG: submit_answer called")
+    print(f"DEBUG: Session keys: {list(session.keys())}")
+    print(f"DEBUG: Session size estimate: {len(str(dict(session)))} bytes")
+    print(f"DEBUG: Contest type: {session.get('contest_type')}")
+    print(f"DEBUG: Team in session: {'team' in session}")
+    print(f"DEBUG: User answer: {user_answer[:50]}...")
+    print(f"DEBUG: Question data keys: {question.keys()}")
+    # scorer.evaluate_answer
+    print(f"DEBUG: Starting evaluation for answer: {user_answer[:50]}...")
+    print("DEBUG: Getting OpenAI client...")
+    print(f"DEBUG: Client type: {type(object())}")
+    print("DEBUG: Calling evaluate_answer...")
+    print(f"DEBUG: Evaluation received: {evaluation}")
+    print(f"DEBUG: Final result: {evaluation}")
+    print(f"DEBUG: Evaluation result: {evaluation}")
+    # session storage: one write, then reads on result and results pages
+    print(f"Session storage: Stored quiz data for {SESSION_ID} (TTL: 2h)")
+    print("DEBUG: Results stored in Redis, showing feedback")
+    print(f"DEBUG: Quiz completed flag: {session.get('quiz_completed')}")
+    print(
+        f"DEBUG: Evaluation stored in Redis: {quiz_data.get('evaluation') is not None}"
+    )
+    print(f"DEBUG: Session keys after update: {list(session.keys())}")
+    # national.results
+    print("DEBUG: Results route accessed")
+    print(f"DEBUG: Session keys in results: {list(session.keys())}")
+    print(f"DEBUG: Session size in results: {len(str(dict(session)))} bytes")
+    print(f"DEBUG: Quiz completed in results: {session.get('quiz_completed')}")
+    print(
+        f"DEBUG: Evaluation exists in results: {session.get('evaluation') is not None}"
+    )
+    for _ in range(2):
+        print(f"Session storage: Retrieved quiz data for {SESSION_ID}")
+    print(f"Session storage: Deleted quiz data for {SESSION_ID}")
+    print(f"DEBUG: Cleaned up Redis data for session {SESSION_ID[:8]}...")
+
+
+def request_after(session, question, evaluation, quiz_data):
+    """The same path with the structured logger calls now in the code."""
+    routes = logmod.get_logger("routes")
+    scorer = logmod.get_logger("scorer")
+    storage = logmod.get_logger("session")
+    size = SERIALIZED_SIZE
+    scorer.debug(
+        "evaluated",
+        score=evaluation["score"],
+        degraded=bool(evaluation.get("degraded")),
+        error=bool(evaluation.get("error")),
+    )
+    storage.debug("quiz_data_stored", session_id=SESSION_ID, ttl_hours=2, size=size)
+    routes.debug(
+        "results_accessed",
+        session_keys=lambda: list(session.keys()),
+        session_size=lambda: len(str(dict(session))),
+        quiz_completed=lambda: session.get("quiz_completed"),
+    )
+    for _ in range(2):
+        storage.debug("quiz_data_read", session_id=SESSION_ID, size=size)
+    storage.debug("quiz_data_deleted", session_id=SESSION_ID)
+    routes.debug("quiz_data_cleaned", session_id=SESSION_ID[:8])
+
+
+def timed(fn, data, n, per_request=None, repeat=5):
+    """Best of `repeat` runs, in µs per request."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(n):
+            if per_request:
+                per_request()
+            fn(*data)
+        elapsed = (time.perf_counter() - start) / n * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+
+    data = sample_data()
+    n = args.requests
+    results = []
+    with open(os.devnull, "w") as devnull:
+        for handler in logging.getLogger("quiz").handlers:
+            handler.setStream(devnull)
+        noop = lambda *a: None  # noqa: E731
+        results.append(
+            ("request id only", timed(noop, data, n, per_request=logmod.start_request))
+        )
+        with contextlib.redirect_stdout(devnull):
+            results.append(("before (print)", timed(request_before, data, n)))
+
+        for label, env in (
+            ("info (debug off)", {"LOG_LEVEL": "info", "LOG_DEBUG_SAMPLE": "1"}),
+            ("debug", {"LOG_LEVEL": "debug", "LOG_DEBUG_SAMPLE": "1"}),
+            ("debug@10%", {"LOG_LEVEL": "debug", "LOG_DEBUG_SAMPLE": "0.1"}),
+        ):
+            logmod.configure(**env)
+            results.append(
+                (label, timed(request_after, data, n, per_request=logmod.start_request))
+            )
+        logmod.end_request()
+        logmod.configure()
+
+    print(f"{n} simulated requests, logging overhead per request (best of 5):")
+    for label, us in results:
+        print(f"  {label:18} {us:8.2f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+In-process stand-in for the Redis commands the app uses, for benchmarks and
+load runs without a server.
+
+Values come back as bytes, as with redis-py (no decode_responses), so the
+app's decoding paths run as in production. Expirations are honoured on read.
+Publishing is accepted and delivered to no one.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+def _bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class MemoryRedis:
+    """Thread-safe dict with the get/set/hash/expire subset of Redis."""
+
+    def __init__(self):
+        self._data: Dict[bytes, object] = {}
+        self._expires: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: bytes) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, key) -> Optional[bytes]:
+        key = _bytes(key)
+        with self._lock:
+            return self._data.get(key) if self._live(key) else None
+
+    def set(
+        self, key, value, ex: Optional[int] = None, nx: bool = False
+    ) -> Optional[bool]:
+        key = _bytes(key)
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = _bytes(value)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def setex(self, key, seconds: int, value) -> bool:
+        return bool(self.set(key, value, ex=seconds))
+
+    def delete(self, *keys) -> int:
+        removed = 0
+        with self._lock:
+            for key in map(_bytes, keys):
+                if self._live(key):
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    removed += 1
+        return removed
+
+    def exists(self, *keys) -> int:
+        with self._lock:
+            return sum(1 for key in map(_bytes, keys) if self._live(key))
+
+    def expire(self, key, seconds: int) -> bool:
+        key = _bytes(key)
+        with self._lock:
+            if not self._live(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def hincrby(self, key, field, amount: int = 1) -> int:
+        key, field = _bytes(key), _bytes(field)
+        with self._lock:
+            if not self._live(key):
+                self._data[key] = {}
+            table = self._data[key]
+            value = int(table.get(field, b"0")) + int(amount)
+            table[field] = str(value).encode("ascii")
+            return value
+
+    def hgetall(self, key) -> Dict[bytes, bytes]:
+        key = _bytes(key)
+        with self._lock:
+            return dict(self._data[key]) if self._live(key) else {}
+
+    def publish(self, channel, message) -> int:
+        return 0
+
+    def flushall(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+        return True
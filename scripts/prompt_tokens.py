@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Report input tokens per prompt across the whole recommendations dataset.
+
+Compares the current prompt layout (static instructions + role-separated
+variable message) with the legacy layout (fields interpolated several times
+into the instructions, messages flattened into one string), and the saving
+of the compact field text (app/utils/prompt_text.py) over the raw CSV text,
+in characters and tokens.
+
+Usage:
+  python scripts/prompt_tokens.py [--csv data/recommendations.csv]
+
+Token counts use tiktoken (o200k_base) when installed, otherwise an
+approximation: text split like the tokenizer pre-splits it (a space joins
+the next word, line breaks stand alone), one token per 4 characters of each
+piece.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.openai_client import scoring_messages, vignette_messages  # noqa: E402
+from app.utils.prompt_text import prompt_text  # noqa: E402
+
+# Representative generated content, identical for both layouts
+SAMPLE_VIGNETTE = (
+    "Patient de 62 ans admis en réanimation après un traumatisme thoracique fermé. "
+    "Il présente une détresse respiratoire avec SpO2 à 88 % sous oxygène. "
+    "La radiographie montre des fractures costales multiples et une contusion "
+    "pulmonaire."
+)
+SAMPLE_QUESTION = (
+    "Quelle est votre stratégie de prise en charge ventilatoire initiale ?"
+)
+SAMPLE_ANSWER = (
+    "Analgésie multimodale précoce, ventilation non invasive si pas de "
+    "contre-indication, surveillance rapprochée en unité de soins continus."
+)
+
+
+_PIECE_RE = re.compile(r" ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, sum((len(p) + 3) // 4 for p in _PIECE_RE.findall(text)))
+
+
+def _count_tokens_factory():
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(enc.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        return _approx_tokens, "approximation (word pieces / 4 chars)"
+
+
+count_tokens, TOKENIZER = _count_tokens_factory()
+
+
+# ---------------------------------------------------------------------------
+# Legacy layout (kept here only for the before/after comparison)
+# ---------------------------------------------------------------------------
+
+
+def _legacy_vignette_prompt(recommendation: dict) -> str:
+    """Prompt for generating a vignette and question from a recommendation."""
+    theme = recommendation.get("theme", "Non spécifié")
+    topic = recommendation.get("topic", "Non spécifié")
+    text = recommendation.get("recommendation", "")
+    return "\n".join(
+        [
+            "",
+            "",
+            "ROLE",
+            "Tu es un générateur de vignettes cliniques pour médecins "
+            "anesthésistes-réanimateurs. ",
+            "Chaque vignette est un quiz évaluant l’adhésion à UNE recommandation "
+            "précise.",
+            "",
+            "RECOMMANDATION À UTILISER:",
+            f"Thème: {theme}",
+            f"Sujet: {topic}",
+            f"Recommandation: {text}",
+            "   ",
+            "",
+            "OBJECTIF",
+            "1. Rédiger un cas clinique (3 à 5 phrases) réaliste, pertinent, centré "
+            "sur la recommandation.",
+            "2. Poser UNE seule question claire, directement liée au cas.",
+            "3. La réponse idéale DOIT correspondre exactement (ou strictement "
+            "équivalente) à la recommandation fournie.",
+            "",
+            "CONTEXTE OBLIGATOIRE",
+            "- Spécialité : anesthésie-réanimation.",
+            "- La situation clinique doit rendre l’application de la recommandation "
+            "évidente et centrale.",
+            "- Style sobre, médical. Aucune écriture inclusive.",
+            "",
+            "CONTRAINTES DE RÉDACTION",
+            "- 3 à 5 phrases maximum pour la vignette.",
+            "- Pas d’indice évident ni formulation révélant explicitement la "
+            "recommandation.",
+            "- Une seule question, fermée (attend une action/conduite précise).",
+            "- Ne pas inclure la réponse dans la vignette ou la question.",
+            "- Ne pas faire de piège.",
+            "- Pas de QCM ou de liste de choix.",
+            "- Markdown lisible et hiérarchisé.",
+            "",
+            "VÉRIFICATIONS AVANT DE RENDRE",
+            "- Contexte hospitalier bien présent.",
+            "- Une seule question, une seule réponse idéale.",
+            "- Aucune écriture inclusive.",
+            "   ",
+            "FORMAT DE RÉPONSE:",
+            "VIGNETTE:",
+            "[Cas clinique ici]",
+            "",
+            "QUESTION:",
+            "[Question ici]",
+        ]
+    )
+
+
+def _legacy_scoring_prompt(recommendation: dict) -> str:
+    """Prompt for scoring user answers."""
+    topic = recommendation.get("topic", "Non spécifié")
+    text = recommendation.get("recommendation", "")
+    grade_label = recommendation.get("grade", "Non spécifié")
+    grade = recommendation.get("grade", "")
+    evidence = recommendation.get("evidence", "")
+    return "\n".join(
+        [
+            "",
+            "",
+            "Ta mission : noter la réponse d'un utilisateur sur une échelle ENTIER "
+            "0–5, en la comparant à la recommandation de référence.",
+            "",
+            "RECOMMANDATION DE RÉFÉRENCE:",
+            f"- Recommandation (gold standard) : {text}",
+            f"- Sujet: {topic}",
+            f"- Grade : {grade_label}",
+            f"- Preuves (evidence) : {evidence}",
+            "",
+            "INSTRUCTIONS:",
+            "1. Compare la réponse de l'utilisateur avec la recommandation de "
+            f"référence ({text}).",
+            "2. Vérifie la pertinence de la réponse de l'utilisateur par rapport au "
+            "cas clinique.",
+            "3. N'attends pas de la réponse de l'utilisateur des éléments non "
+            f"présents dans la recommandation de référence ({text}) ou les preuves "
+            f"({evidence}), pour générer le score de l'utilisateur.",
+            "3. Attribue un score ENTIER de 0 à 5 selon les critères de notations "
+            "ci-après.",
+            "3. Fournis un feedback détaillé et pédagogique selon le format du "
+            "feedback détaillé ci-après.",
+            "",
+            "CRITÈRES DE NOTATION (0–5, entier):",
+            "- 5: Réponse excellente, complète et parfaitement adaptée à la "
+            "situation clinique. Démontre une maîtrise claire de la recommandation "
+            "et de son application pratique.",
+            "- 4: Réponse très bonne, complète avec des nuances mineures manquantes. "
+            "Montre une excellente compréhension mais pourrait être légèrement plus "
+            "précise.",
+            "- 3: Réponse correcte mais incomplète ou avec des nuances manquantes. "
+            "Montre une compréhension générale mais pourrait être plus précise ou "
+            "complète.",
+            "- 2: Réponse partiellement correcte, avec des erreurs significatives ou "
+            "des omissions importantes. Montre une compréhension basique mais "
+            "nécessite des améliorations.",
+            "- 1: Réponse inadéquate, incorrecte ou peu pertinente par rapport à la "
+            "situation clinique présentée. Nécessite une révision des concepts "
+            "fondamentaux.",
+            "- 0: Réponse très faible, complètement incorrecte, non pertinente ou "
+            "absente. Indique un manque fondamental de compréhension.",
+            "",
+            "FEEDBACK:",
+            "Fournis un retour structuré et argumenté (max. 150 mots):",
+            "* Indique clairement si la réponse de l'utilisateur est correcte, "
+            "partiellement correcte, ou incorrecte au regard de la recommandation de "
+            f"référence ({text}).",
+            "* Replace la réponse de l'utilisateur dans le contexte du cas clinique.",
+            f"* Mentionne explicitement le niveau d'accord GRADE selon {grade}, mais "
+            "ne l'utilise pas pour générer le score.",
+            f"* Explique les preuves selon {evidence} et leur application au cas "
+            "clinique. ",
+            "* Justifie pourquoi la recommandation s'applique (ou non) dans la "
+            "situation décrite.",
+            "* Adopte un ton professionnel, confraternel et pédagogique, en "
+            "vouvoiement. Aucune écriture inclusive.",
+            "* L'objectif est l'apprentissage et la consolidation des connaissances "
+            "basées sur la recommendation",
+            "* Utilise des retours à la ligne et un Markdown simple, clair et "
+            "hierarchisé.",
+            "",
+            "",
+            "",
+            "FORMAT DE RÉPONSE:",
+            "SCORE: [0-5]",
+            "FEEDBACK: [Feedback détaillé et pédagogique]",
+        ]
+    )
+
+
+def _legacy_flatten(messages: list) -> str:
+    return "\n".join(
+        f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages
+    )
+
+
+def _legacy_vignette_input(rec: dict) -> str:
+    return _legacy_flatten(
+        [
+            {"role": "system", "content": _legacy_vignette_prompt(rec)},
+            {
+                "role": "user",
+                "content": "Génère maintenant la vignette clinique et la question "
+                "basées sur cette recommandation.",
+            },
+        ]
+    )
+
+
+def _legacy_scoring_input(rec: dict) -> str:
+    return _legacy_flatten(
+        [
+            {"role": "system", "content": _legacy_scoring_prompt(rec)},
+            {
+                "role": "user",
+                "content": f"""
+VIGNETTE: {SAMPLE_VIGNETTE}
+QUESTION: {SAMPLE_QUESTION}
+RÉPONSE DE L'UTILISATEUR: {SAMPLE_ANSWER}
+""",
+            },
+        ]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Current layout
+# ---------------------------------------------------------------------------
+
+
+def _messages_tokens(messages: list) -> tuple:
+    """(total tokens, tokens of the static system prefix)."""
+    total = sum(count_tokens(m["content"]) for m in messages)
+    prefix = sum(count_tokens(m["content"]) for m in messages if m["role"] == "system")
+    return total, prefix
+
+
+def _summary(values: list) -> str:
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return (
+        f"total={sum(values):>9,}  mean={statistics.mean(values):7.1f}  "
+        f"p50={statistics.median(values):7.1f}  p95={p95:6}  max={values[-1]:6}"
+    )
+
+
+def load_recommendations(csv_path: str = None) -> list:
+    from app.utils.db import RecommendationsDB, recommendations_db
+
+    db = RecommendationsDB(csv_path) if csv_path else recommendations_db
+    recs = []
+    for topic in db.list_topics():
+        recs.extend(db.get_recommendations_by_topic(topic))
+    return recs
+
+
+def _messages_chars(messages: list) -> int:
+    return sum(len(m["content"]) for m in messages)
+
+
+def report(recs: list) -> dict:
+    rows = {}
+    enabled = prompt_text.enabled
+    for name, legacy_fn, current_fn in (
+        ("vignette", _legacy_vignette_input, lambda r: vignette_messages(r)),
+        (
+            "scoring",
+            _legacy_scoring_input,
+            lambda r: scoring_messages(
+                SAMPLE_ANSWER, r, SAMPLE_VIGNETTE, SAMPLE_QUESTION
+            ),
+        ),
+    ):
+        before = [count_tokens(legacy_fn(r)) for r in recs]
+        after, prefix = [], 0
+        for r in recs:
+            total, prefix = _messages_tokens(current_fn(r))
+            after.append(total)
+        # Same layout with the raw field text
+        prompt_text.enabled = False
+        try:
+            raw = [current_fn(r) for r in recs]
+        finally:
+            prompt_text.enabled = enabled
+        compact = [current_fn(r) for r in recs]
+        rows[name] = {
+            "before": before,
+            "after": after,
+            "prefix": prefix,
+            "raw_chars": sum(_messages_chars(m) for m in raw),
+            "compact_chars": sum(_messages_chars(m) for m in compact),
+            "raw_tokens": sum(_messages_tokens(m)[0] for m in raw),
+            "compact_tokens": sum(_messages_tokens(m)[0] for m in compact),
+        }
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Input tokens per prompt, before/after compaction."
+    )
+    ap.add_argument("--csv", help="Recommendations CSV (default: app dataset)")
+    args = ap.parse_args()
+
+    recs = load_recommendations(args.csv)
+    if not recs:
+        print("No recommendations loaded")
+        return 1
+
+    print(f"{len(recs)} recommendations, tokenizer: {TOKENIZER}")
+    for name, row in report(recs).items():
+        before, after = sum(row["before"]), sum(row["after"])
+        saved = 100.0 * (before - after) / before if before else 0.0
+        print(f"\n[{name}]")
+        print(f"  before  {_summary(row['before'])}")
+        print(f"  after   {_summary(row['after'])}")
+        print(f"  saved   {before - after:,} tokens ({saved:.1f}%)")
+        print(f"  static cacheable prefix: {row['prefix']} tokens per call")
+        chars = row["raw_chars"] - row["compact_chars"]
+        tokens = row["raw_tokens"] - row["compact_tokens"]
+        chars_pct = 100.0 * chars / row["raw_chars"]
+        tokens_pct = 100.0 * tokens / row["raw_tokens"]
+        print(
+            f"  compact text: {chars:,} chars ({chars_pct:.1f}%), "
+            f"{tokens:,} tokens ({tokens_pct:.1f}%) less than raw"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Render-time benchmark for the heaviest templates.
+
+  result.html           evaluation feedback through the markdown filter
+  personal/index.html   GET /personnel/ (topic catalog, one card per topic)
+
+result.html is measured cold (markdown cache cleared before each render) and
+warm (same feedback rendered again, e.g. reloads of the result page).
+
+  python scripts/template_bench.py --renders 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.utils.db import get_random_recommendation  # noqa: E402
+from app.utils.filters import markdown_cache  # noqa: E402
+from app.utils.telemetry import percentile  # noqa: E402
+
+FEEDBACK = (
+    "**Points positifs** : la démarche diagnostique est structurée "
+    "et l'ECG est demandé d'emblée.\n\n"
+    "**À améliorer** :\n"
+    "- la dose de charge d'aspirine n'est pas précisée\n"
+    "- l'anticoagulation n'est pas discutée\n"
+    "- la stratégie de reperfusion manque\n\n"
+    "Relisez la recommandation sur la *prise en charge initiale* du SCA ST+."
+)
+
+
+def measure(fn, n, before_each=None):
+    samples = []
+    for _ in range(n):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    mean = sum(samples) / len(samples)
+    print(
+        f"  {label:30} mean {mean:7.3f} ms   p50 {percentile(samples, 50):7.3f} ms"
+        f"   p95 {percentile(samples, 95):7.3f} ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--renders", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    evaluation = {
+        "score": 3,
+        "feedback": FEEDBACK,
+        "recommendation": get_random_recommendation() or {},
+    }
+
+    def render_result():
+        with app.test_request_context("/"):
+            render_template(
+                "result.html", evaluation=evaluation, contest_type="personal"
+            )
+
+    def render_index():
+        response = client.get("/personnel/")
+        assert response.status_code == 200, response.status_code
+
+    # Warm-up: template compilation and first dataset load are not measured
+    render_result()
+    render_index()
+
+    print(f"{args.renders} renders each:")
+    report(
+        "result.html (cold markdown)",
+        measure(render_result, args.renders, markdown_cache.clear),
+    )
+    report("result.html (warm)", measure(render_result, args.renders))
+    report("personal/index.html", measure(render_index, args.renders))
+    print(f"  markdown cache: {markdown_cache.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,17 +17,57 @@ Expected output columns (case-insensitive, with French aliases accepted):
   - Link (alias: Lien)
 
 Rows missing Recommendation or Evidence are dropped (to match app logic).
+Each row gets a stable Id (first column), derived from its topic and
+recommendation text (see app/utils/dataset.py).
+
+Change report against the current dataset, without writing anything:
+  python scripts/update_recommendations.py path/to/input.xlsx --diff \
+      --report changes.json
+
+A normal run prints the same summary, and leaves the output as is when the
+new CSV is identical to it. Every dataset version (the replaced one and the
+new one) is kept once, compressed, in data/versions/; see
+scripts/dataset_versions.py to list, roll back and prune them.
+
+Near-duplicate recommendations (same text but for a few words, e.g. the same
+row copied under two topics with a typo fixed in one) are listed with
+--near-duplicates, and --collapse-duplicates keeps only the first of each
+group (the highest-precedence one with --merge):
+  python scripts/update_recommendations.py a.xlsx b.xlsx --merge \
+      --near-duplicates --similarity 0.8
+
+The sheet is read in a single streaming pass: each row is normalized (bold
+runs of the Topic kept as **markers**) and written out as soon as it is read,
+so memory stays flat whatever the number of rows. The CSV is written to a
+temporary file and only replaces the output once complete.
 """
 
 import argparse
+import csv
+import filecmp
+import json
 import os
+import re
 import sys
-import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict
-
-import pandas as pd
-
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.dataset import (  # noqa: E402
+    FIELDS,
+    DatasetDiff,
+    IdAssigner,
+    content_hash,
+    jaccard,
+    near_duplicate_clusters,
+    read_csv_records,
+    recommendation_id,
+    shingles,
+)
+from app.utils.dataset_versions import VersionStore  # noqa: E402
 
 EXPECTED = [
     "Theme",
@@ -57,6 +97,14 @@ ALIASES: Dict[str, str] = {
     "lien": "Link",
 }
 
+OUTPUT_COLUMNS = ["Id"] + EXPECTED
+
+# Rows scanned for the header (the first non-empty one)
+HEADER_SCAN_ROWS = 10
+
+# "**Title** : subtitle" from rich text -> "**Title**: subtitle"
+_SPACE_BEFORE_COLON = re.compile(r"\*\*\s+:")
+
 
 def _simplify(name: str) -> str:
     import unicodedata
@@ -73,13 +121,175 @@ def choose_engine(path: str) -> str | None:
         return "xlrd"
     if ext in {".xlsx", ".xlsm"}:
         return "openpyxl"
-    return None  # let pandas decide
+    return None
+
+
+def _iter_xlsx_rows(path: str, sheet) -> Iterator[Sequence]:
+    """Row values of an .xlsx sheet; rich-text cells come as CellRichText."""
+    from openpyxl import load_workbook
+
+    # read_only streams the sheet XML instead of building every cell
+    wb = load_workbook(path, read_only=True, rich_text=True, data_only=True)
+    try:
+        if isinstance(sheet, int):
+            ws = wb.worksheets[sheet]
+        else:
+            ws = wb[sheet]
+        yield from _stream_sheet(ws)
+    finally:
+        # A read-only workbook keeps the file open until closed
+        wb.close()
+
+
+def _sheet_parser(ws):
+    """(source, cell parser) of openpyxl's private reader, or None.
 
+    Checked against openpyxl 3.1; a change in these internals returns None so
+    that the caller falls back to the public reader.
+    """
+    try:
+        from openpyxl.worksheet._reader import WorkSheetParser
+
+        wb = ws.parent
+        src = wb._archive.open(ws._worksheet_path)
+    except (ImportError, AttributeError, TypeError):
+        return None
+    try:
+        parser = WorkSheetParser(
+            src,
+            ws._shared_strings,
+            data_only=True,
+            epoch=wb.epoch,
+            date_formats=wb._date_formats,
+            timedelta_formats=wb._timedelta_formats,
+            rich_text=True,
+        )
+    except (AttributeError, TypeError):
+        src.close()
+        return None
+    return src, parser
+
+
+def _stream_sheet(ws) -> Iterator[Sequence]:
+    """Like ws.iter_rows(values_only=True), without keeping parsed rows.
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    mapping: Dict[str, str] = {}
-    for c in df.columns:
-        key = _simplify(c)
+    openpyxl's read-only reader leaves every parsed <row> element attached to
+    the document and keeps the attributes of rows with a custom height, so
+    its memory still grows with the sheet. Its cell parser is driven here by
+    an iterparse that drops each row once read.
+    """
+    opened = _sheet_parser(ws)
+    if opened is None:
+        # openpyxl internals changed: the public (growing) reader
+        yield from ws.iter_rows(values_only=True)
+        return
+    from openpyxl.worksheet._reader import DATA_TAG, ROW_TAG
+    from openpyxl.xml.functions import iterparse
+
+    src, parser = opened
+    with src:
+        sheet_data = None
+        for event, element in iterparse(src, events=("start", "end")):
+            if event == "start":
+                if element.tag == DATA_TAG:
+                    sheet_data = element
+                continue
+            if element.tag != ROW_TAG:
+                continue
+            _, cells = parser.parse_row(element)
+            parser.row_dimensions.clear()
+            if sheet_data is not None:
+                sheet_data.remove(element)
+            values = [None] * max((c["column"] for c in cells), default=0)
+            for c in cells:
+                values[c["column"] - 1] = c["value"]
+            yield values
+
+
+def _iter_xls_rows(path: str, sheet) -> Iterator[Sequence]:
+    """Row values of a legacy .xls sheet (no rich text)."""
+    import xlrd
+
+    book = xlrd.open_workbook(path, on_demand=True)
+    try:
+        if isinstance(sheet, int):
+            ws = book.sheet_by_index(sheet)
+        else:
+            ws = book.sheet_by_name(sheet)
+        for i in range(ws.nrows):
+            yield ws.row_values(i)
+    finally:
+        book.release_resources()
+
+
+def iter_rows(path: str, sheet) -> Iterator[Sequence]:
+    if choose_engine(path) == "xlrd":
+        return _iter_xls_rows(path, sheet)
+    return _iter_xlsx_rows(path, sheet)
+
+
+def _cell_text(value) -> str:
+    """Text of a cell; bold rich-text runs are wrapped in ** markers."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # xlrd reads every number as a float
+        value = int(value)
+    if not isinstance(value, list):
+        return str(value)
+
+    # openpyxl CellRichText: a list of plain strings and TextBlocks (text + font)
+    parts: List[str] = []
+    bold = ""
+    for block in value:
+        text = getattr(block, "text", block) or ""
+        font = getattr(block, "font", None)
+        if font is not None and font.b:
+            # Adjacent bold runs form a single marked segment
+            bold += text
+            continue
+        parts.append(_mark_bold(bold))
+        bold = ""
+        parts.append(text)
+    parts.append(_mark_bold(bold))
+    return "".join(parts)
+
+
+def _mark_bold(text: str) -> str:
+    core = text.strip()
+    if not core:
+        return text
+    # Whitespace stays outside the markers, or markdown would ignore them
+    start = text.index(core)
+    return f"{text[:start]}**{core}**{text[start + len(core):]}"
+
+
+def _heuristic_bold_topic(s: str) -> str:
+    """Without explicit bold markers, bold the lead segment before the first colon."""
+    if not s:
+        return s
+    if "**" in s:
+        # Topic labels are also topic keys (sessions, personal selections):
+        # keep them identical to the ones the colon heuristic produces
+        return _SPACE_BEFORE_COLON.sub("**:", s)
+    if "<strong>" in s or "<b>" in s:
+        return s
+    idx = s.find(":")
+    if idx > 0:
+        left = s[:idx].strip()
+        right = s[idx:]
+        if left:
+            return f"**{left}**{right}"
+    return s
+
+
+def column_map(header: Sequence) -> Dict[int, str]:
+    """Sheet column index -> expected column name, for recognised headers."""
+    mapping: Dict[int, str] = {}
+    for idx, name in enumerate(header):
+        if name is None:
+            continue
+        key = _simplify(_cell_text(name))
         target = ALIASES.get(key)
         if not target:
             # try direct match against EXPECTED
@@ -87,199 +297,486 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
                 if _simplify(exp) == key:
                     target = exp
                     break
-        if target:
-            mapping[c] = target
-
-    if not mapping:
-        return df  # nothing we can do
+        if target and target not in mapping.values():
+            mapping[idx] = target
+    return mapping
+
+
+def normalize_row(
+    values: Sequence, columns: Dict[int, str]
+) -> Optional[Dict[str, str]]:
+    """One output record, or None when Recommendation or Evidence is missing."""
+    record = dict.fromkeys(EXPECTED, "")
+    for idx, name in columns.items():
+        if idx < len(values):
+            text = _cell_text(values[idx])
+            if name == "Topic":
+                text = _heuristic_bold_topic(text)
+            text = text.strip()
+            record[name] = "" if text in ("nan", "None") else text
+    if not record["Recommendation"] or not record["Evidence"]:
+        return None
+    return record
 
-    df = df.rename(columns=mapping)
 
-    # Only keep expected columns (add missing as empty)
-    for col in EXPECTED:
-        if col not in df.columns:
-            df[col] = ""
+def iter_records(rows: Iterator[Sequence], counts: Dict[str, int]) -> Iterator[Dict]:
+    """Normalized records (FIELDS + id) of a sheet's rows, in one pass.
 
-    df = df[EXPECTED]
+    `counts` gets the number of data rows read and records kept.
+    """
+    columns: Dict[int, str] = {}
+    assign_id = IdAssigner()
+    counts.setdefault("read", 0)
+    counts.setdefault("written", 0)
+    for index, values in enumerate(rows):
+        if not any(v is not None and str(v).strip() for v in values):
+            continue
+        if not columns:
+            if index >= HEADER_SCAN_ROWS:
+                break
+            columns = column_map(values)
+            if not columns:
+                raise ValueError(f"no expected column in header row: {list(values)}")
+            continue
+        counts["read"] += 1
+        record = normalize_row(values, columns)
+        if record is not None:
+            item = {field: record[name] for field, name in zip(FIELDS, EXPECTED)}
+            item["id"] = assign_id(item)
+            counts["written"] += 1
+            yield item
+    if not columns:
+        raise ValueError(f"no header in the first {HEADER_SCAN_ROWS} rows")
+
+
+def write_records(
+    records: Iterable[Dict], out, diff: Optional[DatasetDiff] = None
+) -> None:
+    """Write records as the app CSV; each one is also fed to `diff` when given."""
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(OUTPUT_COLUMNS)
+    for item in records:
+        writer.writerow([item["id"], *(item[field] for field in FIELDS)])
+        if diff is not None:
+            diff.add(item)
+
+
+def convert(
+    rows: Iterator[Sequence], out, diff: Optional[DatasetDiff] = None
+) -> Dict[str, int]:
+    """Normalize rows into `out` (a text file) in one pass; returns counts."""
+    counts: Dict[str, int] = {}
+    write_records(iter_records(rows, counts), out, diff)
+    return counts
+
+
+def workbook_modified(path: str) -> str:
+    """When the workbook was last saved (its own metadata), else the file mtime."""
+    if choose_engine(path) == "openpyxl":
+        try:
+            from openpyxl import load_workbook
 
-    # Strip whitespace in string columns
-    for col in EXPECTED:
-        if pd.api.types.is_string_dtype(df[col]) or df[col].dtype == object:
-            df[col] = df[col].astype(str).str.strip()
+            wb = load_workbook(path, read_only=True)
+            try:
+                if wb.properties.modified:
+                    return wb.properties.modified.isoformat(timespec="seconds")
+            finally:
+                wb.close()
+        except Exception:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+
+
+def load_workbook_records(path: str, sheet) -> Dict:
+    """Normalized records of one workbook (a --merge worker)."""
+    started = time.perf_counter()
+    counts: Dict[str, int] = {}
+    records = list(iter_records(iter_rows(path, sheet), counts))
+    return {
+        "path": path,
+        "modified": workbook_modified(path),
+        "records": records,
+        "read": counts["read"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def load_workbooks(paths: List[str], sheet, jobs: int) -> List[Dict]:
+    """load_workbook_records for every path, in a process pool; in input order."""
+    if jobs <= 1 or len(paths) == 1:
+        return [load_workbook_records(path, sheet) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        return list(pool.map(load_workbook_records, paths, [sheet] * len(paths)))
+
+
+def merge_records(workbooks: List[Dict]) -> Dict:
+    """Deduplicate records by Id; `workbooks` go from lowest to highest precedence.
+
+    A record from a workbook with higher precedence replaces any other with
+    the same Id, or with the same recommendation text under a renamed topic.
+    Rows come out in the order of the winning workbook, then the rows only
+    found in lower-precedence ones.
+    """
+    merged: Dict[str, Dict] = {}
+    origin: Dict[str, str] = {}
+    # Recommendation text -> Id of the kept record, from other workbooks
+    by_text: Dict[str, str] = {}
+    files = []
+    conflicts = []
+    for workbook in reversed(workbooks):
+        path = workbook["path"]
+        texts = {}
+        stats = {
+            "file": os.path.basename(path),
+            "modified": workbook["modified"],
+            "read": workbook["read"],
+            "records": len(workbook["records"]),
+            "kept": 0,
+            "identical": 0,
+            "superseded": 0,
+            "seconds": workbook["seconds"],
+        }
+        for record in workbook["records"]:
+            text_key = recommendation_id("", record["recommendation"])
+            if record["id"] in merged:
+                winner_id = record["id"]
+            else:
+                winner_id = by_text.get(text_key)
+            if winner_id is None:
+                merged[record["id"]] = record
+                origin[record["id"]] = stats["file"]
+                texts[text_key] = record["id"]
+                stats["kept"] += 1
+                continue
+            winner = merged[winner_id]
+            if content_hash(winner) == content_hash(record):
+                stats["identical"] += 1
+                continue
+            stats["superseded"] += 1
+            conflicts.append(
+                {
+                    "id": record["id"],
+                    "kept_id": winner_id,
+                    "kept": origin[winner_id],
+                    "dropped": stats["file"],
+                    "fields": [f for f in FIELDS if winner[f] != record[f]],
+                }
+            )
+        # Same text twice in one workbook (under two topics) is kept as is
+        for text_key, rid in texts.items():
+            by_text.setdefault(text_key, rid)
+        files.append(stats)
+    return {
+        "records": list(merged.values()),
+        "files": files[::-1],
+        "conflicts": conflicts,
+    }
+
+
+def find_near_duplicates(records: List[Dict], threshold: float) -> List[Dict]:
+    """Groups of records with near-identical recommendation texts.
+
+    Each group keeps its first record (earliest in the output); the others
+    come with their similarity to it.
+    """
+    texts = [record["recommendation"] for record in records]
+    groups = []
+    for cluster in near_duplicate_clusters(texts, threshold):
+        kept = records[cluster[0]]
+        kept_shingles = shingles(kept["recommendation"])
+        groups.append(
+            {
+                "kept": kept,
+                "duplicates": [
+                    {
+                        "record": records[i],
+                        "similarity": round(
+                            jaccard(
+                                kept_shingles, shingles(records[i]["recommendation"])
+                            ),
+                            3,
+                        ),
+                    }
+                    for i in cluster[1:]
+                ],
+            }
+        )
+    return groups
 
-    # Drop rows missing critical fields
-    df = df.replace({"nan": "", "None": ""})
-    df = df.dropna(subset=["Recommendation", "Evidence"], how="any")
-    df = df[(df["Recommendation"].astype(str).str.len() > 0) & (df["Evidence"].astype(str).str.len() > 0)]
 
-    return df
+def collapse_duplicates(records: List[Dict], groups: List[Dict]) -> List[Dict]:
+    """`records` without the non-kept members of near-duplicate groups."""
+    dropped = {d["record"]["id"] for g in groups for d in g["duplicates"]}
+    return [record for record in records if record["id"] not in dropped]
 
 
-def _extract_topic_with_bold_xlsx(xlsx_path: str, sheet) -> list[str] | None:
-    """Best-effort extraction of Topic preserving bold via **markers from .xlsx.
+def print_near_duplicates(groups: List[Dict], threshold: float, elapsed: float) -> None:
+    count = sum(len(g["duplicates"]) for g in groups)
+    print(
+        f"{len(groups)} near-duplicate groups ({count} rows) "
+        f"at similarity >= {threshold} ({elapsed:.2f}s)"
+    )
+    for g in groups[:20]:
+        print(f"  = {_describe(g['kept'])}")
+        for d in g["duplicates"]:
+            print(f"    {d['similarity']:.2f} {_describe(d['record'])}")
+    if len(groups) > 20:
+        print(f"  ... {len(groups) - 20} more groups (see --duplicates-report)")
 
-    Uses openpyxl to read rich text runs. If rich data is unavailable, returns None.
-    """
-    try:
-        from openpyxl import load_workbook
-    except Exception:
-        return None
 
-    try:
-        wb = load_workbook(xlsx_path, read_only=False, data_only=True)
-        ws = wb[sheet] if isinstance(sheet, str) and sheet in wb.sheetnames else (
-            wb.worksheets[sheet] if isinstance(sheet, int) and 0 <= sheet < len(wb.worksheets) else wb.worksheets[0]
+def print_merge(merge: Dict, precedence: str) -> None:
+    print(
+        f"Merged {len(merge['files'])} workbooks, "
+        f"highest precedence last ({precedence}):"
+    )
+    for f in merge["files"]:
+        print(
+            f"  {f['file']:<42} {f['modified']}  {f['records']:>5} rows: "
+            f"{f['kept']:>4} kept, {f['identical']:>4} identical, "
+            f"{f['superseded']:>4} superseded  ({f['seconds']:.2f}s)"
         )
+    print(
+        f"{len(merge['records'])} distinct recommendations; "
+        f"{len(merge['conflicts'])} conflicts (same Id or text, different content)"
+    )
+    for c in merge["conflicts"][:10]:
+        print(f"  {c['id']}  {', '.join(c['fields'])}: {c['kept']} over {c['dropped']}")
+    if len(merge["conflicts"]) > 10:
+        print(f"  ... {len(merge['conflicts']) - 10} more (see --merge-report)")
 
-        # Find header row (first non-empty row containing Topic/aliases)
-        header_row = None
-        headers = []
-        for r in ws.iter_rows(min_row=1, max_row=10):
-            values = [str(c.value).strip() if c.value is not None else "" for c in r]
-            if any(values):
-                headers = values
-                header_row = r[0].row
-                break
-
-        if not headers:
-            return None
 
-        # Map columns
-        def _simp(s: str) -> str:
-            import unicodedata
-            s2 = unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii")
-            return s2.strip().lower().replace(" ", "").replace("-", "").replace("_", "")
+def _describe(record: Dict) -> str:
+    topic = record.get("topic", "").replace("**", "")
+    text = " ".join(record.get("recommendation", "").split())
+    return f"{record['id']}  {topic[:50]} | {text[:60]}"
 
-        topic_idx = None
-        for idx, name in enumerate(headers):
-            key = _simp(name)
-            if key in ("topic", "sujet"):
-                topic_idx = idx
-                break
-        if topic_idx is None:
-            return None
 
-        topics = []
+def print_changes(report: Dict, detail: bool) -> None:
+    print(
+        f"Changes vs current dataset: {len(report['added'])} added, "
+        f"{len(report['changed'])} changed, {len(report['removed'])} removed, "
+        f"{report['unchanged']} unchanged"
+    )
+    if not detail:
+        return
+    for record in report["added"]:
+        print(f"+ {_describe(record)}")
+    for change in report["changed"]:
+        print(f"~ {change['id']}  {', '.join(change['fields'])}")
+    for record in report["removed"]:
+        print(f"- {_describe(record)}")
 
-        # Helper to build text with ** for bold runs if present
-        def cell_text_with_bold(cell) -> str:
-            v = cell.value
-            try:
-                # Some builds of openpyxl expose rich text via .value.rich
-                runs = getattr(v, "rich", None)
-                if isinstance(runs, list) and runs:
-                    parts = []
-                    for run in runs:
-                        txt = getattr(run, "text", "") or ""
-                        font = getattr(run, "font", None)
-                        bold = False
-                        if font is not None:
-                            bold = bool(getattr(font, "b", False))
-                        parts.append(f"**{txt}**" if bold and txt else txt)
-                    return "".join(parts)
-            except Exception:
-                pass
-            # Fallback plain text
-            return "" if v is None else str(v)
-
-        # Iterate data rows after header
-        for r in ws.iter_rows(min_row=header_row + 1):
-            c = r[topic_idx] if topic_idx < len(r) else None
-            if c is None:
-                topics.append("")
-            else:
-                topics.append(cell_text_with_bold(c))
 
-        return topics
-    except Exception:
+def store_version(store: VersionStore, path: str, source: str) -> Optional[Dict]:
+    try:
+        return store.save(path, source=source)
+    except Exception as e:
+        print(f"Warning: storing version of {path} failed: {e}")
         return None
 
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="Convert Excel recommendations to CSV for the app.")
-    ap.add_argument("input", help="Path to .xls/.xlsx file")
+    ap.add_argument(
+        "input", nargs="+", help="Path to .xls/.xlsx file (several with --merge)"
+    )
     ap.add_argument("--sheet", help="Sheet name or index (default: first)")
     ap.add_argument("--output", default=os.path.join("data", "recommendations.csv"), help="Output CSV path")
+    ap.add_argument(
+        "--diff",
+        action="store_true",
+        help="Only report changes against --output, write nothing",
+    )
+    ap.add_argument("--report", help="Write the change report (JSON) to this path")
+    ap.add_argument(
+        "--store",
+        help="Version store directory (default: versions/ next to the output)",
+    )
+    ap.add_argument(
+        "--merge",
+        action="store_true",
+        help="Merge several workbooks into one dataset",
+    )
+    ap.add_argument(
+        "--precedence",
+        choices=["modified", "order"],
+        default="modified",
+        help="--merge: the most recently saved workbook wins (modified), "
+        "or the last given (order)",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="--merge: worker processes",
+    )
+    ap.add_argument(
+        "--merge-report", help="--merge: write per-file counts and conflicts (JSON)"
+    )
+    ap.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="List near-duplicate recommendations",
+    )
+    ap.add_argument(
+        "--collapse-duplicates",
+        action="store_true",
+        help="Keep only the first record of each near-duplicate group",
+    )
+    ap.add_argument(
+        "--similarity",
+        type=float,
+        default=0.8,
+        help="Near-duplicates: minimum word-shingle (Jaccard) similarity, 0-1",
+    )
+    ap.add_argument(
+        "--duplicates-report", help="Write the near-duplicate groups (JSON)"
+    )
     args = ap.parse_args()
 
-    if not os.path.exists(args.input):
-        print(f"Input file not found: {args.input}")
+    if not 0 < args.similarity <= 1:
+        print("--similarity must be in (0, 1].")
         return 2
+    if len(args.input) > 1 and not args.merge:
+        print("Several input files: use --merge to combine them.")
+        return 2
+    for path in args.input:
+        if not os.path.exists(path):
+            print(f"Input file not found: {path}")
+            return 2
+
+    # Allow index for sheet
+    sheet = 0
+    if args.sheet is not None:
+        try:
+            sheet = int(args.sheet)
+        except ValueError:
+            sheet = args.sheet
 
-    engine = choose_engine(args.input)
-    sheet = args.sheet
-    try:
-        # Allow index for sheet
-        sheet_name = None
-        if sheet is None:
-            sheet_name = 0
-        else:
-            try:
-                sheet_name = int(sheet)
-            except ValueError:
-                sheet_name = sheet
-
-        df = pd.read_excel(args.input, sheet_name=sheet_name, engine=engine)
-    except Exception as e:
-        print(f"Failed reading Excel: {e}")
-        print("Hint: For .xls install xlrd==1.2.0; for .xlsx install openpyxl.")
-        return 3
-
-    if isinstance(df, dict):
-        # pandas may return dict of DataFrames when reading multiple sheets
-        # pick the first sheet
-        df = next(iter(df.values()))
-
-    orig_len = len(df)
-    # Best-effort: preserve bold in Topic for .xlsx by inserting ** markers
-    if isinstance(sheet_name, (int, str)) and choose_engine(args.input) == "openpyxl":
-        topics_marked = _extract_topic_with_bold_xlsx(args.input, sheet_name)
-        if topics_marked is not None and len(topics_marked) >= len(df):
-            # Align sizes: truncate extras if any due to trailing rows
-            df["Topic"] = topics_marked[: len(df)]
-
-    # Heuristic: if no explicit bold markers, bold the lead segment before the first colon
-    def _heuristic_bold_topic(s: str) -> str:
-        if not isinstance(s, str) or not s:
-            return s
-        if "**" in s or "<strong>" in s or "<b>" in s:
-            return s
-        # Use either ':' or ' : '
-        idx = s.find(":")
-        if idx > 0:
-            left = s[:idx].strip()
-            right = s[idx:]
-            if left:
-                return f"**{left}**{right}"
-        return s
-
-    if "Topic" in df.columns:
-        df["Topic"] = df["Topic"].astype(str).map(_heuristic_bold_topic)
-    df = normalize_columns(df)
+    previous = []
+    if os.path.exists(args.output):
+        try:
+            previous = list(read_csv_records(args.output))
+        except Exception as e:
+            print(
+                "Warning: could not read current dataset, "
+                f"every row counts as added: {e}"
+            )
+    diff = DatasetDiff(previous)
 
     # Ensure output dir
     out_dir = os.path.dirname(os.path.abspath(args.output)) or "."
     os.makedirs(out_dir, exist_ok=True)
 
-    # Backup existing
+    tmp_path = os.devnull if args.diff else f"{args.output}.tmp"
+    dedupe = bool(
+        args.near_duplicates or args.collapse_duplicates or args.duplicates_report
+    )
+    groups: List[Dict] = []
+    started = time.perf_counter()
+    try:
+        if args.merge or dedupe:
+            # Records are needed as a whole: loaded first, written afterwards
+            if args.merge:
+                workbooks = load_workbooks(args.input, sheet, args.jobs)
+                if args.precedence == "modified":
+                    # Stable sort: equal dates keep the command-line order
+                    workbooks.sort(key=lambda w: w["modified"])
+                merge = merge_records(workbooks)
+                records = merge["records"]
+                counts = {"read": sum(w["read"] for w in workbooks)}
+            else:
+                counts = {}
+                records = list(iter_records(iter_rows(args.input[0], sheet), counts))
+            if dedupe:
+                dedupe_started = time.perf_counter()
+                groups = find_near_duplicates(records, args.similarity)
+                dedupe_elapsed = time.perf_counter() - dedupe_started
+                if args.collapse_duplicates:
+                    records = collapse_duplicates(records, groups)
+            counts["written"] = len(records)
+            with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+                write_records(records, out, diff)
+        else:
+            with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+                counts = convert(iter_rows(args.input[0], sheet), out, diff)
+    except Exception as e:
+        if not args.diff and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"Failed converting Excel: {e}")
+        print("Hint: For .xls install xlrd==1.2.0; for .xlsx install openpyxl.")
+        return 3
+    elapsed = time.perf_counter() - started
+    rate = counts["read"] / elapsed if elapsed > 0 else 0
+    print(f"Read {counts['read']} rows in {elapsed:.3f}s ({rate:.0f} rows/s)")
+    if args.merge:
+        print_merge(merge, args.precedence)
+        if args.merge_report:
+            with open(args.merge_report, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"files": merge["files"], "conflicts": merge["conflicts"]},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            print(f"Merge report written to: {args.merge_report}")
+    if dedupe:
+        print_near_duplicates(groups, args.similarity, dedupe_elapsed)
+        if args.collapse_duplicates and groups:
+            dropped = sum(len(g["duplicates"]) for g in groups)
+            print(f"Collapsed: {dropped} rows dropped")
+        if args.duplicates_report:
+            with open(args.duplicates_report, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"similarity": args.similarity, "groups": groups},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            print(f"Near-duplicate report written to: {args.duplicates_report}")
+
+    report = diff.report()
+    print_changes(report, detail=args.diff)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Change report written to: {args.report}")
+    if args.diff:
+        return 0
+
+    store = VersionStore(args.store or os.path.join(out_dir, "versions"))
+    source = ", ".join(os.path.basename(path) for path in args.input)
+    if args.merge:
+        source = f"merge of {source}"
+
+    if os.path.exists(args.output) and filecmp.cmp(
+        tmp_path, args.output, shallow=False
+    ):
+        os.remove(tmp_path)
+        print(f"{args.output} is up to date ({counts['written']} rows), left as is.")
+        store_version(store, args.output, source)
+        return 0
+
+    # Keep the replaced dataset (normally stored by the previous run already)
     if os.path.exists(args.output):
-        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        backup = f"{args.output}.{ts}.bak"
-        try:
-            shutil.copy2(args.output, backup)
-            print(f"Backed up previous CSV to: {backup}")
-        except Exception as e:
-            print(f"Warning: backup failed: {e}")
+        store_version(store, args.output, "before update")
 
     try:
-        df.to_csv(args.output, index=False)
+        os.replace(tmp_path, args.output)
     except Exception as e:
         print(f"Failed writing CSV: {e}")
         return 4
 
     print(
-        f"Wrote {len(df)} rows (from {orig_len}) to {args.output}. Columns: {', '.join(df.columns)}"
+        f"Wrote {counts['written']} rows (from {counts['read']}) to {args.output}. "
+        f"Columns: {', '.join(OUTPUT_COLUMNS)}"
     )
+    entry = store_version(store, args.output, source)
+    if entry:
+        print(
+            f"Stored as version {entry['id']} in {store.root} "
+            f"(rollback: python scripts/dataset_versions.py rollback <id>)"
+        )
     return 0
 
 
@@ -0,0 +1,57 @@
+"""Shared fixtures: the app on an in-process Redis stand-in, without network."""
+
+import os
+import sys
+
+import pytest
+
+# Local services only, set before the storage singletons are created
+for _name in (
+    "KV_REST_API_URL",
+    "UPSTASH_REDIS_REST_URL",
+    "UPSTASH_REDIS_URL",
+    "REDIS_URL",
+    "OPENAI_API_KEY",
+    "OPENAI_BASE_URL",
+    "LLM_REPLAY_MODE",
+):
+    os.environ.pop(_name, None)
+os.environ.setdefault("LOG_LEVEL", "warning")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"
+    ),
+)
+
+from memory_redis import MemoryRedis  # noqa: E402
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """A fresh in-memory Redis behind session storage, jobs and the scoreboard."""
+    from app.utils.scoreboard import scoreboard
+    from app.utils.session_storage import session_storage
+
+    client = MemoryRedis()
+    monkeypatch.setattr(session_storage, "redis_client", client)
+    monkeypatch.setattr(scoreboard, "redis_client", client)
+    return client
+
+
+@pytest.fixture
+def app(redis, monkeypatch):
+    from app import create_app
+    from app.utils.jobs import job_manager
+
+    # Jobs run inside the request: their results are ready for the next call
+    monkeypatch.setattr(job_manager, "executor", "inline")
+    flask_app = create_app()
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,51 @@
+"""JSON API: national results are added to the leaderboard once per quiz."""
+
+from app.utils.constants import TEAM_LIST
+from app.utils.scoreboard import scoreboard
+
+
+def _ready(client, response, url):
+    """Follow a 202 (job pending) to the finished resource."""
+    if response.status_code == 202:
+        job = client.get(response.get_json()["poll"]).get_json()
+        assert job["status"] == "done", job
+        response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _national_quiz(client, team):
+    token = client.post(
+        "/api/v1/quiz", json={"contest": "national", "team": team}
+    ).get_json()["token"]
+    url = f"/api/v1/quiz/{token}/question"
+    _ready(client, client.get(url), url)
+    response = client.post(
+        f"/api/v1/quiz/{token}/answer", json={"answer": "Remplissage vasculaire"}
+    )
+    url = f"/api/v1/quiz/{token}/evaluation"
+    _ready(client, response, url)
+    return token
+
+
+def _team_total(team):
+    return {t["team_name"]: t for t in scoreboard.get_top_teams(limit=None)}[team][
+        "total_score"
+    ]
+
+
+def test_results_replay_after_claim_expiry_adds_score_once(client, redis):
+    team = TEAM_LIST[0]
+    token = _national_quiz(client, team)
+
+    first = client.post(f"/api/v1/quiz/{token}/results").get_json()
+    assert first["ok"]
+    total = _team_total(team)
+    assert total == first["score"]
+
+    assert client.post(f"/api/v1/quiz/{token}/results").get_json() == first
+    # The idempotency claim expires long before the quiz data does
+    redis.delete(f"api:results:{token}")
+    assert client.post(f"/api/v1/quiz/{token}/results").get_json() == first
+
+    assert _team_total(team) == total
@@ -0,0 +1,135 @@
+"""Batch pipeline against the file-based provider: no network involved."""
+
+import json
+
+from app.services.batch import BatchJob, LocalBatchProvider
+
+
+def recommendations(n):
+    return [
+        {
+            "id": f"rec-{i}",
+            "theme": "Anesthésie",
+            "topic": f"Sujet {i}",
+            "recommendation": f"Recommandation numéro {i}.",
+        }
+        for i in range(n)
+    ]
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class DeadOnceProvider(LocalBatchProvider):
+    """The first batch expires without any output; later ones complete."""
+
+    def __init__(self, root_dir):
+        super().__init__(root_dir)
+        self.dead = None
+
+    def submit(self, requests_path, metadata=None):
+        batch_id = super().submit(requests_path, metadata)
+        if self.dead is None:
+            self.dead = batch_id
+        return batch_id
+
+    def status(self, batch_id):
+        if batch_id == self.dead:
+            return {"status": "expired", "counts": {}}
+        return super().status(batch_id)
+
+    def download(self, batch_id, dest_path):
+        if batch_id == self.dead:
+            return False
+        return super().download(batch_id, dest_path)
+
+
+def test_prepare_submit_poll_ingest(tmp_path):
+    job = BatchJob(str(tmp_path / "job"), LocalBatchProvider(str(tmp_path / "p")))
+
+    assert job.prepare(recommendations(4)) == 4
+    batch_id = job.submit()
+    assert batch_id and job.submit() == batch_id
+    assert job.poll(interval=0) == "completed"
+    assert job.ingest() == {"ok": 4, "failed": 0, "skipped": 0}
+
+    results = job.results()
+    assert len(results) == 4
+    assert {r["recommendation"]["id"] for r in results} == {
+        f"rec-{i}" for i in range(4)
+    }
+    assert all(r["vignette"] and r["question"] for r in results)
+
+
+def test_failed_items_are_retried_by_the_next_runs(tmp_path):
+    workdir = tmp_path / "job"
+    provider = LocalBatchProvider(str(tmp_path / "p"), fail_every=3)
+    items = recommendations(10)
+
+    runs = [BatchJob(str(workdir), provider).run(items, interval=0) for _ in range(3)]
+
+    assert [(r["ok"], r["failed"]) for r in runs] == [(7, 3), (2, 1), (1, 0)]
+    assert len(read_jsonl(workdir / "errors.jsonl")) == 4
+    ids = [row["custom_id"] for row in read_jsonl(workdir / "results.jsonl")]
+    assert len(ids) == len(set(ids)) == 10
+
+
+def test_resume_skips_ingested_items(tmp_path):
+    workdir = str(tmp_path / "job")
+    provider = LocalBatchProvider(str(tmp_path / "p"))
+    BatchJob(workdir, provider).run(recommendations(3), interval=0)
+
+    job = BatchJob(workdir, provider)
+    assert job.prepare(recommendations(5)) == 2
+    prepared = [
+        row["custom_id"] for row in read_jsonl(tmp_path / "job" / "items.jsonl")
+    ]
+    assert all(
+        cid.startswith(("vignette:rec-3:", "vignette:rec-4:")) for cid in prepared
+    )
+    assert job.run(recommendations(5), interval=0)["ok"] == 2
+    assert len(job.results()) == 5
+
+
+def test_dead_batch_is_resubmitted(tmp_path):
+    workdir = str(tmp_path / "job")
+    provider = DeadOnceProvider(str(tmp_path / "p"))
+
+    job = BatchJob(workdir, provider)
+    assert job.run(recommendations(3), interval=0) == {
+        "ok": 0,
+        "failed": 0,
+        "skipped": 0,
+    }
+    assert job.state["status"] == "failed"
+    assert job.state["batch_id"] is None
+    assert job.state["failed_batch_id"] == provider.dead
+
+    job = BatchJob(workdir, provider)
+    assert job.run(recommendations(3), interval=0)["ok"] == 3
+    assert job.state["batch_id"] != provider.dead
+
+
+def test_scoring_output_without_score_is_an_error(tmp_path):
+    def responder(custom_id, body):
+        return "Réponse partielle, il manque la surveillance post-opératoire."
+
+    workdir = tmp_path / "job"
+    job = BatchJob(
+        str(workdir),
+        LocalBatchProvider(str(tmp_path / "p"), responder=responder),
+        task="scoring",
+    )
+    item = {
+        "id": "answer-1",
+        "user_answer": "Antibioprophylaxie",
+        "recommendation": recommendations(1)[0],
+    }
+
+    assert job.run([item], interval=0) == {"ok": 0, "failed": 1, "skipped": 0}
+    assert job.results() == []
+    assert read_jsonl(workdir / "errors.jsonl") == [
+        {"custom_id": "scoring:answer-1", "error": "unparseable model output"}
+    ]
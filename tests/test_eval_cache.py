@@ -0,0 +1,115 @@
+"""Answer normalization, question identity and eviction of the evaluation cache."""
+
+import pytest
+
+from app.utils import eval_cache
+from app.utils.eval_cache import EvaluationCache, normalize_answer, question_id
+
+QUESTION = {
+    "recommendation": {"id": "rec-1", "recommendation": "Antibioprophylaxie."},
+    "vignette": "Patient de 60 ans, chirurgie colique.",
+    "question": "Quelle antibioprophylaxie ?",
+}
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("Céfazoline 2 g.", "cefazoline 2 G"),
+        ("Arrêt, puis reprise !", "arret puis   reprise"),
+        ("PAM>65", "pam > 65"),
+        ("PAM >= 65", "PAM ≥ 65"),
+        ("1,5 mg/kg", "1.5 mg kg"),
+    ],
+)
+def test_equivalent_answers_share_a_form(a, b):
+    assert normalize_answer(a) == normalize_answer(b)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("PAM > 65", "PAM < 65"),
+        ("-5 %", "+5 %"),
+        ("5 %", "5"),
+        ("1,5 mg", "15 mg"),
+        ("1.5 mg", "1 5 mg"),
+    ],
+)
+def test_meaningful_symbols_are_kept(a, b):
+    assert normalize_answer(a) != normalize_answer(b)
+
+
+def test_normalize_empty_answer():
+    assert normalize_answer(None) == normalize_answer("  ") == ""
+
+
+def test_question_id_is_stable_and_covers_the_recommendation():
+    assert question_id(QUESTION) == question_id(dict(QUESTION))
+    assert len(question_id(QUESTION)) == 16
+
+    other_rec = dict(
+        QUESTION, recommendation={"id": "rec-2", "recommendation": "Autre."}
+    )
+    other_vignette = dict(QUESTION, vignette="Patiente de 30 ans.")
+    other_question = dict(QUESTION, question="Quelle durée ?")
+    ids = {question_id(q) for q in (other_rec, other_vignette, other_question)}
+    assert question_id(QUESTION) not in ids
+    assert len(ids) == 3
+
+
+def test_question_id_accepts_a_plain_recommendation():
+    plain = dict(QUESTION, recommendation="Antibioprophylaxie.")
+    assert question_id(plain) == question_id(
+        dict(QUESTION, recommendation={"recommendation": "Antibioprophylaxie."})
+    )
+
+
+def test_make_key_ignores_formatting_only():
+    cache = EvaluationCache()
+    key = cache.make_key("Céfazoline 2 g.", QUESTION)
+    assert cache.make_key("cefazoline 2 G", QUESTION) == key
+    assert cache.make_key("Céfazoline 3 g.", QUESTION) != key
+    assert cache.make_key("Céfazoline 2 g.", dict(QUESTION, question="?")) != key
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = EvaluationCache(max_entries=2)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.set("c", {"score": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+    assert cache.stats()["size"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(eval_cache.time, "monotonic", lambda: now[0])
+    cache = EvaluationCache(ttl_seconds=60)
+    cache.set("a", {"score": 4})
+
+    now[0] += 59
+    assert cache.get("a") == {"score": 4}
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_values_are_copies():
+    cache = EvaluationCache()
+    value = {"score": 2, "feedback": "Incomplet"}
+    cache.set("a", value)
+    value["score"] = 5
+    cache.get("a")["score"] = 0
+    assert cache.get("a") == {"score": 2, "feedback": "Incomplet"}
+
+
+def test_zero_capacity_disables_the_cache():
+    cache = EvaluationCache(max_entries=0)
+    cache.set("a", {"score": 1})
+    assert cache.get("a") is None
@@ -0,0 +1,94 @@
+"""Form posts guarded by idempotency tokens."""
+
+import re
+
+import pytest
+from flask import redirect, render_template_string, session
+
+from app.utils.idempotency import FIELD, idempotent
+
+
+@pytest.fixture
+def calls(app):
+    """A guarded POST view counting its runs, and a page issuing tokens."""
+    runs = {"count": 0, "fail": False, "status": 302}
+
+    @idempotent
+    def guarded():
+        runs["count"] += 1
+        if runs["fail"]:
+            raise RuntimeError("view failed")
+        if runs["status"] != 302:
+            return "Formulaire invalide", runs["status"]
+        session["done"] = runs["count"]
+        return redirect(f"/done/{runs['count']}")
+
+    def form():
+        return render_template_string("{{ idempotency_token() }}")
+
+    app.add_url_rule("/test/guarded", "guarded", guarded, methods=["POST"])
+    app.add_url_rule("/test/form", "form", form)
+    return runs
+
+
+def token(client):
+    body = client.get("/test/form").get_data(as_text=True)
+    assert re.fullmatch(r"[0-9a-f]{32}", body)
+    return body
+
+
+def post(client, tok):
+    return client.post("/test/guarded", data={FIELD: tok})
+
+
+def test_double_submit_runs_the_view_once(client, calls):
+    tok = token(client)
+    first = post(client, tok)
+    second = post(client, tok)
+
+    assert calls["count"] == 1
+    assert first.status_code == second.status_code == 302
+    assert first.headers["Location"] == second.headers["Location"]
+
+
+def test_replay_after_complete_restores_the_session(client, calls):
+    tok = token(client)
+    post(client, tok)
+    with client.session_transaction() as s:
+        s.pop("done")
+
+    assert post(client, tok).headers["Location"] == "/done/1"
+    assert calls["count"] == 1
+    with client.session_transaction() as s:
+        assert s["done"] == 1
+
+
+def test_token_is_bound_to_its_session(app, client, calls):
+    tok = token(client)
+    post(client, tok)
+
+    other = app.test_client()
+    token(other)
+    assert post(other, tok).headers["Location"] == "/done/2"
+    assert calls["count"] == 2
+
+
+def test_error_releases_the_token(client, calls):
+    tok = token(client)
+    calls["fail"] = True
+    with pytest.raises(RuntimeError):
+        post(client, tok)
+
+    calls["fail"] = False
+    assert post(client, tok).headers["Location"] == "/done/2"
+    assert post(client, tok).headers["Location"] == "/done/2"
+    assert calls["count"] == 2
+
+
+def test_non_redirect_response_releases_the_token(client, calls):
+    tok = token(client)
+    calls["status"] = 400
+    assert post(client, tok).status_code == 400
+
+    calls["status"] = 302
+    assert post(client, tok).headers["Location"] == "/done/2"
@@ -0,0 +1,100 @@
+"""Job de-duplication and storage of generated personal questions."""
+
+import pytest
+
+from app.services import quiz
+from app.utils import jobs
+from app.utils.jobs import JobFailed, JobManager
+from app.utils.session_storage import session_storage
+
+
+@pytest.fixture(params=["redis", "local"])
+def manager(request, monkeypatch):
+    """An inline job manager, on the in-memory Redis or on process memory."""
+    if request.param == "redis":
+        request.getfixturevalue("redis")
+    else:
+        monkeypatch.setattr(session_storage, "redis_client", None)
+    return JobManager(executor="inline")
+
+
+def test_duplicate_submit_reuses_the_job(manager):
+    runs = []
+    first = manager.submit("test", lambda ctx: runs.append(1) or {}, dedupe_key="k")
+    second = manager.submit("test", lambda ctx: runs.append(2) or {}, dedupe_key="k")
+
+    assert first == second
+    assert runs == [1]
+    assert manager.get(first)["status"] == "done"
+
+
+def test_claim_without_record_is_a_submit_in_progress(manager):
+    assert manager._claim("k", "first") is None
+    # "first" has not saved its record yet
+    assert manager._claim("k", "second") == "first"
+
+
+def test_failed_job_releases_its_key(manager):
+    def fail(ctx):
+        raise JobFailed("boom")
+
+    failed = manager.submit("test", fail, dedupe_key="k")
+    assert manager.get(failed)["status"] == "failed"
+
+    retried = manager.submit("test", lambda ctx: {}, dedupe_key="k")
+    assert retried != failed
+    assert manager.get(retried)["status"] == "done"
+
+
+def test_local_keys_expire_with_their_jobs(monkeypatch):
+    monkeypatch.setattr(session_storage, "redis_client", None)
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    manager = JobManager(executor="inline")
+
+    first = manager.submit("test", lambda ctx: {}, dedupe_key="k")
+    now[0] += jobs.JOB_TTL_SECONDS + 1
+    second = manager.submit("test", lambda ctx: {}, dedupe_key="k")
+
+    assert second != first
+    assert manager.get(first) is None
+    assert list(manager._local_keys) == ["k"]
+
+
+def personal_quiz(questions):
+    return {
+        "topics": ["A"],
+        "topic_pools": {"A": [{"id": "r2"}, {"id": "r3"}]},
+        "questions": list(questions),
+        "current_question": len(questions),
+        "answers": [],
+    }
+
+
+def test_stored_question_keeps_concurrent_changes(redis):
+    session_storage.store_quiz_data("s", personal_quiz([{"q": 1}]))
+    drawn = session_storage.get_quiz_data("s")
+    drawn["topic_pools"]["A"].pop(0)
+    # An answer is recorded while the question is generated
+    current = session_storage.get_quiz_data("s")
+    current["answers"].append("réponse")
+    session_storage.update_quiz_data("s", current)
+
+    assert quiz._store_personal_question("s", drawn, {"q": 2}) == {"ready": True}
+    stored = session_storage.get_quiz_data("s")
+    assert stored["questions"] == [{"q": 1}, {"q": 2}]
+    assert stored["answers"] == ["réponse"]
+    assert stored["topic_pools"]["A"] == [{"id": "r3"}]
+
+
+def test_question_already_stored_is_not_appended_twice(redis):
+    session_storage.store_quiz_data("s", personal_quiz([{"q": 1}]))
+    drawn = session_storage.get_quiz_data("s")
+    other = session_storage.get_quiz_data("s")
+
+    quiz._store_personal_question("s", other, {"q": "other"})
+    assert quiz._store_personal_question("s", drawn, {"q": 2}) == {"ready": True}
+    assert session_storage.get_quiz_data("s")["questions"] == [
+        {"q": 1},
+        {"q": "other"},
+    ]
@@ -0,0 +1,107 @@
+"""Fan-out and bounded memory of the live leaderboard stream."""
+
+import json
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from app.utils.constants import TEAM_LIST
+from app.utils.leaderboard_stream import LeaderboardBroadcaster, team_entry
+
+SUBSCRIBERS = 500
+BURST = 5000
+
+
+class LocalBroadcaster(LeaderboardBroadcaster):
+    """In-process fan-out only, whatever the configured Redis."""
+
+    redis_client = None
+
+
+def delta(team, total, players):
+    entry = team_entry(team, total, players)
+    entry["day"] = "2025-01-01"
+    return entry
+
+
+def test_one_update_reaches_every_stream():
+    broadcaster = LocalBroadcaster(max_subscribers=SUBSCRIBERS)
+    broadcaster.heartbeat_seconds = 0.5
+    snapshot = {"day": "2025-01-01", "teams": []}
+    received = {}
+    lock = threading.Lock()
+    ready = threading.Barrier(SUBSCRIBERS + 1)
+
+    def client(index, subscription):
+        stream = broadcaster.stream(subscription, snapshot)
+        assert "event: snapshot" in next(stream)
+        ready.wait()
+        for chunk in stream:
+            for block in chunk.split("\n\n"):
+                if block.startswith("event: delta"):
+                    with lock:
+                        received[index] = json.loads(block.split("data: ", 1)[1])
+
+    threads = []
+    for i in range(SUBSCRIBERS):
+        subscription = broadcaster.subscribe()
+        assert subscription is not None
+        thread = threading.Thread(target=client, args=(i, subscription), daemon=True)
+        thread.start()
+        threads.append((thread, subscription))
+    ready.wait()
+
+    broadcaster.publish(delta(TEAM_LIST[0], 4, 1))
+    deadline = time.monotonic() + 10
+    while len(received) < SUBSCRIBERS and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    for _, subscription in threads:
+        broadcaster.unsubscribe(subscription)
+    for thread, _ in threads:
+        thread.join(2)
+
+    assert len(received) == SUBSCRIBERS
+    assert all(d["team"] == TEAM_LIST[0] and d["total"] == 4 for d in received.values())
+    assert broadcaster.subscriber_count == 0
+
+
+def test_subscriber_limit():
+    broadcaster = LocalBroadcaster(max_subscribers=2)
+    subscriptions = [broadcaster.subscribe(), broadcaster.subscribe()]
+    assert broadcaster.subscribe() is None
+    broadcaster.unsubscribe(subscriptions[0])
+    assert broadcaster.subscribe() is not None
+
+
+@pytest.fixture
+def traced_memory():
+    tracemalloc.start()
+    yield tracemalloc.get_traced_memory
+    tracemalloc.stop()
+
+
+def test_stalled_streams_hold_one_delta_per_team(traced_memory):
+    broadcaster = LocalBroadcaster(max_subscribers=SUBSCRIBERS)
+    subscriptions = [broadcaster.subscribe() for _ in range(SUBSCRIBERS)]
+
+    halfway = None
+    for i in range(BURST):
+        broadcaster.publish(delta(TEAM_LIST[i % len(TEAM_LIST)], i, i + 1))
+        if i == BURST // 2:
+            halfway, _ = traced_memory()
+    after, _ = traced_memory()
+
+    assert max(len(s) for s in subscriptions) == len(TEAM_LIST)
+    # Pending deltas are replaced, not appended: no growth in the second half
+    assert (after - halfway) / SUBSCRIBERS < 64
+
+    latest = {TEAM_LIST[i % len(TEAM_LIST)]: i for i in range(BURST)}
+    pending = subscriptions[0].get(0)
+    assert {d["team"]: d["total"] for d in pending} == latest
+    # Sent in the order of their last update
+    assert [d["team"] for d in pending] == TEAM_LIST[BURST % len(TEAM_LIST) :] + (
+        TEAM_LIST[: BURST % len(TEAM_LIST)]
+    )
@@ -0,0 +1,45 @@
+"""Streaming reader of Excel sheets in the dataset update script."""
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+import update_recommendations  # noqa: E402
+
+ROWS = [
+    ("Theme", "Topic", "Recommendation", "Grade"),
+    ("Anesthésie", "Airway", "Pré-oxygéner avant l'induction.", "G1+"),
+    ("Réanimation", None, "PAM > 65 mmHg.", 2),
+    (None, None, None, "fin"),
+]
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / "recommendations.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in ROWS:
+        ws.append(row)
+    ws.row_dimensions[2].height = 40
+    wb.save(path)
+    return path
+
+
+def rows(path):
+    return [tuple(r) for r in update_recommendations._iter_xlsx_rows(path, 0)]
+
+
+def test_streamed_rows_match_the_sheet(workbook):
+    assert rows(workbook) == ROWS
+
+
+def test_falls_back_when_openpyxl_internals_change(workbook, monkeypatch):
+    from openpyxl.worksheet import _reader
+
+    class ChangedParser:
+        def __init__(self, src, shared_strings):
+            pass
+
+    monkeypatch.setattr(_reader, "WorkSheetParser", ChangedParser)
+    assert rows(workbook) == ROWS